@@ -0,0 +1,218 @@
+"""
+Response caches for the coach API.
+
+Edit loops often re-submit the exact same draft; caching the generated
+suggestion lets those requests skip the LLM round-trip entirely.
+"""
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric per-vector int8 quantization: vector ~= codes * scale."""
+    peak = float(np.abs(vector).max())
+    if not peak:
+        return np.zeros(vector.shape, dtype=np.int8), 1.0
+    scale = peak / 127
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+def make_cache_key(payload: str) -> str:
+    """Hash a canonical request payload into a compact cache key."""
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    Expired entries are dropped lazily on lookup; once maxsize is reached
+    the least recently used entry is evicted. A maxsize of 0 disables the
+    cache.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store value under key, evicting the oldest entry if full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries and reset hit/miss counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache keyed by draft embeddings.
+
+    Near-duplicate drafts (small edits, different names) embed to almost
+    the same vector, so a stored value is reused when its draft has cosine
+    similarity >= threshold with the new one and the rest of the request
+    (its scope key) matches exactly.
+
+    Vectors are L2-normalized so inner product equals cosine similarity.
+    Search uses FAISS when faiss is installed and a NumPy matrix product
+    otherwise. Once maxsize entries are stored, new entries are ignored.
+
+    With quantize=True, stored vectors are kept as int8 codes plus a float
+    scale per vector (see quantize_int8), cutting memory 4x versus float32.
+    The query stays float32; FAISS ranks candidates on the raw codes, so
+    the top-k are rescored with their scales before the threshold check.
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        threshold: float = 0.95,
+        dim: int = EMBEDDING_DIM,
+        maxsize: int = 100_000,
+        quantize: bool = False
+    ):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.dim = dim
+        self.maxsize = maxsize
+        self.quantize = quantize
+        self._encoder = encoder
+        self._lock = threading.Lock()
+        if faiss is None:
+            self._index = None
+        elif quantize:
+            self._index = faiss.IndexScalarQuantizer(
+                dim, faiss.ScalarQuantizer.QT_8bit_direct_signed, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            self._index = faiss.IndexFlatIP(dim)
+        self._vectors = np.empty((1024, dim), dtype=np.int8 if quantize else np.float32)
+        self._scales = np.ones(1024, dtype=np.float32)
+        self._entries: List[Tuple[str, Any]] = []
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_available() -> bool:
+        """Whether the default sentence-transformers encoder can be loaded."""
+        return SentenceTransformer is not None
+
+    def _get_encoder(self):
+        if self._encoder is None:
+            if SentenceTransformer is None:
+                raise ImportError(
+                    "sentence-transformers package not installed. "
+                    "Install with: pip install sentence-transformers"
+                )
+            self._encoder = SentenceTransformer(self.model_name)
+        return self._encoder
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text as a normalized float32 vector."""
+        vector = np.asarray(self._get_encoder().encode(text), dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _candidates(self, vector: np.ndarray, k: int):
+        """Top-k (score, position) pairs, best first."""
+        count = len(self._entries)
+        if self._index is not None:
+            scores, ids = self._index.search(vector.reshape(1, -1), k)
+            scores, ids = scores[0], ids[0]
+            if not self.quantize:
+                return zip(scores, ids, strict=True)
+            scores = scores * self._scales[ids]
+        else:
+            scores = self._vectors[:count] @ vector
+            if self.quantize:
+                scores *= self._scales[:count]
+            ids = np.argsort(-scores, kind="stable")[:k]
+            scores = scores[ids]
+        order = np.argsort(-scores, kind="stable")
+        return zip(scores[order], ids[order], strict=True)
+
+    def lookup(self, vector: np.ndarray, scope: str, k: int = 8) -> Optional[Any]:
+        """Return the closest stored value with a matching scope, if similar enough."""
+        with self._lock:
+            if self._entries:
+                for score, idx in self._candidates(vector, min(k, len(self._entries))):
+                    if score < self.threshold:
+                        break
+                    entry_scope, value = self._entries[idx]
+                    if entry_scope == scope:
+                        self.hits += 1
+                        return value
+            self.misses += 1
+            return None
+
+    def add(self, vector: np.ndarray, scope: str, value: Any):
+        """Store value under an embedding and scope key."""
+        with self._lock:
+            count = len(self._entries)
+            if count >= self.maxsize:
+                return
+            if count == len(self._scales):
+                self._scales = np.resize(self._scales, count * 2)
+                if self._index is None:
+                    self._vectors = np.resize(self._vectors, (count * 2, self.dim))
+            if self.quantize:
+                vector, self._scales[count] = quantize_int8(vector)
+            if self._index is not None:
+                self._index.add(vector.reshape(1, -1).astype(np.float32))
+            else:
+                self._vectors[count] = vector
+            self._entries.append((scope, value))
+
+    def __len__(self) -> int:
+        return len(self._entries)
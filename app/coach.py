@@ -6,14 +6,56 @@ Provides the main suggest() function for generating compliant rewrites.
 
 import os
 import re
+import copy
+import json
+import string
+import asyncio
+import logging
 import time
-import random
+import itertools
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Union
 from dataclasses import dataclass
 
-from engine.rules import RulesEngine, PolicyHit, get_rules_engine, redact_pii
-from app.providers.provider_manager import call_llm, get_last_provider_used
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    from ahocorasick_rs import AhoCorasick
+except ImportError:
+    AhoCorasick = None
+
+from app.cache import TTLCache, make_cache_key
+from engine.rules import RulesEngine, PolicyHit, get_rules_engine, USE_RE2
+from app.providers.provider_manager import call_llm, call_llm_async, stream_llm, get_last_provider_used
+from app.providers.json_utils import loads_json
+
+
+# No handlers here: the entry point configures them (the API queues app.*
+# records to stdout, see app.api.lifespan)
+logger = logging.getLogger(__name__)
+
+# Guardrail patterns, compiled once at import (through RE2 when enabled)
+_guardrail_re = re2 if USE_RE2 else re
+_SENTENCE_RE = _guardrail_re.compile(r'[.!?]+')
+# One case-insensitive alternation so all rude terms are checked in a single scan
+# ((?i) rather than re.IGNORECASE, which re2.compile does not accept)
+_RUDE_RE = _guardrail_re.compile(r'(?i)\b(?:idiot|stupid|shut up|dumb|moron|fool)\b')
+_SSN_RE = _guardrail_re.compile(r'\b\d{3}-?\d{2}-?\d{4}\b')
+
+# Reuse LLM responses for identical prompts (redacted draft, policies, context,
+# tone). Only safe with deterministic providers (temperature 0, the default).
+ENABLE_LLM_CACHE = os.getenv("ENABLE_LLM_CACHE", "false").lower() == "true"
+_llm_cache = TTLCache(
+    maxsize=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("LLM_CACHE_TTL_S", "3600"))
+)
+
+# Shared rotation position for _parse_llm_response (next() on a count is atomic)
+_rotation_counter = itertools.count()
 
 
 @dataclass
@@ -37,9 +79,9 @@ class CoachGuardrails:
     MIN_CONFIDENCE = 0.3
     
     @staticmethod
-    def is_pii_blocked(text: str) -> bool:
+    def is_pii_blocked(text: str, engine: Optional[RulesEngine] = None) -> bool:
         """Check if text contains PII that should block LLM processing."""
-        engine = get_rules_engine()
+        engine = engine or get_rules_engine()
         return engine.contains_pii(text)
     
     @staticmethod
@@ -49,7 +91,7 @@ class CoachGuardrails:
             return False
         
         # Count sentences (rough heuristic)
-        sentences = len(re.findall(r'[.!?]+', text))
+        sentences = len(_SENTENCE_RE.findall(text))
         if sentences > CoachGuardrails.MAX_SENTENCES:
             return False
         
@@ -58,25 +100,19 @@ class CoachGuardrails:
     @staticmethod
     def contains_rude_terms(text: str) -> bool:
         """Check if text contains rude/inappropriate terms."""
-        rude_patterns = [
-            r'\bidiot\b', r'\bstupid\b', r'\bshut up\b',
-            r'\bdumb\b', r'\bmoron\b', r'\bfool\b'
-        ]
-        text_lower = text.lower()
-        return any(re.search(pattern, text_lower) for pattern in rude_patterns)
+        return _RUDE_RE.search(text) is not None
     
     @staticmethod
-    def still_violates_policy(text: str, policy_ids: List[str]) -> bool:
+    def still_violates_policy(
+        text: str,
+        policy_ids: List[str],
+        engine: Optional[RulesEngine] = None
+    ) -> bool:
         """Check if text still violates the given policies."""
-        engine = get_rules_engine()
-        hits = engine.find_policy_hits(text)
-        
+        engine = engine or get_rules_engine()
         # Check if any of the original policy violations are still present
-        for hit in hits:
-            if hit.policy_id in policy_ids and hit.matched_pattern != "<missing_disclosure>":
-                return True
-        
-        return False
+        # (pattern matches only; spans and missing-disclosure checks aren't needed)
+        return bool(engine.matched_policy_ids(text, frozenset(policy_ids)))
 
 
 def _check_pii_leakage(original: str, suggestion: str, violations: List[str]) -> bool:
@@ -91,38 +127,36 @@ def _check_pii_leakage(original: str, suggestion: str, violations: List[str]) ->
     Returns:
         True if PII was leaked into the suggestion
     """
-    # If no PII violations, skip check
-    if not any("PII" in v for v in violations):
+    # Policy ids are "<FAMILY>-<NAME>"; skip the check unless a PII policy fired
+    if "PII" not in {v.split("-", 1)[0] for v in violations}:
         return False
     
-    # Extract SSN patterns (with or without dashes)
-    ssn_pattern = r'\b\d{3}-?\d{2}-?\d{4}\b'
-    
-    # Find all SSNs in original
-    original_ssns = set(re.findall(ssn_pattern, original))
+    # Find all SSNs in original (with or without dashes)
+    original_ssns = set(_SSN_RE.findall(original))
     if not original_ssns:
         return False
     
     # Check if ANY SSN or partial appears in suggestion
-    for ssn in original_ssns:
+    variants = _ssn_variants(original_ssns)
+    if AhoCorasick is not None:
+        # One automaton sweep for all variants. Built per call on purpose:
+        # a cached matcher would keep raw SSNs alive in process memory.
+        return bool(AhoCorasick(list(variants)).find_matches_as_indexes(suggestion))
+    return any(variant in suggestion for variant in variants)
+
+
+def _ssn_variants(ssns: set) -> set:
+    """Full and partial forms of each SSN that must not appear in a suggestion."""
+    variants = set()
+    for ssn in ssns:
         # Remove dashes for flexible matching
         ssn_digits = ssn.replace('-', '')
+        variants.update((ssn, ssn_digits))
         
-        # Check for full SSN (with or without dashes)
-        if ssn in suggestion or ssn_digits in suggestion:
-            return True
-        
-        # Check for partial SSN (last 4, middle 2, etc.)
-        # Extract groups: XXX-YY-ZZZZ
+        # Partial SSN (last 4, middle 2, first 3) from XXX-YY-ZZZZ
         if len(ssn_digits) == 9:
-            last_4 = ssn_digits[-4:]
-            middle_2 = ssn_digits[3:5]
-            first_3 = ssn_digits[:3]
-            
-            if last_4 in suggestion or middle_2 in suggestion or first_3 in suggestion:
-                return True
-    
-    return False
+            variants.update((ssn_digits[-4:], ssn_digits[3:5], ssn_digits[:3]))
+    return variants
 
 
 # DEPRECATED: Hardcoded fallbacks removed - now relying purely on LLM responses
@@ -187,8 +221,16 @@ def _check_pii_leakage(original: str, suggestion: str, violations: List[str]) ->
 #     return fallbacks.get(policy_id, fallbacks["DISC-1.1"])
 
 
+COACH_SYSTEM_PROMPT = "You are a compliance QA coach for financial support. Return STRICT JSON only."
+
+
+@lru_cache(maxsize=1)
 def load_prompt_template() -> str:
-    """Load the coach prompt template from file. Tries v3_enhanced first, then v2, then v1."""
+    """
+    Load the coach prompt template from file. Tries v3_enhanced first, then v2, then v1.
+    
+    The template is static, so it is read once and cached for the process.
+    """
     # Try v3_enhanced (best of v2 + v3) first
     template_v3_enhanced_path = Path(__file__).parent / "prompts" / "coach_prompt_v3_enhanced.txt"
     if template_v3_enhanced_path.exists():
@@ -207,12 +249,27 @@ def load_prompt_template() -> str:
         return f.read()
 
 
+@lru_cache(maxsize=1)
+def _template_segments() -> Tuple[Tuple[str, Optional[str]], ...]:
+    """
+    Pre-parse the prompt template into (literal, field name) pairs.
+    
+    Equivalent to template.format(...) with plain {field} placeholders, but
+    the format string is parsed once instead of on every build_prompt call.
+    """
+    return tuple(
+        (literal, field)
+        for literal, field, _, _ in string.Formatter().parse(load_prompt_template())
+    )
+
+
 def build_prompt(
     agent_draft: str,
     context: str,
     policy_hits: List[str],
     brand_tone: str,
-    required_disclosures: List[str]
+    required_disclosures: List[str],
+    engine: Optional[RulesEngine] = None
 ) -> Dict[str, str]:
     """
     Build the prompt for the LLM.
@@ -223,14 +280,47 @@ def build_prompt(
         policy_hits: List of policy IDs that were violated
         brand_tone: Desired brand tone
         required_disclosures: Required disclosure phrases
+        engine: Rules engine to use (defaults to the shared engine)
         
     Returns:
         Dict with 'system' and 'user' prompts
     """
-    template = load_prompt_template()
+    engine = engine or get_rules_engine()
     
+    # Get first disclosure or default
+    disclosure_text = required_disclosures[0] if required_disclosures else "Investments may lose value."
+    
+    # Fast path: without context only the draft varies between requests,
+    # so the text around it is rendered once and cached
+    if not context:
+        frame = _prompt_frame(engine, brand_tone, tuple(policy_hits), disclosure_text)
+        return {"system": COACH_SYSTEM_PROMPT, "user": agent_draft.join(frame)}
+    
+    prompt = agent_draft.join(_render_frame(engine, brand_tone, tuple(policy_hits), disclosure_text, context))
+    
+    # Add context-specific guidance to make responses more dynamic
+    prompt += f"\n\nIMPORTANT: The customer's situation is: '{context}'. Tailor your response to address this specific context while remaining compliant."
+    
+    return {
+        "system": COACH_SYSTEM_PROMPT,
+        "user": prompt
+    }
+
+
+def _render_frame(
+    engine: RulesEngine,
+    brand_tone: str,
+    policy_hits: Tuple[str, ...],
+    disclosure_text: str,
+    context: str
+) -> Tuple[str, ...]:
+    """
+    Fill every template field except the draft.
+    
+    Returns the text pieces between {agent_draft} placeholders, so the
+    full prompt is agent_draft.join(pieces).
+    """
     # Build policies summary
-    engine = get_rules_engine()
     policies_summary = []
     for policy_id in policy_hits:
         policy = engine.get_policy_by_id(policy_id)
@@ -239,175 +329,288 @@ def build_prompt(
     
     policies_text = "\n".join(policies_summary) if policies_summary else "No specific policies triggered"
     
-    # Get first disclosure or default
-    disclosure_text = required_disclosures[0] if required_disclosures else "Investments may lose value."
-    
     # Enhance context to make responses more situational
     enhanced_context = context if context else "General inquiry"
     
     # Fill template
-    prompt = template.format(
-        brand_tone=brand_tone,
-        policies_summary=policies_text,
-        disclosure_text=disclosure_text,
-        agent_draft=agent_draft,
-        context=enhanced_context
-    )
-    
-    # Add context-specific guidance to make responses more dynamic
-    if context:
-        prompt += f"\n\nIMPORTANT: The customer's situation is: '{context}'. Tailor your response to address this specific context while remaining compliant."
-    
-    return {
-        "system": "You are a compliance QA coach for financial support. Return STRICT JSON only.",
-        "user": prompt
+    values = {
+        "brand_tone": brand_tone,
+        "policies_summary": policies_text,
+        "disclosure_text": disclosure_text,
+        "context": enhanced_context
     }
+    pieces, current = [], []
+    for literal, field in _template_segments():
+        current.append(literal)
+        if field == "agent_draft":
+            pieces.append("".join(current))
+            current = []
+        elif field:
+            current.append(values[field])
+    pieces.append("".join(current))
+    return tuple(pieces)
 
 
-def inject_disclosure_if_needed(suggestion: str, agent_draft: str) -> str:
+@lru_cache(maxsize=128)
+def _prompt_frame(
+    engine: RulesEngine,
+    brand_tone: str,
+    policy_hits: Tuple[str, ...],
+    disclosure_text: str
+) -> Tuple[str, ...]:
+    """Cached _render_frame() for requests without context."""
+    return _render_frame(engine, brand_tone, policy_hits, disclosure_text, "")
+
+
+def inject_disclosure_if_needed(
+    suggestion: str,
+    agent_draft: str,
+    engine: Optional[RulesEngine] = None
+) -> str:
     """
     Inject disclosure if the suggestion talks about returns/investments but lacks disclosure.
     
     Args:
         suggestion: The suggested rewrite
         agent_draft: Original agent draft
+        engine: Rules engine to use (defaults to the shared engine)
         
     Returns:
         Suggestion with disclosure injected if needed
     """
-    engine = get_rules_engine()
-    
-    # Check if we're talking about financial topics
-    if not engine.requires_disclosure(suggestion):
-        return suggestion
+    return inject_disclosure_batch([suggestion], engine)[0]
+
+
+def inject_disclosure_batch(texts: List[str], engine: Optional[RulesEngine] = None) -> List[str]:
+    """
+    Apply inject_disclosure_if_needed() to several texts at once.
     
-    # Check if disclosure is already present
-    if engine.has_disclosure(suggestion):
-        return suggestion
+    The disclosure phrases are looked up once for the whole batch rather
+    than once per text.
     
-    # Inject disclosure
-    disclosure_phrases = engine.get_disclosure_phrases()
-    if disclosure_phrases:
-        # Use a shortened version for brevity
-        disclosure = "Investments may lose value."
-        return f"{suggestion} {disclosure}"
+    Args:
+        texts: Suggestion texts (e.g. primary suggestion plus alternates)
+        engine: Rules engine to use (defaults to the shared engine)
+        
+    Returns:
+        Texts with disclosure appended where needed, in input order
+    """
+    engine = engine or get_rules_engine()
+    if not engine.get_disclosure_phrases():
+        return list(texts)
     
-    return suggestion
+    # Use a shortened version for brevity
+    disclosure = "Investments may lose value."
+    return [
+        f"{text} {disclosure}"
+        # Financial topic without a disclosure already present
+        if engine.requires_disclosure(text) and not engine.has_disclosure(text)
+        else text
+        for text in texts
+    ]
 
 
-def suggest(
-    agent_draft: str,
-    context: str = "",
-    policy_hits: Optional[List[str]] = None,
-    brand_tone: str = "professional, clear, empathetic",
-    required_disclosures: Optional[List[str]] = None
-) -> SuggestionResponse:
+def find_evidence_spans(agent_draft: str, policy_ids: List[str]) -> List[Tuple[int, int]]:
     """
-    Generate a compliant suggestion for a risky agent draft.
+    Locate the spans in a draft that triggered the given policies.
     
-    NEW BEHAVIOR: Redacts PII before sending to LLM, lets LLM handle all rewrites.
-    No more hardcoded fallback templates.
+    Matches suggest(): the draft is PII-redacted before scanning, and
+    [(0, 0)] is returned when nothing matches.
     
     Args:
-        agent_draft: The agent's draft message that may have compliance issues
-        context: Additional context about the conversation
-        policy_hits: List of policy IDs that were violated (if known)
-        brand_tone: Desired brand tone for suggestions
-        required_disclosures: Required disclosure phrases
+        agent_draft: The agent's draft message
+        policy_ids: Policy IDs whose evidence should be returned
         
     Returns:
-        SuggestionResponse with suggestion, alternates, rationale, etc.
+        List of (start, end) character spans
     """
-    start_time = time.time()
+    engine = get_rules_engine()
+    redacted_draft, _ = engine.redact_pii(agent_draft)
+    return _scan_policy_hits(redacted_draft, policy_ids, engine)[1]
+
+
+def _scan_policy_hits(
+    redacted_draft: str,
+    policy_hits: Optional[List[str]],
+    engine: RulesEngine
+) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Scan a redacted draft once for both policy IDs and evidence spans.
+    
+    If policy_hits is empty, the IDs found in the draft are used.
     
+    Returns:
+        Tuple of (policy_hits, evidence_spans); spans default to [(0, 0)]
+    """
+    hits = engine.find_policy_hits(redacted_draft)
+    if not policy_hits:
+        policy_hits = list({h.policy_id for h in hits})
+    policy_set = frozenset(policy_hits)
+    evidence_spans = [
+        (h.span[0], h.span[1]) for h in hits if h.policy_id in policy_set and h.span != (0, 0)
+    ]
+    return policy_hits, evidence_spans or [(0, 0)]
+
+
+def _redact_draft(agent_draft: str, engine: RulesEngine) -> Tuple[str, Dict[str, str]]:
+    """Redact PII from the draft before it is sent anywhere."""
+    redacted_draft, redaction_map = engine.redact_pii(agent_draft)
+    if redaction_map:
+        logger.info("🔒 PII detected and redacted: %s", list(redaction_map.keys()))
+    return redacted_draft, redaction_map
+
+
+def _prepare_suggestion(
+    agent_draft: str,
+    context: str,
+    policy_hits: Optional[List[str]],
+    brand_tone: str,
+    required_disclosures: Optional[List[str]],
+    engine: RulesEngine
+) -> Tuple[Dict[str, str], List[str], List[Tuple[int, int]], Dict[str, str]]:
+    """
+    Redact PII, detect policy hits and build the LLM prompt.
+    
+    Returns:
+        Tuple of (prompt_dict, policy_hits, evidence_spans, redaction_map)
+    """
     if policy_hits is None:
         policy_hits = []
     if required_disclosures is None:
         required_disclosures = []
     
     # NEW: Redact PII before processing instead of blocking
-    redacted_draft, redaction_map = redact_pii(agent_draft)
-    has_pii = len(redaction_map) > 0
+    redacted_draft, redaction_map = _redact_draft(agent_draft, engine)
     
-    if has_pii:
-        print(f"🔒 PII detected and redacted: {list(redaction_map.keys())}")
+    # Detect policy hits if not provided, and evidence spans, in one scan of the redacted draft
+    policy_hits, evidence_spans = _scan_policy_hits(redacted_draft, policy_hits, engine)
     
-    # Detect policy hits if not provided (use redacted version)
-    if not policy_hits:
-        engine = get_rules_engine()
-        hits = engine.find_policy_hits(redacted_draft)
-        policy_hits = list(set([h.policy_id for h in hits]))
-        evidence_spans = [(h.span[0], h.span[1]) for h in hits if h.span != (0, 0)]
-    else:
-        # Build evidence spans from detected patterns
-        engine = get_rules_engine()
-        all_hits = engine.find_policy_hits(redacted_draft)
-        evidence_spans = [(h.span[0], h.span[1]) for h in all_hits if h.policy_id in policy_hits and h.span != (0, 0)]
+    # Build prompt with REDACTED version
+    prompt_dict = build_prompt(redacted_draft, context, policy_hits, brand_tone, required_disclosures, engine)
     
-    if not evidence_spans:
-        evidence_spans = [(0, 0)]
+    return prompt_dict, policy_hits, evidence_spans, redaction_map
+
+
+def _redact_and_build_prompt(
+    agent_draft: str,
+    context: str,
+    policy_hits: List[str],
+    brand_tone: str,
+    required_disclosures: Optional[List[str]],
+    engine: RulesEngine
+) -> Tuple[str, Dict[str, str], Dict[str, str]]:
+    """
+    Redact PII and build the LLM prompt for known policy hits.
     
-    # Build prompt with REDACTED version
-    prompt_dict = build_prompt(redacted_draft, context, policy_hits, brand_tone, required_disclosures)
+    Returns:
+        Tuple of (redacted_draft, redaction_map, prompt_dict)
+    """
+    redacted_draft, redaction_map = _redact_draft(agent_draft, engine)
+    prompt_dict = build_prompt(
+        redacted_draft, context, policy_hits, brand_tone, required_disclosures or [], engine
+    )
+    return redacted_draft, redaction_map, prompt_dict
+
+
+def _leaked_placeholder(text: str, redaction_map: Dict[str, str]) -> Optional[str]:
+    """Return the first redaction placeholder that appears in text, if any."""
+    # Every placeholder contains "_REDACTED_", so one substring test clears
+    # the common case before a single alternation search over all of them.
+    if redaction_map and "_REDACTED_" in text:
+        leaked = re.search("|".join(map(re.escape, redaction_map)), text)
+        if leaked:
+            return leaked.group(0)
+    return None
+
+
+def _parse_llm_response(
+    response: Dict[str, Any],
+    policy_hits: List[str],
+    redaction_map: Dict[str, str]
+) -> Tuple[str, List[str], str, List[str], float]:
+    """
+    Extract and rotate suggestion fields from the LLM's JSON response.
     
-    # Call LLM with retry logic - LLM now handles ALL cases
-    try:
-        response = call_llm(prompt_dict)
-        provider_used = get_last_provider_used()
-        
-        # Extract fields with defaults
-        suggestion = response.get("suggestion", "")
-        alternates = response.get("alternates", [])
-        rationale = response.get("rationale", "")
-        policy_refs = response.get("policy_refs", policy_hits)
-        confidence = float(response.get("confidence", 0.5))
-        
-        # Ensure we have 2 alternates
-        while len(alternates) < 2:
-            alternates.append(suggestion)
-        alternates = alternates[:2]
-        
-        # ENHANCEMENT: Rotate through all suggestions for variety
-        # Collect all valid options (primary + alternates)
-        all_suggestions = [suggestion] + alternates
-        
-        # Filter out duplicates and empty strings
-        unique_suggestions = []
-        seen = set()
-        for s in all_suggestions:
-            if s and s not in seen:
-                unique_suggestions.append(s)
-                seen.add(s)
+    Returns:
+        Tuple of (suggestion, alternates, rationale, policy_refs, confidence)
         
-        # Use a different suggestion each time for variety (60% chance to rotate)
-        if len(unique_suggestions) > 1 and random.random() > 0.4:
-            # Pick a random alternate
-            chosen_idx = random.randint(0, len(unique_suggestions) - 1)
+    Raises:
+        ValueError: If the LLM leaked a redacted PII placeholder
+    """
+    # Extract fields with defaults
+    suggestion = response.get("suggestion", "")
+    alternates = response.get("alternates", [])
+    rationale = response.get("rationale", "")
+    policy_refs = response.get("policy_refs", policy_hits)
+    confidence = float(response.get("confidence", 0.5))
+    
+    # Ensure we have 2 alternates
+    while len(alternates) < 2:
+        alternates.append(suggestion)
+    alternates = alternates[:2]
+    
+    # ENHANCEMENT: Rotate through all suggestions for variety
+    # Collect all valid options (primary + alternates)
+    all_suggestions = [suggestion] + alternates
+    
+    # Filter out duplicates and empty strings
+    unique_suggestions = []
+    seen = set()
+    for s in all_suggestions:
+        if s and s not in seen:
+            unique_suggestions.append(s)
+            seen.add(s)
+    
+    # Use a different suggestion each time for variety: cycle through the options
+    if len(unique_suggestions) > 1:
+        chosen_idx = next(_rotation_counter) % len(unique_suggestions)
+        if chosen_idx:
             suggestion = unique_suggestions[chosen_idx]
             # Rearrange alternates
             alternates = [s for i, s in enumerate(unique_suggestions) if i != chosen_idx][:2]
-        
-        # CRITICAL: Validate LLM didn't leak the redacted placeholders
-        for placeholder in redaction_map.keys():
-            if placeholder in suggestion:
-                raise ValueError(f"LLM leaked PII placeholder: {placeholder}")
-        
-    except Exception as e:
-        # On LLM failure, raise error - no hardcoded fallbacks
-        print(f"❌ LLM call failed: {e}")
-        # Return a minimal error response
-        latency_ms = int((time.time() - start_time) * 1000)
-        return SuggestionResponse(
-            suggestion="I apologize, but I'm unable to process this request at the moment. Please try again.",
-            alternates=["I'm experiencing technical difficulties. Please retry your request.", 
-                       "System temporarily unavailable. Please try again shortly."],
-            rationale=f"LLM error: {str(e)}",
-            policy_refs=policy_hits,
-            confidence=0.0,
-            evidence_spans=evidence_spans,
-            latency_ms=latency_ms,
-            used_safe_template=False
-        )
+    
+    # CRITICAL: Validate LLM didn't leak the redacted placeholders
+    leaked = _leaked_placeholder(suggestion, redaction_map)
+    if leaked:
+        raise ValueError(f"LLM leaked PII placeholder: {leaked}")
+    
+    return suggestion, alternates, rationale, policy_refs, confidence
+
+
+def _error_response(
+    error: Exception,
+    policy_hits: List[str],
+    evidence_spans: List[Tuple[int, int]],
+    start_time: float
+) -> SuggestionResponse:
+    """Build the minimal response returned when the LLM call fails."""
+    # On LLM failure, raise error - no hardcoded fallbacks
+    logger.error("❌ LLM call failed: %s", error)
+    # Return a minimal error response
+    latency_ms = int((time.time() - start_time) * 1000)
+    return SuggestionResponse(
+        suggestion="I apologize, but I'm unable to process this request at the moment. Please try again.",
+        alternates=["I'm experiencing technical difficulties. Please retry your request.", 
+                   "System temporarily unavailable. Please try again shortly."],
+        rationale=f"LLM error: {str(error)}",
+        policy_refs=policy_hits,
+        confidence=0.0,
+        evidence_spans=evidence_spans,
+        latency_ms=latency_ms,
+        used_safe_template=False
+    )
+
+
+def _apply_guardrails(
+    fields: Tuple[str, List[str], str, List[str], float],
+    agent_draft: str,
+    policy_hits: List[str],
+    evidence_spans: List[Tuple[int, int]],
+    start_time: float,
+    engine: RulesEngine
+) -> SuggestionResponse:
+    """Run output guardrails on parsed LLM fields and build the final response."""
+    suggestion, alternates, rationale, policy_refs, confidence = fields
     
     # Guardrail 2: Validate output length and content
     if not CoachGuardrails.validate_output_length(suggestion):
@@ -423,22 +626,21 @@ def suggest(
             suggestion = alternates[0]
         else:
             # Ask LLM to try again
-            print(f"⚠️ Rude terms detected in LLM output: {suggestion}")
+            logger.warning("⚠️ Rude terms detected in LLM output: %s", suggestion)
             suggestion = "I'd be happy to help you with that. Let me provide some information."
     
     # Guardrail 4: Verify suggestion doesn't still violate policies
-    if CoachGuardrails.still_violates_policy(suggestion, policy_hits):
+    if CoachGuardrails.still_violates_policy(suggestion, policy_hits, engine):
         # Try first alternate
-        if alternates and not CoachGuardrails.still_violates_policy(alternates[0], policy_hits):
+        if alternates and not CoachGuardrails.still_violates_policy(alternates[0], policy_hits, engine):
             suggestion = alternates[0]
         else:
-            print(f"⚠️ Suggestion still violates policy: {suggestion}")
+            logger.warning("⚠️ Suggestion still violates policy: %s", suggestion)
             # Use generic professional response
             suggestion = "I understand your question. Let me provide you with accurate information about this."
     
     # Post-process: Inject disclosure if needed
-    suggestion = inject_disclosure_if_needed(suggestion, agent_draft)
-    alternates = [inject_disclosure_if_needed(alt, agent_draft) for alt in alternates]
+    suggestion, *alternates = inject_disclosure_batch([suggestion] + alternates, engine)
     
     latency_ms = int((time.time() - start_time) * 1000)
     
@@ -452,3 +654,372 @@ def suggest(
         latency_ms=latency_ms,
         used_safe_template=False
     )
+
+
+def _llm_cache_key(prompt_dict: Dict[str, Any]) -> str:
+    return make_cache_key(json.dumps(
+        [prompt_dict.get("system"), prompt_dict.get("user"), prompt_dict.get("max_tokens")]
+    ))
+
+
+def _call_llm_cached(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """call_llm() through the response cache when ENABLE_LLM_CACHE is on."""
+    if not ENABLE_LLM_CACHE:
+        return call_llm(prompt_dict)
+    
+    key = _llm_cache_key(prompt_dict)
+    response = _llm_cache.get(key)
+    if response is None:
+        response = call_llm(prompt_dict)
+        _llm_cache.set(key, response)
+    # Parsing mutates the response, so never hand out the cached object
+    return copy.deepcopy(response)
+
+
+async def _call_llm_cached_async(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Async counterpart of _call_llm_cached()."""
+    if not ENABLE_LLM_CACHE:
+        return await call_llm_async(prompt_dict)
+    
+    key = _llm_cache_key(prompt_dict)
+    response = _llm_cache.get(key)
+    if response is None:
+        response = await call_llm_async(prompt_dict)
+        _llm_cache.set(key, response)
+    return copy.deepcopy(response)
+
+
+def suggest(
+    agent_draft: str,
+    context: str = "",
+    policy_hits: Optional[List[str]] = None,
+    brand_tone: str = "professional, clear, empathetic",
+    required_disclosures: Optional[List[str]] = None
+) -> SuggestionResponse:
+    """
+    Generate a compliant suggestion for a risky agent draft.
+    
+    NEW BEHAVIOR: Redacts PII before sending to LLM, lets LLM handle all rewrites.
+    No more hardcoded fallback templates.
+    
+    Args:
+        agent_draft: The agent's draft message that may have compliance issues
+        context: Additional context about the conversation
+        policy_hits: List of policy IDs that were violated (if known)
+        brand_tone: Desired brand tone for suggestions
+        required_disclosures: Required disclosure phrases
+        
+    Returns:
+        SuggestionResponse with suggestion, alternates, rationale, etc.
+    """
+    start_time = time.time()
+    engine = get_rules_engine()
+    
+    prompt_dict, policy_hits, evidence_spans, redaction_map = _prepare_suggestion(
+        agent_draft, context, policy_hits, brand_tone, required_disclosures, engine
+    )
+    
+    # Call LLM with retry logic - LLM now handles ALL cases
+    try:
+        response = _call_llm_cached(prompt_dict)
+        provider_used = get_last_provider_used()
+        fields = _parse_llm_response(response, policy_hits, redaction_map)
+    except Exception as e:
+        return _error_response(e, policy_hits, evidence_spans, start_time)
+    
+    return _apply_guardrails(fields, agent_draft, policy_hits, evidence_spans, start_time, engine)
+
+
+async def suggest_async(
+    agent_draft: str,
+    context: str = "",
+    policy_hits: Optional[List[str]] = None,
+    brand_tone: str = "professional, clear, empathetic",
+    required_disclosures: Optional[List[str]] = None
+) -> SuggestionResponse:
+    """
+    Async variant of suggest() for use inside an event loop.
+    
+    The LLM call is awaited through call_llm_async; redaction, prompt
+    building and rules scanning run in worker threads. When policy_hits are
+    supplied, the prompt does not depend on the scan, so the evidence-span
+    scan runs while the LLM request is in flight.
+    
+    Args:
+        Same as suggest()
+        
+    Returns:
+        SuggestionResponse with suggestion, alternates, rationale, etc.
+    """
+    start_time = time.time()
+    engine = get_rules_engine()
+    
+    spans_task = None
+    if policy_hits:
+        redacted_draft, redaction_map, prompt_dict = await asyncio.to_thread(
+            _redact_and_build_prompt, agent_draft, context, policy_hits, brand_tone, required_disclosures, engine
+        )
+        spans_task = asyncio.create_task(
+            asyncio.to_thread(_scan_policy_hits, redacted_draft, policy_hits, engine)
+        )
+    else:
+        prompt_dict, policy_hits, evidence_spans, redaction_map = await asyncio.to_thread(
+            _prepare_suggestion, agent_draft, context, policy_hits, brand_tone, required_disclosures, engine
+        )
+    
+    fields, error = None, None
+    try:
+        response = await _call_llm_cached_async(prompt_dict)
+        fields = _parse_llm_response(response, policy_hits, redaction_map)
+    except Exception as e:
+        error = e
+    
+    if spans_task is not None:
+        _, evidence_spans = await spans_task
+    
+    if error is not None:
+        return _error_response(error, policy_hits, evidence_spans, start_time)
+    
+    return await asyncio.to_thread(
+        _apply_guardrails, fields, agent_draft, policy_hits, evidence_spans, start_time, engine
+    )
+
+
+# Output budget per draft for suggest_batch(); a whole batch shares one response
+BATCH_TOKENS_PER_DRAFT = 300
+
+
+def suggest_batch(
+    drafts: List[str],
+    contexts: Optional[List[str]] = None,
+    brand_tone: str = "professional, clear, empathetic",
+    required_disclosures: Optional[List[str]] = None,
+    batch_size: int = 8
+) -> List[SuggestionResponse]:
+    """
+    Generate suggestions for many drafts with one LLM call per batch.
+    
+    Drafts are tagged [1]..[n] in a single prompt and the LLM returns one
+    result per tag, so the system prompt and network round-trip are paid
+    once per batch instead of once per draft. Each result goes through the
+    same parsing and guardrails as suggest(); drafts the LLM skipped are
+    retried individually with suggest().
+    
+    Args:
+        drafts: Agent draft messages
+        contexts: Context per draft (same length as drafts), if any
+        brand_tone: Desired brand tone for all suggestions
+        required_disclosures: Required disclosure phrases
+        batch_size: Maximum drafts per LLM call
+        
+    Returns:
+        One SuggestionResponse per draft, in input order
+        
+    Raises:
+        ValueError: If contexts is given with a different length than drafts
+    """
+    if contexts is None:
+        contexts = [""] * len(drafts)
+    elif len(contexts) != len(drafts):
+        raise ValueError(f"Got {len(contexts)} contexts for {len(drafts)} drafts")
+    
+    results = []
+    for offset in range(0, len(drafts), batch_size):
+        results.extend(_suggest_one_batch(
+            drafts[offset:offset + batch_size],
+            contexts[offset:offset + batch_size],
+            brand_tone,
+            required_disclosures
+        ))
+    return results
+
+
+def _suggest_one_batch(
+    drafts: List[str],
+    contexts: List[str],
+    brand_tone: str,
+    required_disclosures: Optional[List[str]]
+) -> List[SuggestionResponse]:
+    """Run one batched LLM call for suggest_batch()."""
+    start_time = time.time()
+    engine = get_rules_engine()
+    
+    # (redacted_draft, redaction_map, policy_hits, evidence_spans) per draft
+    prepared = []
+    for draft in drafts:
+        redacted_draft, redaction_map = _redact_draft(draft, engine)
+        prepared.append((redacted_draft, redaction_map, *_scan_policy_hits(redacted_draft, None, engine)))
+    
+    redacted_drafts = [redacted for redacted, _, _, _ in prepared]
+    all_policy_hits = sorted({policy_id for _, _, hits, _ in prepared for policy_id in hits})
+    tagged_drafts = "\n".join(f"[{i}] {draft}" for i, draft in enumerate(redacted_drafts, 1))
+    tagged_contexts = "\n".join(f"[{i}] {context}" for i, context in enumerate(contexts, 1) if context)
+    
+    prompt_dict = build_prompt(
+        tagged_drafts, tagged_contexts, all_policy_hits, brand_tone, required_disclosures or [], engine
+    )
+    prompt_dict["user"] += (
+        f"\n\nBATCH MODE: The agent draft section contains {len(drafts)} separate drafts "
+        "tagged [1], [2], ... (contexts use the same tags). Rewrite each draft independently. "
+        'Respond with a JSON object {"results": [...]} holding one object per draft, each with '
+        'an "index" field (the draft\'s tag number) plus the usual "suggestion", "alternates", '
+        '"rationale", "policy_refs" and "confidence" fields.'
+    )
+    prompt_dict["max_tokens"] = BATCH_TOKENS_PER_DRAFT * len(drafts)
+    
+    try:
+        response = _call_llm_cached(prompt_dict)
+    except Exception as e:
+        return [
+            _error_response(e, hits, spans, start_time)
+            for _, _, hits, spans in prepared
+        ]
+    
+    # Results whose index doesn't parse are dropped; their drafts are retried singly
+    items = {}
+    for item in response.get("results", []):
+        if not isinstance(item, dict):
+            continue
+        try:
+            items[int(item["index"])] = item
+        except (KeyError, TypeError, ValueError):
+            continue
+    
+    results = []
+    for i, (draft, context) in enumerate(zip(drafts, contexts, strict=True), 1):
+        _, redaction_map, policy_hits, evidence_spans = prepared[i - 1]
+        item = items.get(i)
+        if item is None:
+            results.append(suggest(draft, context, None, brand_tone, required_disclosures))
+            continue
+        try:
+            fields = _parse_llm_response(item, policy_hits, redaction_map)
+        except Exception as e:
+            results.append(_error_response(e, policy_hits, evidence_spans, start_time))
+            continue
+        results.append(_apply_guardrails(fields, draft, policy_hits, evidence_spans, start_time, engine))
+    return results
+
+
+# First two hex digits of a \uXXXX escape that encodes a high surrogate
+_HIGH_SURROGATE_PREFIXES = frozenset(f"D{digit}" for digit in "89AB")
+
+
+class SuggestionStreamer:
+    """
+    Incrementally decode the "suggestion" string from streamed JSON text.
+    
+    Feed raw LLM chunks in order; each call returns the characters of the
+    suggestion value that became available, with JSON escapes decoded.
+    """
+    
+    _FIELD_START = re.compile(r'"suggestion"\s*:\s*"')
+    
+    def __init__(self):
+        self._buffer = ""
+        self._value_start = None
+        self._emitted = 0
+        self._done = False
+    
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._value_start is None:
+            match = self._FIELD_START.search(self._buffer)
+            if not match:
+                return ""
+            self._value_start = match.end()
+        
+        # Find the longest prefix that is safe to decode (no partial escapes)
+        raw = self._buffer[self._value_start:]
+        i = 0
+        while i < len(raw):
+            if raw[i] == '\\':
+                width = 6 if raw[i + 1:i + 2] == 'u' else 2
+                # A high surrogate escape (\uD800-\uDBFF) is only complete with
+                # its low half, so a lone surrogate is never emitted
+                if width == 6 and raw[i + 2:i + 4].upper() in _HIGH_SURROGATE_PREFIXES:
+                    width = 12
+                if i + width > len(raw):
+                    break
+                i += width
+            elif raw[i] == '"':
+                self._done = True
+                break
+            else:
+                i += 1
+        
+        text = json.loads(f'"{raw[:i]}"')
+        delta = text[self._emitted:]
+        self._emitted = len(text)
+        return delta
+
+
+def _parse_streamed_json(content: str) -> Dict[str, Any]:
+    """Parse streamed LLM output, tolerating text around the JSON object."""
+    try:
+        return loads_json(content)
+    except json.JSONDecodeError:
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError(f"Failed to parse JSON response: {content}")
+        return loads_json(content[start:end + 1])
+
+
+def suggest_stream(
+    agent_draft: str,
+    context: str = "",
+    policy_hits: Optional[List[str]] = None,
+    brand_tone: str = "professional, clear, empathetic",
+    required_disclosures: Optional[List[str]] = None
+) -> Iterator[Union[str, SuggestionResponse]]:
+    """
+    Streaming variant of suggest().
+    
+    Yields text deltas of the LLM's primary suggestion as tokens arrive,
+    then a final SuggestionResponse built exactly as suggest() would. The
+    deltas are provisional: rotation and guardrails are only applied to the
+    final response, so its suggestion may differ from the streamed text.
+    
+    Args:
+        Same as suggest()
+        
+    Yields:
+        str deltas, then one SuggestionResponse
+    """
+    start_time = time.time()
+    engine = get_rules_engine()
+    
+    prompt_dict, policy_hits, evidence_spans, redaction_map = _prepare_suggestion(
+        agent_draft, context, policy_hits, brand_tone, required_disclosures, engine
+    )
+    
+    try:
+        chunks = []
+        streamed = ""
+        streamer = SuggestionStreamer()
+        stream = stream_llm(prompt_dict)
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                delta = streamer.feed(chunk)
+                if delta:
+                    # Fail fast: a leaked placeholder would be rejected once the
+                    # response is parsed anyway, so stop generating right away
+                    streamed += delta
+                    leaked = _leaked_placeholder(streamed, redaction_map)
+                    if leaked:
+                        raise ValueError(f"LLM leaked PII placeholder: {leaked}")
+                    yield delta
+        finally:
+            # Closing the generator closes the provider's HTTP stream
+            if hasattr(stream, "close"):
+                stream.close()
+        response = _parse_streamed_json("".join(chunks))
+        fields = _parse_llm_response(response, policy_hits, redaction_map)
+    except Exception as e:
+        yield _error_response(e, policy_hits, evidence_spans, start_time)
+        return
+    
+    yield _apply_guardrails(fields, agent_draft, policy_hits, evidence_spans, start_time, engine)
@@ -7,8 +7,12 @@ Provides interactive UI for live suggestions and analytics reports.
 import os
 import sys
 import json
+import mmap
 import time
+import queue
+import threading
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add project root to Python path
@@ -19,8 +23,16 @@ if str(project_root) not in sys.path:
 import streamlit as st
 import pandas as pd
 import duckdb
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from app.coach import suggest
 from engine.rules import get_rules_engine
 
@@ -33,16 +45,91 @@ API_URL = os.getenv("API_URL", "http://localhost:8000")
 DB_PATH = os.getenv("RUNS_DB", "./data/qa_runs.duckdb")
 SYNTHETIC_DATA_PATH = os.getenv("DATA_DIR", "./data") + "/synthetic/coach_cases.jsonl"
 
+# Background event logging (see get_event_queue)
+EVENT_BATCH_SIZE = 32
+EVENT_BATCH_WAIT_S = 0.25
+EVENT_QUEUE_SIZE = 1000
+EVENT_RETRY_WAIT_S = 2.0
+
+# Reports tab data is refetched at most this often (see fetch_report_data)
+REPORTS_CACHE_TTL_S = int(os.getenv("REPORTS_CACHE_TTL_S", "10"))
+REPORT_ENDPOINTS = ("/events/stats", "/analytics/latency", "/analytics/policies")
+# Fields of /events/stats "recent_events" rows, in display order
+RECENT_EVENT_COLUMNS = ["event", "session_id", "timestamp"]
+
 
 # ============================================================================
 # API Helper Functions
 # ============================================================================
 
+@st.cache_resource
+def get_api_session():
+    """
+    Shared HTTP session for dashboard -> API calls.
+    
+    Cached as a resource so every rerun and browser tab reuses the same
+    keep-alive connection pool instead of opening a new TCP connection
+    per request. Idempotent requests (the report GETs) are retried twice
+    with a short backoff; POSTs are never retried.
+    """
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.2)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_resource
+def get_health_session():
+    """
+    HTTP session for the sidebar health check, without retries.
+    
+    The check runs on every rerun with a 1 s timeout; retrying it would
+    stall each rerun for seconds while the API is down.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=Retry(total=0))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_json(session, path):
+    """GET an API endpoint and return (status_code, JSON body or None if not OK)."""
+    response = session.get(f"{API_URL}{path}", timeout=5)
+    return response.status_code, (response.json() if response.ok else None)
+
+
+@st.cache_data(ttl=REPORTS_CACHE_TTL_S, show_spinner=False)
+def fetch_report_data():
+    """
+    Fetch the Reports tab data, cached for REPORTS_CACHE_TTL_S across reruns.
+    
+    The endpoints are fetched concurrently so a render waits only on the
+    slowest one. Returns {path: (status_code, body)}. Errors reaching
+    /events/stats are raised (and so not cached); the other endpoints map
+    to (None, None) when they fail.
+    """
+    session = get_api_session()
+    with ThreadPoolExecutor(max_workers=len(REPORT_ENDPOINTS)) as pool:
+        futures = {path: pool.submit(_get_json, session, path) for path in REPORT_ENDPOINTS}
+    
+    reports = {"/events/stats": futures["/events/stats"].result()}
+    for path, future in futures.items():
+        if path not in reports:
+            try:
+                reports[path] = future.result()
+            except Exception as e:
+                print(f"✗ Could not load {path}: {str(e)}")
+                reports[path] = (None, None)
+    return reports
+
+
 def get_events_from_api():
     """Get events from API instead of direct database access."""
-    import requests
     try:
-        response = requests.get(f"{API_URL}/events/stats", timeout=5)
+        response = get_api_session().get(f"{API_URL}/events/stats", timeout=5)
         if response.ok:
             return response.json()
         return None
@@ -83,6 +170,97 @@ def get_db_connection():
         return None
 
 
+def _drain_events(events: queue.Queue, max_items: int, timeout: float):
+    """Block up to timeout for one event, then take whatever else is queued (up to max_items)."""
+    try:
+        batch = [events.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while len(batch) < max_items:
+        try:
+            batch.append(events.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+class EventLogStatus:
+    """Counters kept by the event-logger thread and shown in the sidebar."""
+    
+    def __init__(self):
+        self.sent = 0
+        self.dropped = 0
+        self.last_error = None
+
+
+@st.cache_resource
+def get_event_log_status():
+    """Shared EventLogStatus for the event-logger thread (see get_event_queue)."""
+    return EventLogStatus()
+
+
+def _send_events(events: queue.Queue, status: EventLogStatus):
+    """
+    Background loop: POST queued events to the API in batches.
+    
+    A batch that fails because the API is down, times out or errors (5xx)
+    goes back on the queue and is retried after EVENT_RETRY_WAIT_S; events
+    that no longer fit, or that the API rejects (4xx), are dropped and
+    counted in status.
+    """
+    while True:
+        batch = _drain_events(events, EVENT_BATCH_SIZE, EVENT_BATCH_WAIT_S)
+        if not batch:
+            continue
+        try:
+            response = get_api_session().post(
+                f"{API_URL}/events/bulk",
+                json={"events": batch},
+                timeout=5
+            )
+            if response.ok:
+                print(f"✓ {len(batch)} event(s) logged via API (Status: {response.status_code})")
+                status.sent += len(batch)
+                status.last_error = None
+                continue
+            error = f"API error (Status: {response.status_code})"
+            if response.status_code < 500:
+                print(f"✗ Event logging failed: {len(batch)} event(s) dropped (Status: {response.status_code}, Error: {response.text})")
+                status.dropped += len(batch)
+                status.last_error = error
+                continue
+        except requests.exceptions.ConnectionError:
+            error = "API not running"
+        except requests.exceptions.Timeout:
+            error = "API timeout"
+        except Exception as e:
+            error = str(e)
+        
+        print(f"✗ {len(batch)} event(s) not logged yet: {error} (retrying in {EVENT_RETRY_WAIT_S}s)")
+        status.last_error = error
+        for event in batch:
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                status.dropped += 1
+        time.sleep(EVENT_RETRY_WAIT_S)
+
+
+@st.cache_resource
+def get_event_queue():
+    """
+    Queue of events waiting to be sent, drained by one daemon thread.
+    
+    Cached as a resource: Streamlit re-executes this module on every rerun,
+    so a module-level queue or thread would be recreated each time.
+    """
+    events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+    threading.Thread(
+        target=_send_events, args=(events, get_event_log_status()), name="event-logger", daemon=True
+    ).start()
+    return events
+
+
 def log_event_to_db(event_type, session_id, agent_draft, suggestion_used, policy_refs, latency_ms):
     """
     Log an event to the database via API (never writes directly to DB).
@@ -99,41 +277,26 @@ def log_event_to_db(event_type, session_id, agent_draft, suggestion_used, policy
         policy_refs: List of policy references
         latency_ms: Response latency in milliseconds
     
+    Events are queued and sent to /events/bulk in batches by a background
+    thread (see get_event_queue), so button clicks don't wait on the API.
+    Delivery is reported separately, in the sidebar (see EventLogStatus).
+    
     Returns:
-        bool: True if event was logged successfully, False otherwise
+        bool: True if the event was queued, False if the queue is full
     """
-    import requests
-    
-    API_URL = os.getenv("API_URL", "http://localhost:8000")
-    
     try:
-        response = requests.post(
-            f"{API_URL}/events/coach",
-            json={
-                "event": event_type,
-                "session_id": session_id,
-                "agent_draft": agent_draft,
-                "suggestion_used": suggestion_used,
-                "policy_refs": policy_refs,
-                "latency_ms": latency_ms,
-                "ab_test_bucket": os.getenv("AB_TEST_BUCKET", "on")
-            },
-            timeout=2
-        )
-        if response.ok:
-            print(f"✓ Event logged via API: {event_type} (Status: {response.status_code})")
-            return True
-        else:
-            print(f"✗ Event logging failed: {event_type} (Status: {response.status_code}, Error: {response.text})")
-            return False
-    except requests.exceptions.ConnectionError:
-        print(f"✗ Event not logged: API not running (event: {event_type})")
-        return False
-    except requests.exceptions.Timeout:
-        print(f"✗ Event not logged: API timeout (event: {event_type})")
-        return False
-    except Exception as e:
-        print(f"✗ Event error: {event_type} - {str(e)}")
+        get_event_queue().put_nowait({
+            "event": event_type,
+            "session_id": session_id,
+            "agent_draft": agent_draft,
+            "suggestion_used": suggestion_used,
+            "policy_refs": policy_refs,
+            "latency_ms": latency_ms,
+            "ab_test_bucket": os.getenv("AB_TEST_BUCKET", "on")
+        })
+        return True
+    except queue.Full:
+        print(f"✗ Event not logged: event queue full, API may be down (event: {event_type})")
         return False
 
 
@@ -146,17 +309,41 @@ def load_synthetic_examples():
     """Load synthetic test cases for the dropdown."""
     examples = []
     
-    if os.path.exists(SYNTHETIC_DATA_PATH):
-        with open(SYNTHETIC_DATA_PATH, 'r', encoding='utf-8') as f:
-            for line in f:
+    if os.path.exists(SYNTHETIC_DATA_PATH) and os.path.getsize(SYNTHETIC_DATA_PATH):
+        loads = orjson.loads if orjson is not None else json.loads
+        # mmap the file and parse raw byte lines (both parsers accept bytes)
+        with open(SYNTHETIC_DATA_PATH, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                if not line.strip():
+                    continue
                 try:
-                    examples.append(json.loads(line))
-                except:
+                    examples.append(loads(line))
+                except ValueError:
                     pass
     
     return examples
 
 
+@st.cache_data
+def get_example_options():
+    """Build the example dropdown labels and a label -> example index map."""
+    options = ["(Select a test case)"]
+    label_to_idx = {}
+    for idx, ex in enumerate(load_synthetic_examples()):
+        label = f"{ex.get('policy_id', 'UNKNOWN')}: {ex.get('agent_draft', '')[:60]}..."
+        options.append(label)
+        # Keep the first example for duplicate labels, as list.index did
+        label_to_idx.setdefault(label, idx)
+    return options, label_to_idx
+
+
+@st.cache_resource
+def get_policy_severities():
+    """Map policy ID -> severity, built once per server process for badge rendering."""
+    return {policy.id: policy.severity for policy in get_rules_engine().policies}
+
+
 # ============================================================================
 # UI Components
 # ============================================================================
@@ -179,6 +366,102 @@ def render_policy_badge(policy_id, severity):
     )
 
 
+@st.fragment
+def render_suggestion_result():
+    """Render the last suggestion; the Use/Edit/Reject buttons rerun only this fragment."""
+    response = st.session_state.get('last_response')
+    if not response:
+        return
+    
+    # Primary suggestion
+    st.markdown("### ✅ Primary Suggestion")
+    st.success(response.suggestion)
+    
+    # Alternates
+    st.markdown("### 🔄 Alternates")
+    for i, alt in enumerate(response.alternates, 1):
+        st.info(f"**Alt {i}:** {alt}")
+    
+    # Action buttons
+    col_btn1, col_btn2, col_btn3 = st.columns(3)
+    with col_btn1:
+        if st.button("✅ Use", use_container_width=True):
+            session_id = st.session_state.get('session_id', 'streamlit-session')
+            logged = log_event_to_db(
+                "accepted",
+                session_id,
+                st.session_state['last_draft'],
+                response.suggestion,
+                response.policy_refs,
+                st.session_state.get('last_latency', 0)
+            )
+            if logged:
+                st.success("✓ Event queued as accepted")
+            else:
+                st.error("✗ Event NOT queued - event queue full (is the API running?)")
+    
+    with col_btn2:
+        if st.button("✏️ Use & Edit", use_container_width=True):
+            session_id = st.session_state.get('session_id', 'streamlit-session')
+            logged = log_event_to_db(
+                "edited",
+                session_id,
+                st.session_state['last_draft'],
+                response.suggestion,
+                response.policy_refs,
+                st.session_state.get('last_latency', 0)
+            )
+            if logged:
+                st.success("✓ Event queued as edited")
+            else:
+                st.error("✗ Event NOT queued - event queue full (is the API running?)")
+    
+    with col_btn3:
+        if st.button("❌ Reject", use_container_width=True):
+            session_id = st.session_state.get('session_id', 'streamlit-session')
+            logged = log_event_to_db(
+                "rejected",
+                session_id,
+                st.session_state['last_draft'],
+                None,
+                response.policy_refs,
+                st.session_state.get('last_latency', 0)
+            )
+            if logged:
+                st.warning("✓ Event queued as rejected")
+            else:
+                st.error("✗ Event NOT queued - event queue full (is the API running?)")
+    
+    # Metadata
+    st.markdown("---")
+    st.markdown("### 📊 Details")
+    
+    col_meta1, col_meta2 = st.columns(2)
+    with col_meta1:
+        st.metric("Confidence", f"{response.confidence:.1%}")
+        st.metric("Latency", f"{response.latency_ms} ms")
+    
+    with col_meta2:
+        st.markdown("**Rationale:**")
+        st.caption(response.rationale)
+    
+    # Policy badges
+    st.markdown("**Policies:**")
+    severities = get_policy_severities()
+    for policy_id in response.policy_refs:
+        if policy_id in severities:
+            render_policy_badge(policy_id, severities[policy_id])
+    
+    # Evidence spans
+    if response.evidence_spans and response.evidence_spans != [(0, 0)]:
+        st.markdown("**Violations detected at:**")
+        for span in response.evidence_spans:
+            if span != (0, 0):
+                st.caption(f"Position {span[0]}-{span[1]}")
+
+
+
+@st.fragment
 def render_live_tab():
     """Render the Live Suggestions tab."""
     st.header("🎯 Live QA Coach")
@@ -199,16 +482,13 @@ def render_live_tab():
         
         # Example selector with callback
         if examples:
-            example_options = ["(Select a test case)"] + [
-                f"{ex.get('policy_id', 'UNKNOWN')}: {ex.get('agent_draft', '')[:60]}..."
-                for ex in examples
-            ]
+            example_options, label_to_idx = get_example_options()
             
             def on_example_selected():
                 """Callback when example is selected from dropdown."""
                 selected = st.session_state.example_selector
                 if selected != "(Select a test case)":
-                    idx = example_options.index(selected) - 1
+                    idx = label_to_idx[selected]
                     # Directly update the text area widget states
                     st.session_state.agent_draft_input = examples[idx].get("agent_draft", "")
                     st.session_state.context_input = examples[idx].get("context", "")
@@ -278,120 +558,33 @@ def render_live_tab():
                         response.latency_ms
                     )
                     if not logged:
-                        st.warning("⚠️ Event not logged - API may not be running", icon="⚠️")
+                        st.warning("⚠️ Event not queued - event queue full (is the API running?)", icon="⚠️")
                 
                 except Exception as e:
                     st.error(f"Error generating suggestion: {str(e)}")
                     st.session_state['last_response'] = None
         
         # Display results
-        if 'last_response' in st.session_state and st.session_state['last_response']:
-            response = st.session_state['last_response']
-            
-            # Primary suggestion
-            st.markdown("### ✅ Primary Suggestion")
-            st.success(response.suggestion)
-            
-            # Alternates
-            st.markdown("### 🔄 Alternates")
-            for i, alt in enumerate(response.alternates, 1):
-                st.info(f"**Alt {i}:** {alt}")
-            
-            # Action buttons
-            col_btn1, col_btn2, col_btn3 = st.columns(3)
-            with col_btn1:
-                if st.button("✅ Use", use_container_width=True):
-                    session_id = st.session_state.get('session_id', 'streamlit-session')
-                    logged = log_event_to_db(
-                        "accepted",
-                        session_id,
-                        st.session_state['last_draft'],
-                        response.suggestion,
-                        response.policy_refs,
-                        st.session_state.get('last_latency', 0)
-                    )
-                    if logged:
-                        st.success("✓ Event logged as accepted")
-                    else:
-                        st.error("✗ Event NOT logged - API not running!")
-            
-            with col_btn2:
-                if st.button("✏️ Use & Edit", use_container_width=True):
-                    session_id = st.session_state.get('session_id', 'streamlit-session')
-                    logged = log_event_to_db(
-                        "edited",
-                        session_id,
-                        st.session_state['last_draft'],
-                        response.suggestion,
-                        response.policy_refs,
-                        st.session_state.get('last_latency', 0)
-                    )
-                    if logged:
-                        st.success("✓ Event logged as edited")
-                    else:
-                        st.error("✗ Event NOT logged - API not running!")
-            
-            with col_btn3:
-                if st.button("❌ Reject", use_container_width=True):
-                    session_id = st.session_state.get('session_id', 'streamlit-session')
-                    logged = log_event_to_db(
-                        "rejected",
-                        session_id,
-                        st.session_state['last_draft'],
-                        None,
-                        response.policy_refs,
-                        st.session_state.get('last_latency', 0)
-                    )
-                    if logged:
-                        st.warning("✓ Event logged as rejected")
-                    else:
-                        st.error("✗ Event NOT logged - API not running!")
-            
-            # Metadata
-            st.markdown("---")
-            st.markdown("### 📊 Details")
-            
-            col_meta1, col_meta2 = st.columns(2)
-            with col_meta1:
-                st.metric("Confidence", f"{response.confidence:.1%}")
-                st.metric("Latency", f"{response.latency_ms} ms")
-            
-            with col_meta2:
-                st.markdown("**Rationale:**")
-                st.caption(response.rationale)
-            
-            # Policy badges
-            st.markdown("**Policies:**")
-            for policy_id in response.policy_refs:
-                engine = get_rules_engine()
-                policy = engine.get_policy_by_id(policy_id)
-                if policy:
-                    render_policy_badge(policy_id, policy.severity)
-            
-            # Evidence spans
-            if response.evidence_spans and response.evidence_spans != [(0, 0)]:
-                st.markdown("**Violations detected at:**")
-                for span in response.evidence_spans:
-                    if span != (0, 0):
-                        st.caption(f"Position {span[0]}-{span[1]}")
+        render_suggestion_result()
 
 
+@st.fragment
 def render_reports_tab():
     """Render the Reports & Analytics tab using API data (no direct DB access)."""
-    import requests
-    
     st.header("📈 Coach Effect Reports")
     
+    if st.button("🔄 Refresh", key="refresh_reports"):
+        fetch_report_data.clear()
+    
     # Get data from API instead of direct database access
     try:
-        response = requests.get(f"{API_URL}/events/stats", timeout=5)
-        if not response.ok:
-            st.error(f"❌ Cannot load reports - API returned status {response.status_code}")
+        reports = fetch_report_data()
+        status_code, stats = reports["/events/stats"]
+        if stats is None:
+            st.error(f"❌ Cannot load reports - API returned status {status_code}")
             st.info("💡 Make sure the API is running: `uvicorn app.api:app --reload`")
             return
         
-        stats = response.json()
-        
     except requests.exceptions.ConnectionError:
         st.error("❌ Cannot connect to API - Reports unavailable")
         st.info("💡 **Start the API to view reports:**")
@@ -412,6 +605,10 @@ def render_reports_tab():
         st.info("ℹ️ No events logged yet. Use the Live tab to generate some suggestions!")
         return
     
+    # Latency feeds both the KPI tile and the latency details section
+    latency_data = reports["/analytics/latency"][1]
+    policies_data = reports["/analytics/policies"][1]
+    
     # KPI tiles
     st.subheader("📊 Key Metrics")
     
@@ -436,15 +633,10 @@ def render_reports_tab():
     
     # Avg latency from API endpoint
     with col4:
-        try:
-            latency_response = requests.get(f"{API_URL}/analytics/latency", timeout=5)
-            if latency_response.ok:
-                latency_data = latency_response.json()
-                avg_latency = latency_data.get("avg_latency_ms", 0)
-                st.metric("Avg Latency", f"{avg_latency} ms")
-            else:
-                st.metric("Avg Latency", "N/A")
-        except:
+        if latency_data:
+            avg_latency = latency_data.get("avg_latency_ms", 0)
+            st.metric("Avg Latency", f"{avg_latency} ms")
+        else:
             st.metric("Avg Latency", "N/A")
     
     st.markdown("---")
@@ -455,68 +647,50 @@ def render_reports_tab():
     with col_chart1:
         st.subheader("Events by Type")
         if event_counts:
-            events_df = pd.DataFrame(
-                list(event_counts.items()),
-                columns=['event', 'count']
-            )
-            st.bar_chart(events_df.set_index('event'))
+            events = pd.Series(event_counts, name='count', dtype='int64')
+            st.bar_chart(events.rename_axis('event'))
     
     with col_chart2:
         st.subheader("Violations by Policy")
-        try:
-            policies_response = requests.get(f"{API_URL}/analytics/policies", timeout=5)
-            if policies_response.ok:
-                policies_data = policies_response.json()
-                policy_violations = policies_data.get("policy_violations", {})
+        if policies_data is not None:
+            policy_violations = policies_data.get("policy_violations", {})
+            
+            if policy_violations:
+                violations = pd.Series(policy_violations, name='Count', dtype='int64')
+                st.bar_chart(violations.rename_axis('Policy'))
                 
-                if policy_violations:
-                    policy_df = pd.DataFrame(
-                        list(policy_violations.items()),
-                        columns=['Policy', 'Count']
-                    )
-                    st.bar_chart(policy_df.set_index('Policy'))
-                    
-                    # Show summary stats
-                    total_violations = policies_data.get("total_violations", 0)
-                    total_policies = policies_data.get("total_policies", 0)
-                    st.caption(f"📊 {total_violations:,} violations across {total_policies} policies")
-                else:
-                    st.info("No policy violations detected yet")
+                # Show summary stats
+                total_violations = policies_data.get("total_violations", 0)
+                total_policies = policies_data.get("total_policies", 0)
+                st.caption(f"📊 {total_violations:,} violations across {total_policies} policies")
             else:
-                st.warning("⚠️ Could not load policy data")
-        except Exception as e:
-            st.warning(f"⚠️ Error loading policies: {str(e)}")
+                st.info("No policy violations detected yet")
+        else:
+            st.warning("⚠️ Could not load policy data")
     
     st.markdown("---")
     
-    # Latency details section
-    try:
-        latency_response = requests.get(f"{API_URL}/analytics/latency", timeout=5)
-        if latency_response.ok:
-            latency_data = latency_response.json()
-            
-            st.subheader("⚡ Latency Analysis")
-            
-            col_lat1, col_lat2, col_lat3, col_lat4 = st.columns(4)
-            
-            with col_lat1:
-                st.metric("Min", f"{latency_data.get('min_latency_ms', 0)} ms")
-            
-            with col_lat2:
-                percentiles = latency_data.get('percentiles', {})
-                st.metric("P50 (Median)", f"{percentiles.get('p50', 0)} ms")
-            
-            with col_lat3:
-                st.metric("P95", f"{percentiles.get('p95', 0)} ms")
-            
-            with col_lat4:
-                st.metric("Max", f"{latency_data.get('max_latency_ms', 0)} ms")
-            
-            # Latency distribution info
-            st.caption(f"📊 Based on {latency_data.get('total_requests', 0):,} requests")
-            
-    except Exception:
-        pass  # Skip latency section if not available
+    # Latency details section (skipped if not available)
+    if latency_data:
+        st.subheader("⚡ Latency Analysis")
+        
+        col_lat1, col_lat2, col_lat3, col_lat4 = st.columns(4)
+        
+        with col_lat1:
+            st.metric("Min", f"{latency_data.get('min_latency_ms', 0)} ms")
+        
+        with col_lat2:
+            percentiles = latency_data.get('percentiles', {})
+            st.metric("P50 (Median)", f"{percentiles.get('p50', 0)} ms")
+        
+        with col_lat3:
+            st.metric("P95", f"{percentiles.get('p95', 0)} ms")
+        
+        with col_lat4:
+            st.metric("Max", f"{latency_data.get('max_latency_ms', 0)} ms")
+        
+        # Latency distribution info
+        st.caption(f"📊 Based on {latency_data.get('total_requests', 0):,} requests")
     
     st.markdown("---")
     
@@ -525,7 +699,8 @@ def render_reports_tab():
     recent_events = stats.get("recent_events", [])
     
     if recent_events:
-        recent_df = pd.DataFrame(recent_events)
+        recent_df = pd.DataFrame.from_records(recent_events, columns=RECENT_EVENT_COLUMNS)
+        recent_df['timestamp'] = pd.to_datetime(recent_df['timestamp'])
         st.dataframe(recent_df, use_container_width=True)
     else:
         st.info("No recent events")
@@ -581,10 +756,9 @@ def main():
         st.success(f"✓ {len(engine.policies)} policies loaded")
         
         # Check API connectivity
-        import requests
         api_running = False
         try:
-            response = requests.get(f"{API_URL}/health", timeout=1)
+            response = get_health_session().get(f"{API_URL}/health", timeout=1)
             if response.ok:
                 api_running = True
                 st.success("✓ API connected")
@@ -593,6 +767,14 @@ def main():
             st.info("ℹ️ API not running")
             st.caption("Suggestions work, events not logged")
         
+        # Event delivery (events are sent in the background)
+        event_status = get_event_log_status()
+        st.caption(f"Events sent: {event_status.sent} · waiting: {get_event_queue().qsize()}")
+        if event_status.last_error:
+            st.warning(f"⚠️ Event logging failing: {event_status.last_error}")
+        if event_status.dropped:
+            st.error(f"✗ {event_status.dropped} event(s) dropped")
+        
         # Check DB status
         try:
             conn = get_db_connection()
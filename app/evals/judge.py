@@ -6,11 +6,13 @@ generated by the primary coach system.
 """
 
 import os
-import json
+import threading
 from typing import List, Dict, Optional
 from dataclasses import dataclass
 from dotenv import load_dotenv
 
+from app.providers.json_utils import parse_json_response
+
 load_dotenv()
 
 
@@ -93,28 +95,21 @@ class Judge:
             max_tokens=800
         )
         
-        # Parse the JSON response
-        try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            # Fallback: try to extract JSON from markdown code blocks
-            import re
-            json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group(1))
-            else:
-                # Return default failure response
-                return JudgeResponse(
-                    overall_score=0.0,
-                    compliance_score=0.0,
-                    clarity_score=0.0,
-                    tone_score=0.0,
-                    completeness_score=0.0,
-                    feedback="Failed to parse judge response",
-                    strengths=[],
-                    weaknesses=["Judge returned malformed response"],
-                    pass_threshold=False
-                )
+        # Parse the JSON response (falls back to fenced or embedded JSON)
+        result = parse_json_response(response)
+        if result is None:
+            # Return default failure response
+            return JudgeResponse(
+                overall_score=0.0,
+                compliance_score=0.0,
+                clarity_score=0.0,
+                tone_score=0.0,
+                completeness_score=0.0,
+                feedback="Failed to parse judge response",
+                strengths=[],
+                weaknesses=["Judge returned malformed response"],
+                pass_threshold=False
+            )
         
         # Build response
         overall = result.get("overall_score", 0.0)
@@ -201,13 +196,16 @@ Now evaluate the suggestion:"""
 
 # Singleton instance
 _judge_instance = None
+_judge_lock = threading.Lock()
 
 
 def get_judge() -> Judge:
     """Get the singleton judge instance."""
     global _judge_instance
     if _judge_instance is None:
-        _judge_instance = Judge()
+        with _judge_lock:
+            if _judge_instance is None:
+                _judge_instance = Judge()
     return _judge_instance
 
 
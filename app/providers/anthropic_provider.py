@@ -12,20 +12,60 @@ Provides JSON-mode responses using Claude models.
 """
 
 import os
+import asyncio
 import json
 import time
-from typing import Dict, Any, Optional
+import random
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional
 
 try:
-    from anthropic import Anthropic, AnthropicError
+    from anthropic import Anthropic, AsyncAnthropic, AnthropicError, DefaultAsyncHttpxClient
 except ImportError:
     Anthropic = None
+    AsyncAnthropic = None
     AnthropicError = Exception
 
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.providers.http_client import get_http_client, http_client_options
+from app.providers.json_utils import JsonObjectScanner, extract_json, loads_json, parse_json_response
+
+# Sent after a response that wasn't valid JSON
+_JSON_REMINDER = "Respond with a single JSON object only: no prose, no code fences."
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff capped at 4 s, jittered so concurrent retries spread out."""
+    return min(2 ** attempt, 4) + random.uniform(0, 0.25)
+
+
+@lru_cache(maxsize=32)
+def _json_system(system_prompt: str) -> List[Dict[str, Any]]:
+    """
+    System blocks for a prompt plus the JSON-only instruction.
+    
+    Cached per system prompt (the coach sends the same one on every call).
+    The block is marked for Anthropic prompt caching, so repeated requests
+    can reuse it server-side; prompts below the model's minimum cacheable
+    length are simply not cached. Callers must not mutate the result.
+    """
+    return [{
+        "type": "text",
+        "text": (
+            f"{system_prompt}\n\n"
+            "You must respond with valid JSON only. No markdown, no explanation, "
+            "just the JSON object."
+        ),
+        "cache_control": {"type": "ephemeral"}
+    }]
+
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load .env once, on first provider construction rather than at import."""
+    load_dotenv()
 
 
 class AnthropicProvider:
@@ -54,11 +94,17 @@ class AnthropicProvider:
                 "anthropic package not installed. Install with: pip install anthropic"
             )
         
+        _load_env()
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
         
-        self.client = Anthropic(api_key=api_key)
+        # Pooled (and, with h2 installed, HTTP/2) connections shared by all calls
+        self.client = Anthropic(api_key=api_key, http_client=get_http_client())
+        self.async_client = AsyncAnthropic(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(**http_client_options())
+        )
         self.model = model or os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
         self.temperature = temperature
         self.max_tokens = max_tokens
@@ -69,8 +115,13 @@ class AnthropicProvider:
         """
         Call Anthropic API with JSON-mode response.
         
+        The response is streamed and reading stops as soon as the first
+        JSON object is complete, so latency tracks the object's length;
+        max_tokens remains the upper bound.
+        
         Args:
             prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
             Parsed JSON response as dictionary
@@ -79,50 +130,52 @@ class AnthropicProvider:
             ValueError: If response cannot be parsed as JSON
             AnthropicError: If API call fails after retries
         """
-        system_prompt = prompt_dict.get("system", "")
         user_prompt = prompt_dict.get("user", "")
         
         # Add JSON formatting instruction to system prompt
-        enhanced_system = (
-            f"{system_prompt}\n\n"
-            "You must respond with valid JSON only. No markdown, no explanation, "
-            "just the JSON object."
-        )
+        enhanced_system = _json_system(prompt_dict.get("system", ""))
         
+        request_prompt = user_prompt
         last_error = None
         
         for attempt in range(self.max_retries + 1):
             try:
-                response = self.client.messages.create(
+                # Stream, and stop reading as soon as the JSON object closes
+                scanner = JsonObjectScanner()
+                with self.client.messages.stream(
                     model=self.model,
-                    max_tokens=self.max_tokens,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
                     temperature=self.temperature,
                     system=enhanced_system,
                     messages=[
-                        {"role": "user", "content": user_prompt}
+                        {"role": "user", "content": request_prompt}
                     ],
                     timeout=self.timeout
-                )
-                
-                # Extract text content
-                content = response.content[0].text
+                ) as stream:
+                    for text in stream.text_stream:
+                        content = scanner.feed(text)
+                        if content:
+                            break
+                    else:
+                        content = scanner.text()
                 
                 # Parse JSON response
                 try:
-                    result = json.loads(content)
+                    result = loads_json(content)
                     return result
                 except json.JSONDecodeError as e:
                     # Try to extract JSON if wrapped in markdown or other text
-                    result = self._extract_json(content)
+                    result = extract_json(content)
                     if result:
                         return result
                     
                     # If this is not the last attempt, retry with format reminder
+                    # (built from the original prompt so retries don't compound)
                     if attempt < self.max_retries:
-                        user_prompt = (
+                        request_prompt = (
                             f"{user_prompt}\n\n"
-                            f"Previous response was not valid JSON: {content}\n"
-                            f"Please respond with valid JSON only, no additional text."
+                            f"Previous response was not valid JSON: {content[:200]}\n"
+                            f"{_JSON_REMINDER}"
                         )
                         continue
                     else:
@@ -133,9 +186,7 @@ class AnthropicProvider:
             except AnthropicError as e:
                 last_error = e
                 if attempt < self.max_retries:
-                    # Exponential backoff
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    time.sleep(_backoff_delay(attempt))
                     continue
                 else:
                     raise ValueError(
@@ -147,37 +198,106 @@ class AnthropicProvider:
         
         raise ValueError("Unexpected error in call_llm")
     
-    def _extract_json(self, content: str) -> Optional[Dict[str, Any]]:
+    async def call_llm_async(self, prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Attempt to extract JSON from text that may contain markdown or other wrapping.
+        Async variant of call_llm on the AsyncAnthropic client.
+        
+        Backoff between retries uses asyncio.sleep, so the event loop keeps
+        serving other requests while this one waits.
         
         Args:
-            content: Raw content that may contain JSON
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
-            Parsed JSON dict if found, None otherwise
+            Parsed JSON response as dictionary
+            
+        Raises:
+            ValueError: If the response cannot be parsed or the API call fails after retries
         """
-        import re
+        user_prompt = prompt_dict.get("user", "")
+        enhanced_system = _json_system(prompt_dict.get("system", ""))
+        request_prompt = user_prompt
         
-        # Look for ```json...``` or ```...```
-        json_pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Look for bare JSON object
-        json_pattern = r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
+        for attempt in range(self.max_retries + 1):
             try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
+                scanner = JsonObjectScanner()
+                async with self.async_client.messages.stream(
+                    model=self.model,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
+                    temperature=self.temperature,
+                    system=enhanced_system,
+                    messages=[
+                        {"role": "user", "content": request_prompt}
+                    ],
+                    timeout=self.timeout
+                ) as stream:
+                    async for text in stream.text_stream:
+                        content = scanner.feed(text)
+                        if content:
+                            break
+                    else:
+                        content = scanner.text()
+            except AnthropicError as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(_backoff_delay(attempt))
+                    continue
+                raise ValueError(
+                    f"Anthropic API call failed after {self.max_retries + 1} attempts: {e}"
+                )
+            
+            result = parse_json_response(content)
+            if result is not None:
+                return result
+            
+            # Retry with format reminder (same scheme as call_llm)
+            request_prompt = (
+                f"{user_prompt}\n\n"
+                f"Previous response was not valid JSON: {content[:200]}\n"
+                f"{_JSON_REMINDER}"
+            )
+        
+        raise ValueError(f"Failed to parse JSON response\nContent: {content}")
+    
+    def stream_llm(self, prompt_dict: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the raw Anthropic response text as it is generated.
+        
+        Args:
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+            
+        Yields:
+            Text deltas of the (JSON) response
+        """
+        enhanced_system = _json_system(prompt_dict.get("system", ""))
         
-        return None
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            system=enhanced_system,
+            messages=[
+                {"role": "user", "content": prompt_dict.get("user", "")}
+            ],
+            timeout=self.timeout
+        ) as stream:
+            yield from stream.text_stream
+    
+
+
+# Global instance
+_provider: Optional[AnthropicProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> AnthropicProvider:
+    """Get or create global provider instance."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = AnthropicProvider()
+    return _provider
 
 
 def call_llm(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
@@ -190,5 +310,4 @@ def call_llm(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Parsed JSON response
     """
-    provider = AnthropicProvider()
-    return provider.call_llm(prompt_dict)
+    return get_provider().call_llm(prompt_dict)
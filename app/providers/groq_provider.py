@@ -5,20 +5,39 @@ Provides JSON-mode responses using Groq's fast inference.
 """
 
 import os
+import asyncio
 import json
 import time
-from typing import Dict, Any, Optional
+import random
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional
 
 try:
-    from groq import Groq, GroqError
+    from groq import Groq, AsyncGroq, GroqError, DefaultAsyncHttpxClient
 except ImportError:
     Groq = None
+    AsyncGroq = None
     GroqError = Exception
 
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.providers.http_client import get_http_client, http_client_options
+from app.providers.json_utils import extract_json, loads_json, parse_json_response
+
+# Sent after a response that wasn't valid JSON
+_JSON_REMINDER = "Respond with a single JSON object only: no prose, no code fences."
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff capped at 4 s, jittered so concurrent retries spread out."""
+    return min(2 ** attempt, 4) + random.uniform(0, 0.25)
+
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load .env once, on first provider construction rather than at import."""
+    load_dotenv()
 
 
 class GroqProvider:
@@ -47,11 +66,17 @@ class GroqProvider:
                 "groq package not installed. Install with: pip install groq"
             )
         
+        _load_env()
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = Groq(api_key=api_key)
+        # Pooled (and, with h2 installed, HTTP/2) connections shared by all calls
+        self.client = Groq(api_key=api_key, http_client=get_http_client())
+        self.async_client = AsyncGroq(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(**http_client_options())
+        )
         self.model = model or os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
         self.temperature = temperature
         self.max_tokens = max_tokens
@@ -64,6 +89,7 @@ class GroqProvider:
         
         Args:
             prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
             Parsed JSON response as dictionary
@@ -86,7 +112,7 @@ class GroqProvider:
                     model=self.model,
                     messages=messages,
                     temperature=self.temperature,
-                    max_tokens=self.max_tokens,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
                     timeout=self.timeout,
                     response_format={"type": "json_object"}
                 )
@@ -95,24 +121,21 @@ class GroqProvider:
                 
                 # Parse JSON response
                 try:
-                    result = json.loads(content)
+                    result = loads_json(content)
                     return result
                 except json.JSONDecodeError as e:
                     # Try to extract JSON if wrapped in markdown or other text
-                    result = self._extract_json(content)
+                    result = extract_json(content)
                     if result:
                         return result
                     
                     # If this is not the last attempt, retry with format reminder
+                    # (only the latest bad turn is kept so retries don't compound)
                     if attempt < self.max_retries:
-                        messages.append({
-                            "role": "assistant",
-                            "content": content
-                        })
-                        messages.append({
-                            "role": "user",
-                            "content": "Please respond with valid JSON only, no additional text."
-                        })
+                        messages = messages[:2] + [
+                            {"role": "assistant", "content": content},
+                            {"role": "user", "content": _JSON_REMINDER}
+                        ]
                         continue
                     else:
                         raise ValueError(
@@ -122,9 +145,7 @@ class GroqProvider:
             except GroqError as e:
                 last_error = e
                 if attempt < self.max_retries:
-                    # Exponential backoff
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    time.sleep(_backoff_delay(attempt))
                     continue
                 else:
                     raise ValueError(
@@ -136,37 +157,104 @@ class GroqProvider:
         
         raise ValueError("Unexpected error in call_llm")
     
-    def _extract_json(self, content: str) -> Optional[Dict[str, Any]]:
+    async def call_llm_async(self, prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Attempt to extract JSON from text that may contain markdown or other wrapping.
+        Async variant of call_llm on the AsyncGroq client.
+        
+        Backoff between retries uses asyncio.sleep, so the event loop keeps
+        serving other requests while this one waits.
         
         Args:
-            content: Raw content that may contain JSON
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
-            Parsed JSON dict if found, None otherwise
+            Parsed JSON response as dictionary
+            
+        Raises:
+            ValueError: If the response cannot be parsed or the API call fails after retries
         """
-        import re
+        messages = [
+            {"role": "system", "content": prompt_dict.get("system", "")},
+            {"role": "user", "content": prompt_dict.get("user", "")}
+        ]
         
-        # Look for ```json...``` or ```...```
-        json_pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
+        for attempt in range(self.max_retries + 1):
             try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
+                    timeout=self.timeout,
+                    response_format={"type": "json_object"}
+                )
+            except GroqError as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(_backoff_delay(attempt))
+                    continue
+                raise ValueError(
+                    f"Groq API call failed after {self.max_retries + 1} attempts: {e}"
+                )
+            
+            content = response.choices[0].message.content
+            result = parse_json_response(content)
+            if result is not None:
+                return result
+            
+            # Retry with format reminder (same scheme as call_llm)
+            if attempt < self.max_retries:
+                messages = messages[:2] + [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": _JSON_REMINDER}
+                ]
         
-        # Look for bare JSON object
-        json_pattern = r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
+        raise ValueError(f"Failed to parse JSON response\nContent: {content}")
+    
+    def stream_llm(self, prompt_dict: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the raw Groq response text as it is generated.
+        
+        Args:
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+            
+        Yields:
+            Text deltas of the (JSON) response
+        """
+        messages = [
+            {"role": "system", "content": prompt_dict.get("system", "")},
+            {"role": "user", "content": prompt_dict.get("user", "")}
+        ]
         
-        return None
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            timeout=self.timeout,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        with stream:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
+
+
+# Global instance
+_provider: Optional[GroqProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> GroqProvider:
+    """Get or create global provider instance."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = GroqProvider()
+    return _provider
 
 
 def call_llm(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
@@ -179,5 +267,4 @@ def call_llm(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Parsed JSON response
     """
-    provider = GroqProvider()
-    return provider.call_llm(prompt_dict)
+    return get_provider().call_llm(prompt_dict)
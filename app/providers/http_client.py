@@ -0,0 +1,55 @@
+"""
+HTTP client settings shared by the LLM provider SDK clients.
+"""
+
+import os
+import atexit
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+def http_client_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for the SDKs' DefaultHttpxClient / DefaultAsyncHttpxClient.
+
+    Enables HTTP/2 when the h2 package is installed (and LLM_HTTP2 isn't
+    "false"), so concurrent calls to a provider multiplex over one kept-
+    alive connection instead of each opening their own, and bounds the
+    connection pool. Read at provider construction, after .env is loaded.
+    """
+    return {
+        "http2": h2 is not None and os.getenv("LLM_HTTP2", "true").lower() == "true",
+        "limits": httpx.Limits(
+            max_keepalive_connections=int(os.getenv("LLM_HTTP_KEEPALIVE", "10")),
+            max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+        )
+    }
+
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """
+    The process-wide keep-alive client for synchronous SDK clients.
+
+    Every provider's sync client sends through this one pool, so a
+    provider rebuilt (or a fallback provider used) reuses connections
+    that are already open instead of paying a new TCP+TLS handshake.
+    Created on first use and closed at interpreter exit.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(follow_redirects=True, **http_client_options())
+                atexit.register(_http_client.close)
+    return _http_client
@@ -0,0 +1,176 @@
+"""
+JSON helpers shared by the LLM providers.
+
+One place to parse and recover JSON from LLM output, so every provider
+gets the same (and same-speed) handling.
+"""
+
+import re
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+
+def _loads_orjson(content):
+    """orjson.loads, deferring to json.loads for input orjson rejects."""
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        # orjson is stricter than the stdlib (NaN/Infinity, integers wider
+        # than 64 bits); invalid JSON still raises json.JSONDecodeError
+        return json.loads(content)
+
+
+# Parse LLM responses with orjson when installed. orjson.JSONDecodeError
+# subclasses json.JSONDecodeError, so callers catch the stdlib exception.
+loads_json = _loads_orjson if orjson is not None else json.loads
+
+# JSON wrapped in a ```json ... ``` (or bare ```) fence
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.DOTALL)
+
+# Characters that change brace-matching state: braces, quotes and escapes
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+# Later '{' positions tried with raw_decode when the first object is invalid.
+# Bounded because each attempt may parse to the end of the text.
+_MAX_JSON_RETRY_STARTS = 16
+_decoder = json.JSONDecoder()
+
+
+class JsonObjectScanner:
+    """
+    Find the first balanced {...} object in text fed in chunks.
+
+    Scans from the first '{', counting brace depth and skipping braces
+    inside JSON strings (honouring backslash escapes, even across chunk
+    boundaries). Each character is looked at once, so the cost is linear
+    at any nesting depth, unlike a nested-quantifier regex, which can
+    backtrack badly on malformed LLM output.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = -1
+
+    def text(self) -> str:
+        """All text fed so far."""
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Add a chunk of text.
+
+        Returns:
+            The first object's source slice once its closing brace has
+            been fed (ready for loads_json), otherwise None. Stop
+            feeding once it has been returned.
+        """
+        offset = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        begin = 0
+        if self._start < 0:
+            begin = chunk.find("{")
+            if begin < 0:
+                return None
+            self._start = offset + begin
+
+        for match in _JSON_TOKEN_RE.finditer(chunk, begin):
+            pos = offset + match.start()
+            if pos == self._escaped:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == "\\":
+                    self._escaped = pos + 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    return self.text()[self._start:pos + 1]
+
+        return None
+
+
+def find_json_object(text: str) -> Optional[str]:
+    """
+    Return the first balanced {...} object in text, or None.
+
+    Args:
+        text: Text that may contain a JSON object
+
+    Returns:
+        The object's source slice, ready for loads_json, or None if no
+        '{' is ever closed
+    """
+    return JsonObjectScanner().feed(text)
+
+
+def extract_json(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Attempt to extract JSON from text that may contain markdown or other wrapping.
+
+    Args:
+        content: Raw content that may contain JSON
+
+    Returns:
+        Parsed JSON dict if found, None otherwise
+    """
+    # Neither a fenced block nor a bare object can match without a brace
+    if not content or "{" not in content:
+        return None
+
+    # Look for ```json...``` or ```...```
+    match = _JSON_FENCE_RE.search(content)
+    if match:
+        try:
+            return loads_json(match.group(1))
+        except json.JSONDecodeError:
+            pass
+
+    # Look for bare JSON object
+    candidate = find_json_object(content)
+    if candidate:
+        try:
+            return loads_json(candidate)
+        except json.JSONDecodeError:
+            pass
+
+    # The first balanced {...} wasn't JSON (e.g. "{name}" in prose): let the
+    # C decoder try each later '{' in turn
+    start = content.find("{", content.find("{") + 1)
+    for _ in range(_MAX_JSON_RETRY_STARTS):
+        if start < 0:
+            break
+        try:
+            obj, _end = _decoder.raw_decode(content, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = content.find("{", start + 1)
+
+    return None
+
+
+def parse_json_response(content: str) -> Optional[Dict[str, Any]]:
+    """Parse a response as JSON, falling back to extract_json; None if neither works."""
+    try:
+        return loads_json(content)
+    except json.JSONDecodeError:
+        return extract_json(content)
@@ -12,14 +12,32 @@ Provides JSON-mode responses for compliance suggestions.
 """
 
 import os
+import asyncio
 import json
 import time
-from typing import Dict, Any, Optional
-from openai import OpenAI, OpenAIError
+import random
+import threading
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional
+from openai import OpenAI, AsyncOpenAI, OpenAIError, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.providers.http_client import get_http_client, http_client_options
+from app.providers.json_utils import JsonObjectScanner, extract_json, loads_json, parse_json_response
+
+# Sent after a response that wasn't valid JSON
+_JSON_REMINDER = "Respond with a single JSON object only: no prose, no code fences."
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff capped at 4 s, jittered so concurrent retries spread out."""
+    return min(2 ** attempt, 4) + random.uniform(0, 0.25)
+
+
+@lru_cache(maxsize=1)
+def _load_env():
+    """Load .env once, on first provider construction rather than at import."""
+    load_dotenv()
 
 
 class OpenAIProvider:
@@ -43,11 +61,17 @@ class OpenAIProvider:
             timeout: Request timeout in seconds
             max_retries: Maximum number of retry attempts
         """
+        _load_env()
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        self.client = OpenAI(api_key=api_key)
+        # Keep-alive connections shared with the other providers
+        self.client = OpenAI(api_key=api_key, http_client=get_http_client())
+        self.async_client = AsyncOpenAI(
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(**http_client_options())
+        )
         self.model = model or os.getenv("LLM_MODEL", "gpt-4o-mini")
         self.temperature = temperature
         self.max_tokens = max_tokens
@@ -58,8 +82,13 @@ class OpenAIProvider:
         """
         Call OpenAI API with JSON-mode response.
         
+        The response is streamed and reading stops as soon as the JSON
+        object is complete, so trailing whitespace that JSON mode sometimes
+        pads up to max_tokens is never waited for.
+        
         Args:
             prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
             Parsed JSON response as dictionary
@@ -78,37 +107,42 @@ class OpenAIProvider:
         for attempt in range(self.max_retries + 1):
             try:
                 # Use JSON mode if available (GPT-4 Turbo and later)
-                response = self.client.chat.completions.create(
+                stream = self.client.chat.completions.create(
                     model=self.model,
                     messages=messages,
                     temperature=self.temperature,
-                    max_tokens=self.max_tokens,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
                     timeout=self.timeout,
-                    response_format={"type": "json_object"}
+                    response_format={"type": "json_object"},
+                    stream=True
                 )
-                
-                content = response.choices[0].message.content
+                scanner = JsonObjectScanner()
+                with stream:
+                    for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            content = scanner.feed(chunk.choices[0].delta.content)
+                            if content:
+                                break
+                    else:
+                        content = scanner.text()
                 
                 # Parse JSON response
                 try:
-                    result = json.loads(content)
+                    result = loads_json(content)
                     return result
                 except json.JSONDecodeError as e:
                     # Try to extract JSON if wrapped in markdown or other text
-                    result = self._extract_json(content)
+                    result = extract_json(content)
                     if result:
                         return result
                     
                     # If this is not the last attempt, retry with format reminder
+                    # (only the latest bad turn is kept so retries don't compound)
                     if attempt < self.max_retries:
-                        messages.append({
-                            "role": "assistant",
-                            "content": content
-                        })
-                        messages.append({
-                            "role": "user",
-                            "content": "Please respond with valid JSON only, no additional text."
-                        })
+                        messages = messages[:2] + [
+                            {"role": "assistant", "content": content},
+                            {"role": "user", "content": _JSON_REMINDER}
+                        ]
                         continue
                     else:
                         raise ValueError(f"Failed to parse JSON response: {e}\nContent: {content}")
@@ -116,9 +150,7 @@ class OpenAIProvider:
             except OpenAIError as e:
                 last_error = e
                 if attempt < self.max_retries:
-                    # Exponential backoff
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    time.sleep(_backoff_delay(attempt))
                     continue
                 else:
                     raise ValueError(f"OpenAI API call failed after {self.max_retries + 1} attempts: {e}")
@@ -128,49 +160,113 @@ class OpenAIProvider:
         
         raise ValueError("Unexpected error in call_llm")
     
-    def _extract_json(self, content: str) -> Optional[Dict[str, Any]]:
+    async def call_llm_async(self, prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Attempt to extract JSON from text that may contain markdown or other wrapping.
+        Async variant of call_llm on the AsyncOpenAI client.
+        
+        Backoff between retries uses asyncio.sleep, so the event loop keeps
+        serving other requests while this one waits.
         
         Args:
-            content: Raw content that may contain JSON
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+                (optional 'max_tokens' overrides the instance limit)
             
         Returns:
-            Parsed JSON dict if found, None otherwise
+            Parsed JSON response as dictionary
+            
+        Raises:
+            ValueError: If the response cannot be parsed or the API call fails after retries
         """
-        # Try to find JSON in markdown code blocks
-        import re
+        messages = [
+            {"role": "system", "content": prompt_dict.get("system", "")},
+            {"role": "user", "content": prompt_dict.get("user", "")}
+        ]
         
-        # Look for ```json...``` or ```...```
-        json_pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
+        for attempt in range(self.max_retries + 1):
             try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
+                # Streamed like call_llm, stopping once the object closes
+                stream = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=prompt_dict.get("max_tokens", self.max_tokens),
+                    timeout=self.timeout,
+                    response_format={"type": "json_object"},
+                    stream=True
+                )
+                scanner = JsonObjectScanner()
+                async with stream:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            content = scanner.feed(chunk.choices[0].delta.content)
+                            if content:
+                                break
+                    else:
+                        content = scanner.text()
+            except OpenAIError as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(_backoff_delay(attempt))
+                    continue
+                raise ValueError(
+                    f"OpenAI API call failed after {self.max_retries + 1} attempts: {e}"
+                )
+            
+            result = parse_json_response(content)
+            if result is not None:
+                return result
+            
+            # Retry with format reminder (same scheme as call_llm)
+            if attempt < self.max_retries:
+                messages = messages[:2] + [
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": _JSON_REMINDER}
+                ]
         
-        # Look for bare JSON object
-        json_pattern = r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})'
-        match = re.search(json_pattern, content, re.DOTALL)
-        if match:
-            try:
-                return json.loads(match.group(1))
-            except json.JSONDecodeError:
-                pass
+        raise ValueError(f"Failed to parse JSON response\nContent: {content}")
+    
+    def stream_llm(self, prompt_dict: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the raw OpenAI response text as it is generated.
         
-        return None
+        Args:
+            prompt_dict: Dictionary with 'system' and 'user' keys containing prompts
+            
+        Yields:
+            Text deltas of the (JSON) response
+        """
+        messages = [
+            {"role": "system", "content": prompt_dict.get("system", "")},
+            {"role": "user", "content": prompt_dict.get("user", "")}
+        ]
+        
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            timeout=self.timeout,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        with stream:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    
 
 
 # Global instance
 _provider: Optional[OpenAIProvider] = None
+_provider_lock = threading.Lock()
 
 
 def get_provider() -> OpenAIProvider:
     """Get or create global provider instance."""
     global _provider
     if _provider is None:
-        _provider = OpenAIProvider()
+        with _provider_lock:
+            if _provider is None:
+                _provider = OpenAIProvider()
     return _provider
 
 
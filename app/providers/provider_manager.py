@@ -5,11 +5,84 @@ Supports OpenAI, Anthropic, and Groq with configurable primary and fallback prov
 """
 
 import os
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Upper bound on one provider attempt in call_llm_async, retries included
+LLM_TOTAL_TIMEOUT_S = float(os.getenv("LLM_TOTAL_TIMEOUT_S", "30"))
+
+# Consecutive failures that open a provider's circuit, and how long it
+# stays open before a single probe call is let through
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN_S = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "60"))
+
+# Hedged requests in call_llm_async: if a provider hasn't answered after
+# this many ms, also start the next one and take whichever answers first.
+# 0 (the default) disables hedging, since a hedge can double the LLM cost.
+LLM_HEDGE_DELAY_MS = float(os.getenv("LLM_HEDGE_DELAY_MS", "0"))
+
+
+class _CircuitBreaker:
+    """
+    Per-provider circuit breaker (closed -> open -> half_open -> closed).
+    
+    After failure_threshold consecutive failures the circuit opens and
+    calls skip the provider for open_seconds. Then one probe call is let
+    through (half_open): success closes the circuit, failure reopens it.
+    Other callers keep skipping the provider while the probe is in flight.
+    """
+    
+    def __init__(self, failure_threshold: int, open_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self._opened_at >= self.open_seconds:
+            return "half_open"
+        return "open"
+    
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now (claims the probe if half open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._probing = True
+            return True
+    
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+    
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+    
+    def release_probe(self):
+        """Give up a claimed probe without an outcome (e.g. the caller was cancelled)."""
+        with self._lock:
+            self._probing = False
+
 
 class ProviderManager:
     """
@@ -44,6 +117,13 @@ class ProviderManager:
         
         # Initialize provider instances (lazy loading)
         self._provider_instances = {}
+        self._instance_locks = {}  # provider name -> lock guarding its construction
+        
+        # Skip providers that keep failing instead of paying their timeouts
+        self._breakers = {
+            name: _CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN_S)
+            for name in self.provider_chain
+        }
         
         # Track which provider was used for last call
         self.last_provider_used = None
@@ -64,6 +144,15 @@ class ProviderManager:
         if provider_name in self._provider_instances:
             return self._provider_instances[provider_name]
         
+        # Build each provider once even if several threads ask at the same
+        # time; different providers can still be built in parallel
+        with self._instance_locks.setdefault(provider_name, threading.Lock()):
+            if provider_name in self._provider_instances:
+                return self._provider_instances[provider_name]
+            return self._create_provider_instance(provider_name)
+    
+    def _create_provider_instance(self, provider_name: str):
+        """Construct and memoize a provider (caller holds its instance lock)."""
         try:
             if provider_name == "openai":
                 from app.providers.openai_provider import OpenAIProvider
@@ -108,9 +197,14 @@ class ProviderManager:
         errors = {}
         
         for provider_name in self.provider_chain:
+            breaker = self._breakers[provider_name]
+            if not breaker.allow():
+                errors[provider_name] = "circuit open, skipped"
+                continue
             try:
                 provider = self._get_provider_instance(provider_name)
                 result = provider.call_llm(prompt_dict)
+                breaker.on_success()
                 
                 # Success! Track which provider worked
                 self.last_provider_used = provider_name
@@ -122,6 +216,7 @@ class ProviderManager:
                 return result
             
             except Exception as e:
+                breaker.on_failure()
                 errors[provider_name] = str(e)
                 # Continue to next provider in chain
                 continue
@@ -133,6 +228,162 @@ class ProviderManager:
         
         raise ValueError(error_msg)
     
+    async def _call_provider_async(
+        self,
+        provider_name: str,
+        prompt_dict: Dict[str, Any],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """One call_llm_async attempt on a provider whose breaker allowed it."""
+        breaker = self._breakers[provider_name]
+        try:
+            provider = self._get_provider_instance(provider_name)
+            if inspect.iscoroutinefunction(getattr(provider, "call_llm_async", None)):
+                pending = provider.call_llm_async(prompt_dict)
+            else:
+                pending = asyncio.to_thread(provider.call_llm, prompt_dict)
+            result = await asyncio.wait_for(pending, timeout)
+        except asyncio.CancelledError:
+            # Lost a hedge race (or the caller went away): not a provider failure
+            breaker.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            breaker.on_failure()
+            raise ValueError(f"timed out after {timeout}s") from None
+        except Exception:
+            breaker.on_failure()
+            raise
+        
+        breaker.on_success()
+        return result
+    
+    async def call_llm_async(
+        self,
+        prompt_dict: Dict[str, Any],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of call_llm with the same fallback chain.
+        
+        Providers that implement call_llm_async are awaited directly; the
+        others run their blocking SDK call in a worker thread, so the event
+        loop stays free while the request is in flight. Each attempt is cut
+        off after `timeout` seconds (LLM_TOTAL_TIMEOUT_S by default) and the
+        next provider is tried.
+        
+        With LLM_HEDGE_DELAY_MS set, the next provider is also started once
+        the current one has been pending that long; the first successful
+        answer wins and the other attempts are cancelled.
+        
+        Args:
+            prompt_dict: Dictionary with 'system' and 'user' prompts
+            timeout: Per-provider time limit in seconds
+            
+        Returns:
+            Parsed JSON response from whichever provider succeeded
+            
+        Raises:
+            ValueError: If all providers fail
+        """
+        if timeout is None:
+            timeout = LLM_TOTAL_TIMEOUT_S
+        hedge_delay = LLM_HEDGE_DELAY_MS / 1000 if LLM_HEDGE_DELAY_MS > 0 else None
+        errors = {}
+        pending = {}  # attempt task -> provider name
+        remaining = iter(self.provider_chain)
+        
+        def start_next_provider():
+            for provider_name in remaining:
+                if self._breakers[provider_name].allow():
+                    task = asyncio.create_task(
+                        self._call_provider_async(provider_name, prompt_dict, timeout)
+                    )
+                    pending[task] = provider_name
+                    return
+                errors[provider_name] = "circuit open, skipped"
+        
+        start_next_provider()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    provider_name = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors[provider_name] = str(e)
+                        continue
+                    
+                    self.last_provider_used = provider_name
+                    if isinstance(result, dict):
+                        result["_provider_used"] = provider_name
+                    
+                    return result
+                
+                # Move on when every attempt failed, or hedge when the
+                # delay passed with no answer
+                if not pending or not done:
+                    start_next_provider()
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        # All providers failed
+        error_msg = "All LLM providers failed:\n"
+        for provider, error in errors.items():
+            error_msg += f"  - {provider}: {error}\n"
+        
+        raise ValueError(error_msg)
+    
+    def stream_llm(self, prompt_dict: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream raw response text, falling back like call_llm.
+        
+        A provider is abandoned for the next one in the chain only if it
+        fails before producing its first chunk; errors after that are
+        raised to the caller since partial output has already been sent.
+        
+        Args:
+            prompt_dict: Dictionary with 'system' and 'user' prompts
+            
+        Yields:
+            Text deltas from whichever provider answered
+            
+        Raises:
+            ValueError: If all providers fail
+        """
+        errors = {}
+        
+        for provider_name in self.provider_chain:
+            breaker = self._breakers[provider_name]
+            if not breaker.allow():
+                errors[provider_name] = "circuit open, skipped"
+                continue
+            try:
+                provider = self._get_provider_instance(provider_name)
+                chunks = provider.stream_llm(prompt_dict)
+                first = next(chunks, "")
+            except Exception as e:
+                breaker.on_failure()
+                errors[provider_name] = str(e)
+                continue
+            
+            breaker.on_success()
+            self.last_provider_used = provider_name
+            if first:
+                yield first
+            yield from chunks
+            return
+        
+        # All providers failed
+        error_msg = "All LLM providers failed:\n"
+        for provider, error in errors.items():
+            error_msg += f"  - {provider}: {error}\n"
+        
+        raise ValueError(error_msg)
+    
     def get_provider_status(self) -> Dict[str, Any]:
         """
         Get status of all configured providers.
@@ -143,28 +394,40 @@ class ProviderManager:
         status = {
             "primary": self.primary_provider,
             "fallbacks": self.fallback_providers,
-            "providers": {}
+            "providers": {},
+            "circuits": {
+                name: breaker.state for name, breaker in self._breakers.items()
+            }
         }
         
-        for provider_name in self.provider_chain:
-            try:
-                self._get_provider_instance(provider_name)
-                status["providers"][provider_name] = "available"
-            except Exception as e:
-                status["providers"][provider_name] = f"unavailable: {str(e)}"
+        # Providers are imported and constructed concurrently
+        with ThreadPoolExecutor(max_workers=len(self.provider_chain)) as executor:
+            futures = {
+                provider_name: executor.submit(self._get_provider_instance, provider_name)
+                for provider_name in self.provider_chain
+            }
+            for provider_name, future in futures.items():
+                try:
+                    future.result()
+                    status["providers"][provider_name] = "available"
+                except Exception as e:
+                    status["providers"][provider_name] = f"unavailable: {str(e)}"
         
         return status
 
 
 # Global instance
 _manager: Optional[ProviderManager] = None
+_manager_lock = threading.Lock()
 
 
 def get_provider_manager() -> ProviderManager:
     """Get or create the global provider manager instance."""
     global _manager
     if _manager is None:
-        _manager = ProviderManager()
+        with _manager_lock:
+            if _manager is None:
+                _manager = ProviderManager()
     return _manager
 
 
@@ -185,6 +448,34 @@ def call_llm(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
     return manager.call_llm(prompt_dict)
 
 
+async def call_llm_async(prompt_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Async convenience function to call LLM with automatic fallback.
+    
+    Args:
+        prompt_dict: Dictionary with 'system' and 'user' prompts
+        
+    Returns:
+        Parsed JSON response
+    """
+    manager = get_provider_manager()
+    return await manager.call_llm_async(prompt_dict)
+
+
+def stream_llm(prompt_dict: Dict[str, Any]) -> Iterator[str]:
+    """
+    Convenience function to stream an LLM response with automatic fallback.
+    
+    Args:
+        prompt_dict: Dictionary with 'system' and 'user' prompts
+        
+    Yields:
+        Raw response text deltas
+    """
+    manager = get_provider_manager()
+    yield from manager.stream_llm(prompt_dict)
+
+
 def get_last_provider_used() -> Optional[str]:
     """Get the name of the provider that was used for the last successful call."""
     manager = get_provider_manager()
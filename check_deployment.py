@@ -5,11 +5,51 @@ Verifies files are in place without requiring dependencies
 """
 
 import os
-from pathlib import Path
 
-def check_file(filepath, description):
+# (section heading, [(path, description), ...])
+FILE_CHECKS = [
+    ("📁 Core Files:", [
+        ("requirements.txt", "Dependencies list"),
+        ("start.py", "Startup script"),
+        (".env.example", "Environment template"),
+        ("render.yaml", "Render blueprint"),
+    ]),
+    ("📚 Documentation:", [
+        ("README.md", "Main readme"),
+        ("ARCHITECTURE.md", "Architecture guide"),
+        ("EXTRAS.md", "Extras & deployment guide"),
+    ]),
+    ("🐍 Application Code:", [
+        ("app/api.py", "FastAPI server"),
+        ("app/dashboard.py", "Streamlit dashboard"),
+        ("app/coach.py", "Core logic"),
+        ("engine/rules.py", "Rules engine"),
+    ]),
+    ("⚙️  Configuration:", [
+        ("policies/policies.yaml", "Policy definitions"),
+        ("configs/config.yaml", "App config"),
+    ]),
+    ("🧪 Testing:", [
+        ("tests/test_coach_guardrails.py", "Coach tests"),
+        ("tests/test_rules.py", "Rules tests"),
+    ]),
+]
+
+def list_present(filepaths):
+    """Return which of filepaths exist, listing each parent directory once."""
+    present = set()
+    for parent in {os.path.dirname(fp) for fp in filepaths}:
+        try:
+            with os.scandir(parent or ".") as entries:
+                # "/"-joined to match the paths above on Windows too
+                present.update(f"{parent}/{entry.name}" if parent else entry.name for entry in entries)
+        except OSError:
+            pass
+    return present
+
+def check_file(filepath, description, present):
     """Check if file exists."""
-    exists = Path(filepath).exists()
+    exists = filepath in present
     status = "✓" if exists else "✗"
     print(f"{status} {description:<40} {filepath}")
     return exists
@@ -22,39 +62,20 @@ def main():
     
     checks = []
     
-    print("📁 Core Files:")
-    checks.append(check_file("requirements.txt", "Dependencies list"))
-    checks.append(check_file("start.py", "Startup script"))
-    checks.append(check_file(".env.example", "Environment template"))
-    checks.append(check_file("render.yaml", "Render blueprint"))
-    print()
-    
-    print("📚 Documentation:")
-    checks.append(check_file("README.md", "Main readme"))
-    checks.append(check_file("ARCHITECTURE.md", "Architecture guide"))
-    checks.append(check_file("EXTRAS.md", "Extras & deployment guide"))
-    print()
+    # One directory listing per parent instead of a stat per file
+    present = list_present(
+        [fp for _, files in FILE_CHECKS for fp, _ in files] + [".env", ".gitignore"]
+    )
     
-    print("🐍 Application Code:")
-    checks.append(check_file("app/api.py", "FastAPI server"))
-    checks.append(check_file("app/dashboard.py", "Streamlit dashboard"))
-    checks.append(check_file("app/coach.py", "Core logic"))
-    checks.append(check_file("engine/rules.py", "Rules engine"))
-    print()
-    
-    print("⚙️  Configuration:")
-    checks.append(check_file("policies/policies.yaml", "Policy definitions"))
-    checks.append(check_file("configs/config.yaml", "App config"))
-    print()
-    
-    print("🧪 Testing:")
-    checks.append(check_file("tests/test_coach_guardrails.py", "Coach tests"))
-    checks.append(check_file("tests/test_rules.py", "Rules tests"))
-    print()
+    for heading, files in FILE_CHECKS:
+        print(heading)
+        for filepath, description in files:
+            checks.append(check_file(filepath, description, present))
+        print()
     
     # Check .env
     print("🔐 Environment:")
-    if Path(".env").exists():
+    if ".env" in present:
         print("✓ .env file exists (contains secrets)")
         checks.append(True)
     else:
@@ -66,7 +87,7 @@ def main():
     
     # Check gitignore
     print("🔒 Security:")
-    if Path(".gitignore").exists():
+    if ".gitignore" in present:
         with open(".gitignore", "r") as f:
             content = f.read()
             if ".env" in content:
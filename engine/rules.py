@@ -3,18 +3,108 @@ Rules engine for policy detection and compliance checking.
 
 Loads policies from YAML and provides:
 - find_policy_hits(text): Detect policy violations in text
+- scan(text): All checks below in one pass (RulesEngine method)
 - contains_pii(text): Check for PII patterns
 - requires_disclosure(text): Check if disclosure is required
 """
 
+import os
 import re
+import hashlib
+import threading
+import unicodedata
 import yaml
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 
+try:
+    import re2
+except ImportError:
+    re2 = None
 
-@dataclass
+try:
+    from ahocorasick_rs import AhoCorasick
+except ImportError:
+    AhoCorasick = None
+
+
+# RE2 scans in linear time with no backtracking; USE_RE2=false forces stdlib re
+USE_RE2 = re2 is not None and os.getenv("USE_RE2", "true").lower() == "true"
+
+# Hits cached per engine, keyed by text digest; RULES_CACHE_SIZE=0 disables
+RULES_CACHE_SIZE = int(os.getenv("RULES_CACHE_SIZE", "4096"))
+
+# RE2 sets built for restrict_ids subsets, least recently used evicted first
+_SUBSET_PATTERN_SETS_MAX = 32
+
+# PII redaction (see redact_pii). Account numbers are 6-12 digits after an
+# "account"/"acct" label, which keeps phone numbers out. SSNs are matched
+# with ASCII \d and \b on text whose digits went through _ascii_digits.
+_SSN_RE = re.compile(r'\b\d{3}-?\d{2}-?\d{4}\b', re.ASCII)
+_ACCOUNT_RE = re.compile(r'\b(?:account|acct)[\s#:]*(\d{6,12})\b', re.IGNORECASE)
+
+
+
+class _AsciiDigitMap(dict):
+    """str.translate table: any Unicode decimal digit -> its ASCII digit, filled on demand."""
+    
+    def __missing__(self, codepoint: int) -> int:
+        digit = unicodedata.decimal(chr(codepoint), None)
+        self[codepoint] = ord(str(digit)) if digit is not None else codepoint
+        return self[codepoint]
+
+
+_ASCII_DIGIT_MAP = _AsciiDigitMap()
+
+
+def _ascii_digits(text: str) -> str:
+    """
+    text with fullwidth, Arabic-Indic, etc. digits replaced by ASCII ones.
+    
+    Each character maps to exactly one character, so match offsets on the
+    result are offsets into text. Lets ASCII-only patterns (and RE2, whose
+    \d is ASCII) still catch PII typed with non-ASCII digits.
+    """
+    return text if text.isascii() else text.translate(_ASCII_DIGIT_MAP)
+
+
+# Financial topics that make a disclosure necessary (see requires_disclosure),
+# fused into one alternation so the check is a single search
+_DISCLOSURE_TRIGGER_RE = re.compile(
+    "|".join((
+        r'\b(?:return|profit|yield|gain|earning|income)s?\b',
+        r'\b(?:invest(?:ment)?|stock|bond|fund|portfolio)\b',
+        r'\b(?:risk|loss|lose|volatile)\b',
+        r'\b(?:performance|historical)\b'
+    )),
+    re.IGNORECASE
+)
+# Every trigger word contains one of these literals; substring checks on
+# them are much cheaper than the regex and rule out most texts before it
+_DISCLOSURE_TRIGGER_STEMS = (
+    "return", "profit", "yield", "gain", "earning", "income",
+    "invest", "stock", "bond", "fund", "portfolio",
+    "risk", "loss", "lose", "volatile", "performance", "historical"
+)
+
+# The trigger regex spelled out as whole words, for the phrase automaton
+_DISCLOSURE_TRIGGER_WORDS = frozenset(
+    [w for stem in ("return", "profit", "yield", "gain", "earning", "income") for w in (stem, stem + "s")]
+    + ["invest", "investment", "stock", "bond", "fund", "portfolio"]
+    + ["risk", "loss", "lose", "volatile", "performance", "historical"]
+)
+
+
+def _is_whole_word(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] has a regex word boundary (\\b) at both ends."""
+    def is_word_char(i: int) -> bool:
+        return 0 <= i < len(text) and (text[i].isalnum() or text[i] == "_")
+    return not is_word_char(start - 1) and not is_word_char(end)
+
+
+@dataclass(frozen=True, slots=True)
 class PolicyHit:
     """Represents a detected policy violation."""
     policy_id: str
@@ -25,19 +115,64 @@ class PolicyHit:
 
 
 @dataclass
+class ScanResult:
+    """Everything the rules engine reports about one text, from a single scan."""
+    hits: List[PolicyHit]
+    has_pii: bool
+    needs_disclosure: bool
+    has_disclosure: bool
+
+
+@dataclass(frozen=True, slots=True)
 class Policy:
-    """Represents a compliance policy."""
+    """Represents a compliance policy (build from YAML with Policy.from_yaml)."""
     id: str
     name: str
     severity: str
-    patterns: List[str] = None
-    required_phrases: List[str] = None
+    patterns: Tuple[str, ...] = ()
+    required_phrases: Tuple[str, ...] = ()
+    # Patterns only need ASCII \d, \w, \b (YAML "ascii: true"); re.ASCII
+    # avoids Unicode table lookups and agrees with RE2's classes
+    ascii: bool = False
+    # Derived once in from_yaml: pattern -> compiled regex, one alternation
+    # of all patterns (None without patterns), lowercased phrases
+    compiled_patterns: Dict[str, re.Pattern] = field(default_factory=dict, repr=False, compare=False)
+    fused_pattern: Optional[re.Pattern] = field(default=None, repr=False, compare=False)
+    required_phrases_lower: Tuple[str, ...] = field(default=(), repr=False, compare=False)
     
-    def __post_init__(self):
-        if self.patterns is None:
-            self.patterns = []
-        if self.required_phrases is None:
-            self.required_phrases = []
+    @classmethod
+    def from_yaml(cls, p: Dict[str, Any]) -> "Policy":
+        """Build a policy from its policies.yaml entry, compiling its patterns."""
+        policy_id = p['id']
+        ascii_only = bool(p.get('ascii', False))
+        flags = re.IGNORECASE | (re.ASCII if ascii_only else 0)
+        compiled_patterns = {}
+        for pattern in p.get('patterns') or []:
+            try:
+                compiled_patterns[pattern] = re.compile(pattern, flags)
+            except re.error as e:
+                # Log pattern compilation errors once and drop the pattern
+                print(f"Warning: Invalid regex pattern in {policy_id}: {pattern} - {e}")
+        
+        fused_pattern = None
+        if compiled_patterns:
+            fused_pattern = re.compile(
+                "|".join(f"(?:{pattern})" for pattern in compiled_patterns),
+                flags
+            )
+        required_phrases = tuple(p.get('required_phrases') or [])
+        
+        return cls(
+            id=policy_id,
+            name=p['name'],
+            severity=p['severity'],
+            patterns=tuple(compiled_patterns),
+            required_phrases=required_phrases,
+            ascii=ascii_only,
+            compiled_patterns=compiled_patterns,
+            fused_pattern=fused_pattern,
+            required_phrases_lower=tuple(phrase.lower() for phrase in required_phrases)
+        )
 
 
 class RulesEngine:
@@ -53,63 +188,285 @@ class RulesEngine:
         self.policies = self._load_policies(policies_path)
         self.pii_policy_ids = ["PII-SSN"]  # Critical PII policies
         self.disclosure_policy_ids = ["DISC-1.1"]  # Disclosure requirements
+        self._pattern_set, self._set_entries = self._build_pattern_set(self.policies)
+        self._policy_ids = frozenset(policy.id for policy in self.policies)
+        # restrict_ids -> (pattern_set, entries), see _subset_pattern_set
+        self._subset_pattern_sets: "OrderedDict[FrozenSet[str], tuple]" = OrderedDict()
+        self._subset_pattern_sets_lock = threading.Lock()
+        self._phrase_matcher, self._phrase_owners, self._trigger_terms = (
+            self._build_phrase_matcher(self.policies)
+        )
+        # Without RE2: one alternation of every policy's patterns, searched
+        # once to skip all per-policy work on texts nothing can match
+        self._any_pattern = None
+        if any(policy.patterns for policy in self.policies):
+            self._any_pattern = re.compile(
+                "|".join(
+                    f"(?{'a' if p.ascii else ''}:{p.fused_pattern.pattern})"
+                    for p in self.policies if p.patterns
+                ),
+                re.IGNORECASE
+            )
+        self._hits_cache: "OrderedDict[tuple, List[PolicyHit]]" = OrderedDict()
+        self._hits_cache_lock = threading.Lock()
     
     def _load_policies(self, path: Path) -> List[Policy]:
         """Load policies from YAML file."""
         with open(path, 'r', encoding='utf-8') as f:
             data = yaml.safe_load(f)
         
-        policies = []
-        for p in data.get('policies', []):
-            policy = Policy(
-                id=p['id'],
-                name=p['name'],
-                severity=p['severity'],
-                patterns=p.get('patterns', []),
-                required_phrases=p.get('required_phrases', [])
+        return [Policy.from_yaml(p) for p in data.get('policies', [])]
+    
+    def _build_pattern_set(self, policies: List[Policy]):
+        """
+        Compile the patterns of the given policies into one RE2 set.
+        
+        A single set scan reports which patterns occur anywhere in the text,
+        so find_policy_hits only runs the patterns that can actually match.
+        Returns (None, []) when RE2 is disabled or rejects a pattern.
+        """
+        if not USE_RE2:
+            return None, []
+        
+        options = re2.Options()
+        options.case_sensitive = False
+        pattern_set = re2.Set.SearchSet(options)
+        entries = []
+        try:
+            for policy in policies:
+                for pattern in policy.patterns:
+                    pattern_set.Add(pattern)
+                    entries.append((policy, pattern))
+            pattern_set.Compile()
+        except re2.error as e:
+            print(f"Warning: RE2 pattern set unavailable, using per-pattern scan - {e}")
+            return None, []
+        
+        return pattern_set, entries
+    
+    def _build_phrase_matcher(self, policies: List[Policy]):
+        """
+        Build one Aho-Corasick automaton over every policy's required phrases
+        and the disclosure trigger words.
+        
+        Returns (matcher, owners, trigger_terms) where owners[i] is the set
+        of policy IDs requiring term i and trigger_terms the indexes of
+        trigger words, or (None, [], frozenset()) without ahocorasick_rs.
+        """
+        owners_by_term = {word: set() for word in sorted(_DISCLOSURE_TRIGGER_WORDS)}
+        for policy in policies:
+            for phrase in policy.required_phrases_lower:
+                owners_by_term.setdefault(phrase, set()).add(policy.id)
+        
+        if AhoCorasick is None or "" in owners_by_term:
+            return None, [], frozenset()
+        
+        terms = list(owners_by_term)
+        return (
+            AhoCorasick(terms),
+            [owners_by_term[term] for term in terms],
+            frozenset(i for i, term in enumerate(terms) if term in _DISCLOSURE_TRIGGER_WORDS)
+        )
+    
+    def _phrase_scan(self, text_lower: str) -> Tuple[Set[str], bool]:
+        """
+        Every phrase-level check on (lowercased) text in one automaton pass.
+        
+        Returns:
+            (IDs of policies with at least one required phrase present,
+            whether a disclosure trigger word occurs)
+        """
+        if self._phrase_matcher is None:
+            present = {
+                policy.id
+                for policy in self.policies
+                if any(phrase in text_lower for phrase in policy.required_phrases_lower)
+            }
+            # A stem must be present before the regex can match a trigger word
+            triggered = (
+                any(stem in text_lower for stem in _DISCLOSURE_TRIGGER_STEMS)
+                and _DISCLOSURE_TRIGGER_RE.search(text_lower) is not None
             )
-            policies.append(policy)
+            return present, triggered
         
-        return policies
+        present = set()
+        triggered = False
+        for idx, start, end in self._phrase_matcher.find_matches_as_indexes(text_lower, overlapping=True):
+            present |= self._phrase_owners[idx]
+            if not triggered and idx in self._trigger_terms:
+                triggered = _is_whole_word(text_lower, start, end)
+        return present, triggered
+    
+    def _policies_with_phrases(self, text_lower: str) -> Set[str]:
+        """IDs of policies with at least one required phrase in (lowercased) text."""
+        return self._phrase_scan(text_lower)[0]
     
-    def find_policy_hits(self, text: str) -> List[PolicyHit]:
+    def _candidate_patterns(self, text: str, restrict_ids: Optional[FrozenSet[str]]) -> dict:
+        """Map policy id -> patterns that may match text."""
+        if self._pattern_set is None:
+            return self._fused_candidates(text)
+        
+        if restrict_ids is None:
+            pattern_set, entries = self._pattern_set, self._set_entries
+        else:
+            # restrict_ids can come from clients: unknown ids match nothing
+            # and must not become memo keys
+            restrict_ids = restrict_ids & self._policy_ids
+            if not restrict_ids:
+                return {}
+            pattern_set, entries = self._subset_pattern_set(restrict_ids)
+            if pattern_set is None:
+                return self._fused_candidates(text)
+        
+        candidates = {}
+        for idx in sorted(pattern_set.Match(text) or []):
+            policy, pattern = entries[idx]
+            candidates.setdefault(policy.id, []).append(pattern)
+        return candidates
+    
+    def _subset_pattern_set(self, restrict_ids: FrozenSet[str]) -> tuple:
+        """Smaller RE2 set over just the given (known) policies, built once per id set."""
+        with self._subset_pattern_sets_lock:
+            cached = self._subset_pattern_sets.get(restrict_ids)
+            if cached is not None:
+                self._subset_pattern_sets.move_to_end(restrict_ids)
+                return cached
+        
+        built = self._build_pattern_set([p for p in self.policies if p.id in restrict_ids])
+        with self._subset_pattern_sets_lock:
+            self._subset_pattern_sets[restrict_ids] = built
+            while len(self._subset_pattern_sets) > _SUBSET_PATTERN_SETS_MAX:
+                self._subset_pattern_sets.popitem(last=False)
+        return built
+    
+    def _fused_candidates(self, text: str) -> dict:
+        """
+        Without RE2: all patterns of each policy whose fused alternation matches.
+        
+        One search per policy rules out policies with no match at all. The
+        individual patterns still run separately in find_policy_hits, since a
+        single finditer over the alternation would drop overlapping hits.
+        Most texts match no pattern at all, which one search of the
+        engine-wide alternation settles first.
+        """
+        if self._any_pattern is None or not self._any_pattern.search(text):
+            return {}
+        return {
+            policy.id: policy.patterns
+            for policy in self.policies
+            if policy.fused_pattern is not None and policy.fused_pattern.search(text)
+        }
+    
+    def matched_policy_ids(
+        self,
+        text: str,
+        restrict_ids: Optional[FrozenSet[str]] = None
+    ) -> Set[str]:
+        """
+        IDs of policies with at least one pattern match in text.
+        
+        Cheaper than find_policy_hits when spans are not needed: with RE2
+        the set scan alone answers it, and the fallback stops at each
+        policy's first match. Required-phrase (missing disclosure) checks
+        are not included.
+        
+        Args:
+            text: The text to check
+            restrict_ids: Only check these policy IDs (all policies if None)
+            
+        Returns:
+            Set of matching policy IDs
+        """
+        text = _ascii_digits(text)
+        if self._pattern_set is not None:
+            return set(self._candidate_patterns(text, restrict_ids))
+        if self._any_pattern is None or not self._any_pattern.search(text):
+            return set()
+        
+        return {
+            policy.id
+            for policy in self.policies
+            if (restrict_ids is None or policy.id in restrict_ids)
+            and policy.fused_pattern is not None
+            and policy.fused_pattern.search(text)
+        }
+    
+    def find_policy_hits(
+        self,
+        text: str,
+        restrict_ids: Optional[FrozenSet[str]] = None
+    ) -> List[PolicyHit]:
         """
         Find all policy violations in the given text.
         
         Args:
             text: The text to check for policy violations
+            restrict_ids: Only check these policy IDs (all policies if None)
             
         Returns:
             List of PolicyHit objects with violation details
         """
+        return self._cached_policy_hits(text, restrict_ids)
+    
+    def _cached_policy_hits(
+        self,
+        text: str,
+        restrict_ids: Optional[FrozenSet[str]],
+        phrases_present: Optional[Set[str]] = None
+    ) -> List[PolicyHit]:
+        """find_policy_hits(), optionally reusing a _phrase_scan() result."""
+        # The same utterance is often re-checked (before/after redaction,
+        # across retries). Key on a digest so raw text isn't held in memory.
+        key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest(), restrict_ids)
+        with self._hits_cache_lock:
+            cached = self._hits_cache.get(key)
+            if cached is not None:
+                self._hits_cache.move_to_end(key)
+                return list(cached)
+        
+        hits = self._scan_policy_hits(text, restrict_ids, phrases_present)
+        
+        # Hits quote the matched text, so results with PII hits aren't kept
+        if RULES_CACHE_SIZE > 0 and not any(h.policy_id in self.pii_policy_ids for h in hits):
+            with self._hits_cache_lock:
+                self._hits_cache[key] = hits
+                while len(self._hits_cache) > RULES_CACHE_SIZE:
+                    self._hits_cache.popitem(last=False)
+        return list(hits)
+    
+    def _scan_policy_hits(
+        self,
+        text: str,
+        restrict_ids: Optional[FrozenSet[str]],
+        phrases_present: Optional[Set[str]] = None
+    ) -> List[PolicyHit]:
+        """Uncached find_policy_hits(); phrases_present is computed when first needed if not given."""
         hits = []
-        text_lower = text.lower()
+        # Patterns run on the digit-normalized text; hits quote the original
+        scan_text = _ascii_digits(text)
+        candidates = self._candidate_patterns(scan_text, restrict_ids)
         
         for policy in self.policies:
+            if restrict_ids is not None and policy.id not in restrict_ids:
+                continue
+            
             # Check pattern-based policies
-            for pattern in policy.patterns:
-                try:
-                    regex = re.compile(pattern, re.IGNORECASE)
-                    for match in regex.finditer(text):
-                        hit = PolicyHit(
-                            policy_id=policy.id,
-                            policy_name=policy.name,
-                            severity=policy.severity,
-                            matched_pattern=match.group(0),
-                            span=(match.start(), match.end())
-                        )
-                        hits.append(hit)
-                except re.error as e:
-                    # Log pattern compilation errors but continue
-                    print(f"Warning: Invalid regex pattern in {policy.id}: {pattern} - {e}")
+            for pattern in candidates.get(policy.id, []):
+                for match in policy.compiled_patterns[pattern].finditer(scan_text):
+                    hit = PolicyHit(
+                        policy_id=policy.id,
+                        policy_name=policy.name,
+                        severity=policy.severity,
+                        matched_pattern=text[match.start():match.end()],
+                        span=(match.start(), match.end())
+                    )
+                    hits.append(hit)
             
             # Check required phrase policies (inverse logic - violation if missing)
             if policy.required_phrases:
-                has_required = any(
-                    phrase.lower() in text_lower 
-                    for phrase in policy.required_phrases
-                )
-                if not has_required:
+                if phrases_present is None:
+                    phrases_present = self._policies_with_phrases(text.lower())
+                if policy.id not in phrases_present:
                     # Create a pseudo-hit indicating missing disclosure
                     hit = PolicyHit(
                         policy_id=policy.id,
@@ -122,6 +479,37 @@ class RulesEngine:
         
         return hits
     
+    def scan(self, text: str) -> ScanResult:
+        """
+        Run every check on text at once.
+        
+        One phrase-automaton pass finds both the disclosure trigger words
+        and the required phrases; one find_policy_hits pass (reusing those
+        phrases) supplies the hits, the PII flag and the disclosure-present
+        flag (a disclosure policy reports a <missing_disclosure> hit when
+        none of its phrases occur). Prefer this over calling
+        find_policy_hits, contains_pii, requires_disclosure and
+        has_disclosure separately on the same text.
+        
+        Args:
+            text: The text to check
+            
+        Returns:
+            ScanResult with hits, has_pii, needs_disclosure and has_disclosure
+        """
+        phrases_present, needs_disclosure = self._phrase_scan(text.lower())
+        hits = self._cached_policy_hits(text, None, phrases_present)
+        return ScanResult(
+            hits=hits,
+            has_pii=any(h.policy_id in self.pii_policy_ids for h in hits),
+            needs_disclosure=needs_disclosure,
+            has_disclosure=not any(
+                h.policy_id in self.disclosure_policy_ids
+                and h.matched_pattern == "<missing_disclosure>"
+                for h in hits
+            )
+        )
+    
     def contains_pii(self, text: str) -> bool:
         """
         Check if text contains PII patterns (e.g., SSN).
@@ -132,8 +520,7 @@ class RulesEngine:
         Returns:
             True if PII is detected, False otherwise
         """
-        hits = self.find_policy_hits(text)
-        return any(hit.policy_id in self.pii_policy_ids for hit in hits)
+        return bool(self.matched_policy_ids(text, frozenset(self.pii_policy_ids)))
     
     def redact_pii(self, text: str) -> tuple[str, dict]:
         """
@@ -146,32 +533,32 @@ class RulesEngine:
             Tuple of (redacted_text, redaction_map)
             redaction_map contains {placeholder: original_value} for restoration if needed
         """
-        redacted = text
+        # SSN spans (XXX-XX-XXXX or XXXXXXXXX), then account numbers (the
+        # digits only, keeping the "account" prefix) that aren't inside one
+        # Matched on ASCII-mapped digits; values are taken from the original text
+        scan_text = _ascii_digits(text)
+        ssn_spans = [(m.start(), m.end(), text[m.start():m.end()], "SSN") for m in _SSN_RE.finditer(scan_text)]
+        account_spans = [
+            (m.start(1), m.end(1), text[m.start(1):m.end(1)], "ACCOUNT")
+            for m in _ACCOUNT_RE.finditer(scan_text)
+            if not any(start < m.end(1) and m.start(1) < end for start, end, _, _ in ssn_spans)
+        ]
+        
+        # Build the result in one left-to-right pass over the original text
+        parts = []
         redaction_map = {}
+        counts = {"SSN": 0, "ACCOUNT": 0}
+        cursor = 0
+        for start, end, value, kind in sorted(ssn_spans + account_spans):
+            counts[kind] += 1
+            placeholder = f"[{kind}_REDACTED_{counts[kind]}]"
+            redaction_map[placeholder] = value
+            parts.append(text[cursor:start])
+            parts.append(placeholder)
+            cursor = end
+        parts.append(text[cursor:])
         
-        # Redact SSN patterns (XXX-XX-XXXX or XXXXXXXXX)
-        ssn_pattern = r'\b\d{3}-?\d{2}-?\d{4}\b'
-        ssn_matches = list(re.finditer(ssn_pattern, redacted))
-        
-        for i, match in enumerate(ssn_matches, 1):
-            ssn_value = match.group()
-            placeholder = f"[SSN_REDACTED_{i}]"
-            redaction_map[placeholder] = ssn_value
-            redacted = redacted[:match.start()] + placeholder + redacted[match.end():]
-        
-        # Redact account numbers (6-12 digits, not already matched as SSN)
-        # Avoid matching phone numbers by requiring word boundaries or spaces
-        account_pattern = r'\b(?:account|acct)[\s#:]*(\d{6,12})\b'
-        account_matches = list(re.finditer(account_pattern, redacted, re.IGNORECASE))
-        
-        for i, match in enumerate(account_matches, 1):
-            account_value = match.group(1)
-            placeholder = f"[ACCOUNT_REDACTED_{i}]"
-            # Only replace the number part, keep the "account" prefix
-            redacted = redacted[:match.start(1)] + placeholder + redacted[match.end(1):]
-            redaction_map[placeholder] = account_value
-        
-        return redacted, redaction_map
+        return "".join(parts), redaction_map
     
     def requires_disclosure(self, text: str) -> bool:
         """
@@ -186,20 +573,7 @@ class RulesEngine:
         Returns:
             True if disclosure is required, False otherwise
         """
-        # Keywords that trigger disclosure requirements
-        disclosure_triggers = [
-            r'\b(return|profit|yield|gain|earning|income)s?\b',
-            r'\b(invest(?:ment)?|stock|bond|fund|portfolio)\b',
-            r'\b(risk|loss|lose|volatile)\b',
-            r'\b(performance|historical)\b'
-        ]
-        
-        text_lower = text.lower()
-        for pattern in disclosure_triggers:
-            if re.search(pattern, text_lower):
-                return True
-        
-        return False
+        return self._phrase_scan(text.lower())[1]
     
     def has_disclosure(self, text: str) -> bool:
         """
@@ -219,11 +593,7 @@ class RulesEngine:
         if not disclosure_policy or not disclosure_policy.required_phrases:
             return True  # No disclosure requirement
         
-        text_lower = text.lower()
-        return any(
-            phrase.lower() in text_lower 
-            for phrase in disclosure_policy.required_phrases
-        )
+        return disclosure_policy.id in self._policies_with_phrases(text.lower())
     
     def get_policy_by_id(self, policy_id: str) -> Optional[Policy]:
         """Get a policy by its ID."""
@@ -239,20 +609,29 @@ class RulesEngine:
 
 
 # Global instance for easy import
-_engine = None
+_engine: Optional[RulesEngine] = None
+_engine_lock = threading.Lock()
+
 
 def get_rules_engine() -> RulesEngine:
-    """Get or create the global rules engine instance."""
+    """
+    Get or create the global rules engine instance.
+    
+    Built once under a lock: functools.cache would let a burst of first
+    calls each parse the YAML and compile every pattern before one wins.
+    """
     global _engine
     if _engine is None:
-        _engine = RulesEngine()
+        with _engine_lock:
+            if _engine is None:
+                _engine = RulesEngine()
     return _engine
 
 
 # Convenience functions
-def find_policy_hits(text: str) -> List[PolicyHit]:
+def find_policy_hits(text: str, restrict_ids: Optional[FrozenSet[str]] = None) -> List[PolicyHit]:
     """Find policy violations in text."""
-    return get_rules_engine().find_policy_hits(text)
+    return get_rules_engine().find_policy_hits(text, restrict_ids)
 
 
 def contains_pii(text: str) -> bool:
@@ -5,13 +5,14 @@ Generates HTML reports with KPIs, charts, and insights.
 """
 
 import os
-import json
+import atexit
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 import duckdb
-import pandas as pd
 from jinja2 import Environment, FileSystemLoader
 from dotenv import load_dotenv
 
@@ -20,216 +21,248 @@ load_dotenv()
 
 DB_PATH = os.getenv("RUNS_DB", "./data/qa_runs.duckdb")
 
+# Optional Parquet snapshot of coach_events (see scripts/archive_events.py
+# --snapshot). When set and present, reports read it instead of DB_PATH.
+EVENTS_PARQUET = os.getenv("REPORT_EVENTS_PARQUET", "")
 
+# Report queries run concurrently, each on its own cursor
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "4"))
+
+# Severity shown for an example rewrite, by its first policy
+SEVERITY_MAP = {
+    "PII-SSN": "critical",
+    "ADV-6.2": "high",
+    "DISC-1.1": "medium",
+    "TONE": "low"
+}
+
+# Built once so the compiled report template is cached across reports
+_JINJA_ENV = Environment(
+    loader=FileSystemLoader(str(Path(__file__).parent / "templates")),
+    auto_reload=False,
+    cache_size=-1
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_db_connection():
-    """Get database connection."""
-    return duckdb.connect(DB_PATH)
+    """
+    Get the database connection, opened once and shared by every helper.
+    
+    With a Parquet snapshot configured, this is an in-memory database whose
+    coach_events view reads the snapshot: queries then only read the
+    columns they use, and the report doesn't need the live database file
+    (which a running API keeps locked).
+    """
+    if EVENTS_PARQUET and os.path.exists(EVENTS_PARQUET):
+        conn = duckdb.connect(":memory:")
+        conn.execute(f"CREATE VIEW coach_events AS SELECT * FROM read_parquet('{EVENTS_PARQUET}')")
+    else:
+        conn = duckdb.connect(DB_PATH)
+    atexit.register(conn.close)
+    return conn
 
 
-def calculate_violations_prevented() -> int:
-    """Calculate total violations prevented."""
-    conn = get_db_connection()
+def _on_cursor(conn, fn, *args, **kwargs):
+    """
+    Run fn(..., conn=cursor) on a fresh cursor of conn, then close it.
     
+    A DuckDB connection must not be shared between threads, but each of
+    its cursors is an independent connection to the same database.
+    """
+    cursor = conn.cursor()
     try:
-        result = conn.execute("""
-            SELECT COUNT(*) FROM coach_events WHERE event = 'offered'
-        """).fetchone()
-        return result[0] if result else 0
-    except:
-        return 0
+        return fn(*args, conn=cursor, **kwargs)
+    finally:
+        cursor.close()
 
 
-def calculate_accept_rate() -> float:
-    """Calculate suggestion accept rate."""
-    conn = get_db_connection()
-    
+# KPIs of a database with no events yet
+_EMPTY_KPIS = {"offered": 0, "accepted": 0, "avg_latency": None, "p95_latency": None, "p99_latency": None}
+
+
+def _has_events_table(conn) -> bool:
+    """Whether coach_events exists (it is created by the API on first start)."""
     try:
-        offered = conn.execute(
-            "SELECT COUNT(*) FROM coach_events WHERE event = 'offered'"
-        ).fetchone()[0]
-        
-        accepted = conn.execute(
-            "SELECT COUNT(*) FROM coach_events WHERE event IN ('accepted', 'edited')"
-        ).fetchone()[0]
-        
-        if offered == 0:
-            return 0.0
-        
-        return round((accepted / offered) * 100, 1)
-    except:
+        conn.execute("SELECT 1 FROM coach_events LIMIT 0")
+        return True
+    except duckdb.CatalogException:
+        return False
+
+
+def _event_counts(conn) -> Dict[str, int]:
+    """Number of events of each type (reads only the event column)."""
+    return dict(conn.execute("SELECT event, COUNT(*) FROM coach_events GROUP BY event").fetchall())
+
+
+def _collect_kpis(conn, counts: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    """
+    Event counts and latency stats for the headline KPIs.
+    
+    Feeds calculate_violations_prevented, calculate_accept_rate and
+    calculate_latency_metrics. Pass the _event_counts() result when it
+    is already at hand (it also feeds get_event_breakdown) to skip that
+    query. Latency stats cover events with latency_ms > 0 and are None
+    when there are none.
+    """
+    if counts is None:
+        counts = _event_counts(conn)
+    
+    avg_latency, percentiles = conn.execute("""
+        SELECT AVG(latency_ms), quantile_cont(latency_ms, [0.95, 0.99])
+        FROM coach_events
+        WHERE latency_ms > 0
+    """).fetchone()
+    # Both percentiles come from one list-valued quantile (one sort)
+    p95, p99 = percentiles or (None, None)
+    
+    return {
+        "offered": counts.get("offered", 0),
+        "accepted": counts.get("accepted", 0) + counts.get("edited", 0),
+        "avg_latency": avg_latency,
+        "p95_latency": p95,
+        "p99_latency": p99
+    }
+
+
+def calculate_violations_prevented(kpis: Optional[Dict[str, Any]] = None) -> int:
+    """Calculate total violations prevented (from _collect_kpis() output if given)."""
+    if kpis is None:
+        kpis = _collect_kpis(get_db_connection())
+    return kpis["offered"]
+
+
+def calculate_accept_rate(kpis: Optional[Dict[str, Any]] = None) -> float:
+    """Calculate suggestion accept rate (from _collect_kpis() output if given)."""
+    if kpis is None:
+        kpis = _collect_kpis(get_db_connection())
+    
+    if kpis["offered"] == 0:
         return 0.0
+    
+    return round((kpis["accepted"] / kpis["offered"]) * 100, 1)
 
 
-def calculate_latency_metrics() -> Dict[str, int]:
-    """Calculate latency percentiles."""
-    conn = get_db_connection()
+def calculate_latency_metrics(kpis: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """Calculate latency percentiles (from _collect_kpis() output if given)."""
+    if kpis is None:
+        kpis = _collect_kpis(get_db_connection())
     
-    try:
-        df = pd.read_sql(
-            "SELECT latency_ms FROM coach_events WHERE latency_ms > 0",
-            conn
-        )
-        
-        if df.empty:
-            return {"avg": 0, "p95": 0, "p99": 0}
-        
-        return {
-            "avg": int(df['latency_ms'].mean()),
-            "p95": int(df['latency_ms'].quantile(0.95)),
-            "p99": int(df['latency_ms'].quantile(0.99))
-        }
-    except:
+    if kpis["avg_latency"] is None:
         return {"avg": 0, "p95": 0, "p99": 0}
+    
+    return {
+        "avg": int(kpis["avg_latency"]),
+        "p95": int(kpis["p95_latency"]),
+        "p99": int(kpis["p99_latency"])
+    }
 
 
-def get_policy_breakdown() -> List[Dict[str, Any]]:
+def get_policy_breakdown(conn=None) -> List[Dict[str, Any]]:
     """Get violation counts by policy."""
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_db_connection()
     
-    try:
-        rows = conn.execute("""
-            SELECT policy_refs, COUNT(*) as count
-            FROM coach_events
-            WHERE policy_refs IS NOT NULL AND policy_refs != '[]'
-            GROUP BY policy_refs
-        """).fetchall()
-        
-        # Parse JSON policy refs
-        policy_counts = {}
-        for row in rows:
-            try:
-                policies = json.loads(row[0])
-                for policy in policies:
-                    policy_counts[policy] = policy_counts.get(policy, 0) + row[1]
-            except:
-                pass
-        
-        # Calculate percentages
-        total = sum(policy_counts.values())
-        if total == 0:
-            return []
-        
-        breakdown = []
-        for policy_id, count in sorted(policy_counts.items(), key=lambda x: x[1], reverse=True):
-            breakdown.append({
-                "policy_id": policy_id,
-                "count": count,
-                "percentage": round((count / total) * 100, 1)
-            })
-        
-        return breakdown
-    except:
-        return []
+    # One row per policy, already ranked, with its share of all hits
+    rows = conn.execute("""
+        SELECT
+            policy,
+            COUNT(*) as count,
+            ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 1) as percentage
+        FROM coach_events, UNNEST(policy_refs) AS t(policy)
+        GROUP BY policy
+        ORDER BY count DESC, policy
+    """).fetchall()
+    
+    return [
+        {"policy_id": policy_id, "count": count, "percentage": percentage}
+        for policy_id, count, percentage in rows
+    ]
 
 
-def get_event_breakdown() -> List[Dict[str, Any]]:
-    """Get event counts by type."""
-    conn = get_db_connection()
+def get_event_breakdown(conn=None, counts: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+    """Get event counts by type (from _event_counts() output if given)."""
+    if counts is None:
+        counts = _event_counts(conn if conn is not None else get_db_connection())
     
-    try:
-        df = pd.read_sql("""
-            SELECT event, COUNT(*) as count
-            FROM coach_events
-            GROUP BY event
-        """, conn)
-        
-        if df.empty:
-            return []
-        
-        total = df['count'].sum()
-        
-        breakdown = []
-        for _, row in df.iterrows():
-            breakdown.append({
-                "event_type": row['event'],
-                "count": int(row['count']),
-                "percentage": round((row['count'] / total) * 100, 1)
-            })
-        
-        return sorted(breakdown, key=lambda x: x['count'], reverse=True)
-    except:
-        return []
+    total = sum(counts.values())
+    
+    return [
+        {
+            "event_type": event,
+            "count": count,
+            "percentage": round((count / total) * 100, 1)
+        }
+        for event, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    ]
 
 
-def get_example_rewrites(limit: int = 5) -> List[Dict[str, Any]]:
+def get_example_rewrites(limit: int = 5, conn=None) -> List[Dict[str, Any]]:
     """Get example before/after rewrites."""
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_db_connection()
     
-    try:
-        rows = conn.execute("""
-            SELECT agent_draft, suggestion_used, policy_refs
-            FROM coach_events
-            WHERE event IN ('accepted', 'edited')
-              AND suggestion_used IS NOT NULL
-              AND LENGTH(agent_draft) < 150
-            ORDER BY ts DESC
-            LIMIT ?
-        """, [limit]).fetchall()
-        
-        examples = []
-        severity_map = {
-            "PII-SSN": "critical",
-            "ADV-6.2": "high",
-            "DISC-1.1": "medium",
-            "TONE": "low"
-        }
+    # Texts come back cut to 100 chars, with a flag for whether they were longer
+    rows = conn.execute("""
+        SELECT
+            substr(agent_draft, 1, 100), LENGTH(agent_draft) > 100,
+            substr(suggestion_used, 1, 100), LENGTH(suggestion_used) > 100,
+            policy_refs
+        FROM coach_events
+        WHERE event IN ('accepted', 'edited')
+          AND suggestion_used IS NOT NULL
+          AND LENGTH(agent_draft) < 150
+        ORDER BY ts DESC
+        LIMIT ?
+    """, [limit]).fetchall()
+    
+    examples = []
+    for before, before_cut, after, after_cut, policies in rows:
+        policies = policies or []
+        policy_str = ", ".join(policies[:2])  # Show first 2
         
-        for row in rows:
-            try:
-                policies = json.loads(row[2])
-                policy_str = ", ".join(policies[:2])  # Show first 2
-                
-                # Get severity of first policy
-                severity = "medium"
-                if policies:
-                    severity = severity_map.get(policies[0], "medium")
-                
-                examples.append({
-                    "before": row[0][:100] + ("..." if len(row[0]) > 100 else ""),
-                    "after": row[1][:100] + ("..." if len(row[1]) > 100 else ""),
-                    "policy": policy_str or "UNKNOWN",
-                    "severity": severity
-                })
-            except:
-                pass
+        # Get severity of first policy
+        severity = "medium"
+        if policies:
+            severity = SEVERITY_MAP.get(policies[0], "medium")
         
-        return examples
-    except:
-        return []
+        examples.append({
+            "before": before + ("..." if before_cut else ""),
+            "after": after + ("..." if after_cut else ""),
+            "policy": policy_str or "UNKNOWN",
+            "severity": severity
+        })
+    
+    return examples
 
 
-def get_ab_test_results() -> List[Dict[str, Any]]:
+def get_ab_test_results(conn=None) -> List[Dict[str, Any]]:
     """Get A/B test comparison if available."""
-    conn = get_db_connection()
+    if conn is None:
+        conn = get_db_connection()
     
-    try:
-        df = pd.read_sql("""
-            SELECT 
-                ab_test_bucket,
-                COUNT(*) as total,
-                SUM(CASE WHEN event IN ('accepted', 'edited') THEN 1 ELSE 0 END) as accepted,
-                AVG(latency_ms) as avg_latency
-            FROM coach_events
-            WHERE ab_test_bucket IS NOT NULL
-            GROUP BY ab_test_bucket
-        """, conn)
-        
-        if df.empty:
-            return []
-        
-        results = []
-        for _, row in df.iterrows():
-            accept_rate = (row['accepted'] / row['total'] * 100) if row['total'] > 0 else 0
-            results.append({
-                "name": row['ab_test_bucket'],
-                "count": int(row['total']),
-                "accept_rate": round(accept_rate, 1),
-                "avg_latency": int(row['avg_latency']) if row['avg_latency'] else 0
-            })
-        
-        return results
-    except:
-        return []
+    rows = conn.execute("""
+        SELECT 
+            ab_test_bucket,
+            COUNT(*) as total,
+            SUM(CASE WHEN event IN ('accepted', 'edited') THEN 1 ELSE 0 END) as accepted,
+            AVG(latency_ms) as avg_latency
+        FROM coach_events
+        WHERE ab_test_bucket IS NOT NULL
+        GROUP BY ab_test_bucket
+    """).fetchall()
+    
+    results = []
+    for bucket, total, accepted, avg_latency in rows:
+        accept_rate = (accepted / total * 100) if total > 0 else 0
+        results.append({
+            "name": bucket,
+            "count": total,
+            "accept_rate": round(accept_rate, 1),
+            "avg_latency": int(avg_latency) if avg_latency else 0
+        })
+    
+    return results
 
 
 def generate_report(output_dir: str = None):
@@ -245,14 +278,32 @@ def generate_report(output_dir: str = None):
     # Ensure output directory exists
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
-    # Collect data
-    total_violations = calculate_violations_prevented()
-    accept_rate = calculate_accept_rate()
-    latency = calculate_latency_metrics()
-    policy_breakdown = get_policy_breakdown()
-    event_breakdown = get_event_breakdown()
-    examples = get_example_rewrites(limit=5)
-    ab_test_results = get_ab_test_results()
+    conn = get_db_connection()
+    if _has_events_table(conn):
+        # Per-event counts feed both the KPIs and the event breakdown
+        counts = _event_counts(conn)
+        event_breakdown = get_event_breakdown(counts=counts)
+        
+        # Collect the rest: the independent queries run in parallel on
+        # cursors of one connection
+        with ThreadPoolExecutor(max_workers=REPORT_WORKERS) as executor:
+            kpis_future = executor.submit(_on_cursor, conn, _collect_kpis, counts=counts)
+            policy_future = executor.submit(_on_cursor, conn, get_policy_breakdown)
+            examples_future = executor.submit(_on_cursor, conn, get_example_rewrites, limit=5)
+            ab_test_future = executor.submit(_on_cursor, conn, get_ab_test_results)
+        
+        kpis = kpis_future.result()
+        policy_breakdown = policy_future.result()
+        examples = examples_future.result()
+        ab_test_results = ab_test_future.result()
+    else:
+        print("⚠️  No coach_events table yet - generating an empty report")
+        kpis = _EMPTY_KPIS
+        policy_breakdown, event_breakdown, examples, ab_test_results = [], [], [], []
+    
+    total_violations = calculate_violations_prevented(kpis)
+    accept_rate = calculate_accept_rate(kpis)
+    latency = calculate_latency_metrics(kpis)
     
     # Prepare template data
     template_data = {
@@ -270,10 +321,8 @@ def generate_report(output_dir: str = None):
         "ab_test_results": ab_test_results
     }
     
-    # Load and render template
-    template_dir = Path(__file__).parent / "templates"
-    env = Environment(loader=FileSystemLoader(str(template_dir)))
-    template = env.get_template("report.html.j2")
+    # Render template (compiled on first use only)
+    template = _JINJA_ENV.get_template("report.html.j2")
     
     html_content = template.render(**template_data)
     
@@ -0,0 +1,157 @@
+"""
+Archive old coach events to day-partitioned Parquet files.
+
+Moves events older than --days (default 30) out of the live coach_events
+table into EVENTS_ARCHIVE_DIR/day=YYYY-MM-DD/*.parquet. This keeps the
+table, and every analytics scan over it, bounded to recent data, while
+archived days stay queryable:
+
+    SELECT * FROM read_parquet('data/events_archive/*/*.parquet', hive_partitioning = true)
+
+With --snapshot, also writes the remaining events (the columns the weekly
+report uses) to one ZSTD-compressed Parquet file, REPORT_EVENTS_PARQUET
+(default ./data/coach_events.parquet). Reports read that file instead of
+the database when REPORT_EVENTS_PARQUET is set.
+
+Run it while the API is stopped (e.g. from a nightly job before a
+restart): DuckDB allows only one process to open the database file.
+
+Usage:
+    python scripts/archive_events.py [--days 30] [--snapshot]
+"""
+
+import os
+import sys
+import glob
+from datetime import datetime, timedelta
+
+import duckdb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_PATH = os.getenv("RUNS_DB", "./data/qa_runs.duckdb")
+ARCHIVE_DIR = os.getenv("EVENTS_ARCHIVE_DIR", "./data/events_archive")
+SNAPSHOT_PATH = os.getenv("REPORT_EVENTS_PARQUET") or "./data/coach_events.parquet"
+
+# Columns read by reports/aggregations.py
+SNAPSHOT_COLUMNS = "ts, event, agent_draft, suggestion_used, policy_refs, latency_ms, ab_test_bucket"
+
+
+def archive_events(
+    conn: duckdb.DuckDBPyConnection,
+    days: int = 30,
+    archive_dir: str = ARCHIVE_DIR
+) -> int:
+    """
+    Export events older than `days` days to Parquet and delete them.
+
+    Safe to rerun after a failure between the export and the delete: rows
+    whose id is already in the archive are not exported again, and the
+    delete (against the same fixed cutoff) runs in its own transaction.
+
+    Args:
+        conn: Read-write DuckDB connection
+        days: Keep this many days of events in the live table
+        archive_dir: Root directory of the day-partitioned archive
+
+    Returns:
+        Number of events archived
+    """
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    old_events = f"FROM coach_events WHERE ts < TIMESTAMP '{cutoff}'"
+
+    count, first_day = conn.execute(f"SELECT COUNT(*), MIN(CAST(ts AS DATE)) {old_events}").fetchone()
+    if count == 0:
+        return 0
+
+    os.makedirs(archive_dir, exist_ok=True)
+    to_export = old_events
+    if glob.glob(os.path.join(archive_dir, "day=*", "*.parquet")):
+        # Skip rows an interrupted earlier run already wrote (reads only the
+        # id column of the day partitions this run touches)
+        to_export += f"""
+            AND NOT EXISTS (
+                SELECT 1
+                FROM read_parquet('{archive_dir}/*/*.parquet', hive_partitioning = true) AS archived
+                WHERE archived.day >= DATE '{first_day}' AND archived.id = coach_events.id
+            )
+        """
+    conn.execute(f"""
+        COPY (SELECT *, CAST(ts AS DATE) AS day {to_export} ORDER BY ts)
+        TO '{archive_dir}' (FORMAT parquet, PARTITION_BY (day), APPEND)
+    """)
+
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(f"DELETE {old_events}")
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("CHECKPOINT")
+
+    return count
+
+
+def snapshot_events(conn: duckdb.DuckDBPyConnection, path: str = SNAPSHOT_PATH) -> int:
+    """
+    Write the live coach_events table to a Parquet file for reporting.
+
+    Written to a temporary file and renamed into place, so a report
+    never reads a half-written snapshot.
+
+    Args:
+        conn: DuckDB connection
+        path: Destination Parquet file (replaced if it exists)
+
+    Returns:
+        Number of events in the snapshot
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    conn.execute(f"""
+        COPY (SELECT {SNAPSHOT_COLUMNS} FROM coach_events ORDER BY ts)
+        TO '{tmp_path}' (FORMAT parquet, COMPRESSION zstd)
+    """)
+    os.replace(tmp_path, path)
+
+    return conn.execute(f"SELECT COUNT(*) FROM read_parquet('{path}')").fetchone()[0]
+
+
+def main():
+    """Run the archive job."""
+    days = 30
+    snapshot = "--snapshot" in sys.argv
+    if "--days" in sys.argv:
+        idx = sys.argv.index("--days")
+        if idx + 1 < len(sys.argv):
+            days = int(sys.argv[idx + 1])
+
+    if not os.path.exists(DB_PATH):
+        print(f"❌ Database not found: {DB_PATH}")
+        return
+
+    print(f"📦 Archiving events older than {days} days from {DB_PATH}...")
+    conn = duckdb.connect(DB_PATH)
+    try:
+        count = archive_events(conn, days=days)
+        if snapshot:
+            snapshot_count = snapshot_events(conn)
+    finally:
+        conn.close()
+
+    if count:
+        print(f"✓ Archived {count} events to {ARCHIVE_DIR}")
+    else:
+        print("✓ Nothing to archive")
+
+    if snapshot:
+        print(f"✓ Wrote {snapshot_count} events to {SNAPSHOT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,45 @@
 Demo script for QA Coach.
 
 Demonstrates the system with example API calls and showcases key features.
+The suggestion demos run concurrently over one keep-alive client; each
+writes to its own buffer, printed in order once all have finished.
 """
 
-import requests
+import io
+import os
 import json
 import time
+import asyncio
 from typing import Dict, Any
 
+import httpx
+
 
 API_BASE_URL = "http://localhost:8000"
 
+# The API buffers logged events and writes them every EVENT_FLUSH_INTERVAL_MS;
+# event stats wait this long (plus a margin) to include the demo's own events
+EVENT_FLUSH_WAIT_S = int(os.getenv("EVENT_FLUSH_INTERVAL_MS", "200")) / 1000 + 0.3
+
 
-def print_section(title: str):
+def print_section(title: str, out=None):
     """Print a formatted section header."""
-    print("\n" + "=" * 70)
-    print(f"  {title}")
-    print("=" * 70 + "\n")
+    print("\n" + "=" * 70, file=out)
+    print(f"  {title}", file=out)
+    print("=" * 70 + "\n", file=out)
 
 
-def print_response(response: Dict[Any, Any]):
+def print_response(response: Dict[Any, Any], out=None):
     """Pretty print a response."""
-    print(json.dumps(response, indent=2))
+    print(json.dumps(response, indent=2), file=out)
 
 
-def demo_health_check():
+async def demo_health_check(client: httpx.AsyncClient):
     """Demo: Health check endpoint."""
     print_section("1. Health Check")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
+        response = await client.get("/health", timeout=5)
         print(f"Status: {response.status_code}")
         print_response(response.json())
         return True
@@ -40,9 +50,9 @@ def demo_health_check():
         return False
 
 
-def demo_guaranteed_returns():
+async def demo_guaranteed_returns(client: httpx.AsyncClient, out: io.StringIO):
     """Demo: Guaranteed returns violation."""
-    print_section("2. Guaranteed Returns Violation (ADV-6.2)")
+    print_section("2. Guaranteed Returns Violation (ADV-6.2)", out)
     
     payload = {
         "session_id": "demo-session-1",
@@ -53,54 +63,50 @@ def demo_guaranteed_returns():
         "required_disclosures": ["Investments may lose value."]
     }
     
-    print("📤 Request:")
-    print(f"  Draft: \"{payload['agent_draft']}\"")
-    print(f"  Policy: {payload['policy_hits']}")
-    print()
+    print("📤 Request:", file=out)
+    print(f"  Draft: \"{payload['agent_draft']}\"", file=out)
+    print(f"  Policy: {payload['policy_hits']}", file=out)
+    print(file=out)
     
     try:
         start = time.time()
-        response = requests.post(
-            f"{API_BASE_URL}/coach/suggest",
-            json=payload,
-            timeout=10
-        )
+        response = await client.post("/coach/suggest", json=payload)
         latency = int((time.time() - start) * 1000)
         
-        print(f"⏱️  Latency: {latency}ms")
-        print()
+        print(f"⏱️  Latency: {latency}ms", file=out)
+        print(file=out)
         
         if response.status_code == 200:
             data = response.json()
-            print("✅ Suggestion:")
-            print(f"  {data['suggestion']}")
-            print()
-            print("🔄 Alternates:")
+            print("✅ Suggestion:", file=out)
+            print(f"  {data['suggestion']}", file=out)
+            print(file=out)
+            print("🔄 Alternates:", file=out)
             for i, alt in enumerate(data.get('alternates', []), 1):
-                print(f"  {i}. {alt}")
-            print()
-            print(f"📊 Confidence: {data['confidence']:.0%}")
-            print(f"📝 Rationale: {data['rationale']}")
-            print(f"🏷️  Policies: {', '.join(data['policy_refs'])}")
+                print(f"  {i}. {alt}", file=out)
+            print(file=out)
+            print(f"📊 Confidence: {data['confidence']:.0%}", file=out)
+            print(f"📝 Rationale: {data['rationale']}", file=out)
+            print(f"🏷️  Policies: {', '.join(data['policy_refs'])}", file=out)
             
             # Log event
-            log_event("offered", payload["session_id"], payload["agent_draft"], 
-                     data["suggestion"], data["policy_refs"], latency)
+            await log_event(client, "offered", payload["session_id"], payload["agent_draft"],
+                            data["suggestion"], data["policy_refs"], latency)
             
             return True
         else:
-            print(f"❌ Error: {response.status_code}")
-            print_response(response.json())
+            print(f"❌ Error: {response.status_code}", file=out)
+            print_response(response.json(), out)
             return False
     
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
         return False
 
 
-def demo_pii_detection():
+async def demo_pii_detection(client: httpx.AsyncClient, out: io.StringIO):
     """Demo: PII detection and blocking."""
-    print_section("3. PII Detection (PII-SSN)")
+    print_section("3. PII Detection (PII-SSN)", out)
     
     payload = {
         "session_id": "demo-session-2",
@@ -109,34 +115,30 @@ def demo_pii_detection():
         "brand_tone": "professional, clear, empathetic"
     }
     
-    print("📤 Request:")
-    print(f"  Draft: \"{payload['agent_draft']}\"")
-    print()
+    print("📤 Request:", file=out)
+    print(f"  Draft: \"{payload['agent_draft']}\"", file=out)
+    print(file=out)
     
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/coach/suggest",
-            json=payload,
-            timeout=10
-        )
+        response = await client.post("/coach/suggest", json=payload)
         
         if response.status_code == 200:
             data = response.json()
-            print("🛡️  PII Detected - Safe Template Used:")
-            print(f"  {data['suggestion']}")
-            print()
-            print(f"📝 Rationale: {data['rationale']}")
-            print(f"🏷️  Policies: {', '.join(data['policy_refs'])}")
+            print("🛡️  PII Detected - Safe Template Used:", file=out)
+            print(f"  {data['suggestion']}", file=out)
+            print(file=out)
+            print(f"📝 Rationale: {data['rationale']}", file=out)
+            print(f"🏷️  Policies: {', '.join(data['policy_refs'])}", file=out)
             return True
     
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
         return False
 
 
-def demo_inappropriate_tone():
+async def demo_inappropriate_tone(client: httpx.AsyncClient, out: io.StringIO):
     """Demo: Inappropriate tone detection."""
-    print_section("4. Inappropriate Tone (TONE)")
+    print_section("4. Inappropriate Tone (TONE)", out)
     
     payload = {
         "session_id": "demo-session-3",
@@ -145,35 +147,31 @@ def demo_inappropriate_tone():
         "brand_tone": "professional, clear, empathetic"
     }
     
-    print("📤 Request:")
-    print(f"  Draft: \"{payload['agent_draft']}\"")
-    print()
+    print("📤 Request:", file=out)
+    print(f"  Draft: \"{payload['agent_draft']}\"", file=out)
+    print(file=out)
     
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/coach/suggest",
-            json=payload,
-            timeout=10
-        )
+        response = await client.post("/coach/suggest", json=payload)
         
         if response.status_code == 200:
             data = response.json()
-            print("✅ Professional Rewrite:")
-            print(f"  {data['suggestion']}")
-            print()
-            print("🔄 Alternates:")
+            print("✅ Professional Rewrite:", file=out)
+            print(f"  {data['suggestion']}", file=out)
+            print(file=out)
+            print("🔄 Alternates:", file=out)
             for i, alt in enumerate(data.get('alternates', []), 1):
-                print(f"  {i}. {alt}")
+                print(f"  {i}. {alt}", file=out)
             return True
     
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
         return False
 
 
-def demo_clean_text():
+async def demo_clean_text(client: httpx.AsyncClient, out: io.StringIO):
     """Demo: Clean text (no violations)."""
-    print_section("5. Clean Text (No Violations)")
+    print_section("5. Clean Text (No Violations)", out)
     
     payload = {
         "session_id": "demo-session-4",
@@ -182,32 +180,28 @@ def demo_clean_text():
         "brand_tone": "professional, clear, empathetic"
     }
     
-    print("📤 Request:")
-    print(f"  Draft: \"{payload['agent_draft']}\"")
-    print()
+    print("📤 Request:", file=out)
+    print(f"  Draft: \"{payload['agent_draft']}\"", file=out)
+    print(file=out)
     
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/coach/suggest",
-            json=payload,
-            timeout=10
-        )
+        response = await client.post("/coach/suggest", json=payload)
         
         if response.status_code == 200:
             data = response.json()
-            print("✅ Minimal Changes:")
-            print(f"  {data['suggestion']}")
-            print()
-            print(f"📊 Confidence: {data['confidence']:.0%}")
+            print("✅ Minimal Changes:", file=out)
+            print(f"  {data['suggestion']}", file=out)
+            print(file=out)
+            print(f"📊 Confidence: {data['confidence']:.0%}", file=out)
             return True
     
     except Exception as e:
-        print(f"❌ Error: {e}")
+        print(f"❌ Error: {e}", file=out)
         return False
 
 
-def log_event(event_type: str, session_id: str, draft: str, 
-              suggestion: str, policy_refs: list, latency: int):
+async def log_event(client: httpx.AsyncClient, event_type: str, session_id: str,
+                    draft: str, suggestion: str, policy_refs: list, latency: int):
     """Log an event to the system."""
     try:
         payload = {
@@ -220,17 +214,17 @@ def log_event(event_type: str, session_id: str, draft: str,
             "ab_test_bucket": "on"
         }
         
-        requests.post(f"{API_BASE_URL}/events/coach", json=payload, timeout=5)
+        await client.post("/events/coach", json=payload, timeout=5)
     except:
         pass  # Silent fail for demo
 
 
-def demo_event_stats():
+async def demo_event_stats(client: httpx.AsyncClient):
     """Demo: Event statistics."""
     print_section("6. Event Statistics")
     
     try:
-        response = requests.get(f"{API_BASE_URL}/events/stats", timeout=5)
+        response = await client.get("/events/stats", timeout=5)
         
         if response.status_code == 200:
             data = response.json()
@@ -246,6 +240,38 @@ def demo_event_stats():
         return False
 
 
+async def run_demos() -> bool:
+    """Run the demos over one shared client; False if the API isn't up."""
+    async with httpx.AsyncClient(base_url=API_BASE_URL, timeout=10) as client:
+        # Health check first
+        if not await demo_health_check(client):
+            return False
+        
+        # Suggestion demos run concurrently, each into its own buffer
+        demos = [
+            demo_guaranteed_returns,
+            demo_pii_detection,
+            demo_inappropriate_tone,
+            demo_clean_text
+        ]
+        outputs = [io.StringIO() for _ in demos]
+        results = await asyncio.gather(
+            *(demo(client, out) for demo, out in zip(demos, outputs, strict=True)),
+            return_exceptions=True
+        )
+        
+        for out, result in zip(outputs, results, strict=True):
+            print(out.getvalue(), end="")
+            if isinstance(result, Exception):
+                print(f"\n❌ Demo error: {result}")
+        
+        # Stats last, once the API has flushed the events logged above
+        await asyncio.sleep(EVENT_FLUSH_WAIT_S)
+        await demo_event_stats(client)
+    
+    return True
+
+
 def main():
     """Run the demo."""
     print("\n" + "🎯" * 35)
@@ -253,33 +279,19 @@ def main():
     print("  Conversational Compliance Coaching in Action")
     print("🎯" * 35)
     
-    # Health check first
-    if not demo_health_check():
+    try:
+        api_up = asyncio.run(run_demos())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Demo interrupted by user")
+        return
+    
+    if not api_up:
         print("\n❌ API server not responding. Please start it with:")
         print("   make api")
         print("   or")
         print("   uvicorn app.api:app --reload --port 8000")
         return
     
-    # Run demos
-    demos = [
-        demo_guaranteed_returns,
-        demo_pii_detection,
-        demo_inappropriate_tone,
-        demo_clean_text,
-        demo_event_stats
-    ]
-    
-    for demo in demos:
-        time.sleep(1)  # Brief pause between demos
-        try:
-            demo()
-        except KeyboardInterrupt:
-            print("\n\n⚠️  Demo interrupted by user")
-            break
-        except Exception as e:
-            print(f"\n❌ Demo error: {e}")
-    
     # Summary
     print_section("Demo Complete!")
     print("✓ Demonstrated key features:")
@@ -9,7 +9,6 @@ This script shows:
 """
 
 import os
-import json
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -153,7 +152,7 @@ def demo_event_logging(response, agent_draft, eval_result):
         "session_id": "demo_session",
         "agent_draft": agent_draft,
         "suggestion_used": response.suggestion,
-        "policy_refs": json.dumps(response.policy_refs),
+        "policy_refs": response.policy_refs,
         "latency_ms": response.latency_ms,
         "ab_test_bucket": "on"
     }
@@ -239,14 +238,13 @@ def demo_analytics():
     top_policies = conn.execute("""
         SELECT policy_refs, COUNT(*) as count
         FROM coach_events
-        WHERE policy_refs IS NOT NULL AND policy_refs != '[]'
+        WHERE len(policy_refs) > 0
         GROUP BY policy_refs
         ORDER BY count DESC
         LIMIT 5
     """).fetchall()
     
-    for i, (policy, count) in enumerate(top_policies, 1):
-        policies = json.loads(policy)
+    for i, (policies, count) in enumerate(top_policies, 1):
         if policies:
             print(f"   {i}. {', '.join(policies)}: {count} occurrences")
     
@@ -215,7 +215,7 @@ def load_test_cases_from_db(limit: int = 50) -> List[Dict]:
     
     test_cases = []
     for row in rows:
-        policy_refs = json.loads(row[3]) if row[3] else []
+        policy_refs = row[3] or []
         test_cases.append({
             "id": row[0],
             "agent_draft": row[1],
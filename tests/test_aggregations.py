@@ -0,0 +1,210 @@
+"""
+Tests for report aggregations.
+"""
+
+from pathlib import Path
+
+import duckdb
+import pytest
+from reports import aggregations
+from reports.aggregations import (
+    _collect_kpis,
+    _event_counts,
+    calculate_accept_rate,
+    calculate_latency_metrics,
+    calculate_violations_prevented,
+    generate_report,
+    get_ab_test_results,
+    get_db_connection,
+    get_event_breakdown,
+    get_example_rewrites,
+    get_policy_breakdown,
+)
+
+
+@pytest.fixture
+def events_conn():
+    """In-memory coach_events table with a few known events."""
+    conn = duckdb.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE coach_events (
+            id VARCHAR DEFAULT uuid()::VARCHAR,
+            ts TIMESTAMP DEFAULT current_timestamp,
+            event VARCHAR,
+            session_id VARCHAR,
+            agent_draft TEXT,
+            suggestion_used TEXT,
+            policy_refs VARCHAR[],
+            latency_ms INTEGER,
+            ab_test_bucket VARCHAR
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO coach_events (event, latency_ms) VALUES (?, ?)",
+        # 101 offers with latencies 1..101, so percentiles land on whole values
+        [("offered", ms) for ms in range(1, 102)]
+        + [("accepted", 0)] * 40 + [("edited", 0)] * 10 + [("dismissed", 0)] * 5
+    )
+    yield conn
+    conn.close()
+
+
+class TestKpis:
+    """Tests for the headline KPI queries."""
+    
+    def test_kpis_match_helpers(self, events_conn):
+        """Test that the KPI helpers derive the expected values from one query."""
+        kpis = _collect_kpis(events_conn)
+        
+        assert calculate_violations_prevented(kpis) == 101
+        assert calculate_accept_rate(kpis) == 49.5
+        assert calculate_latency_metrics(kpis) == {"avg": 51, "p95": 96, "p99": 100}
+    
+    def test_no_events_gives_zero_kpis(self):
+        """Test that an empty coach_events table reports zeros."""
+        conn = duckdb.connect(":memory:")
+        conn.execute("CREATE TABLE coach_events (event VARCHAR, latency_ms INTEGER)")
+        kpis = _collect_kpis(conn)
+        
+        assert calculate_violations_prevented(kpis) == 0
+        assert calculate_accept_rate(kpis) == 0.0
+        assert calculate_latency_metrics(kpis) == {"avg": 0, "p95": 0, "p99": 0}
+    
+    def test_missing_table_raises(self):
+        """Test that query errors propagate instead of reading as zeros."""
+        with pytest.raises(duckdb.CatalogException):
+            _collect_kpis(duckdb.connect(":memory:"))
+
+
+class TestPolicyBreakdown:
+    """Tests for the per-policy violation breakdown."""
+    
+    def test_counts_ranked_with_percentages(self, events_conn):
+        """Test that policies are exploded, counted and ranked in SQL."""
+        events_conn.executemany(
+            "INSERT INTO coach_events (event, policy_refs) VALUES ('offered', ?)",
+            [[["PII-SSN", "DISC-1.1"]], [["DISC-1.1"]], [["DISC-1.1", "TONE"]], [[]]]
+        )
+        
+        assert get_policy_breakdown(events_conn) == [
+            {"policy_id": "DISC-1.1", "count": 3, "percentage": 60.0},
+            {"policy_id": "PII-SSN", "count": 1, "percentage": 20.0},
+            {"policy_id": "TONE", "count": 1, "percentage": 20.0},
+        ]
+    
+    def test_no_policy_refs(self, events_conn):
+        """Test that events without policy refs give an empty breakdown."""
+        assert get_policy_breakdown(events_conn) == []
+
+
+class TestEventBreakdown:
+    """Tests for the per-event and A/B breakdowns."""
+    
+    def test_event_counts_sorted(self, events_conn):
+        """Test that event types are counted and ordered most frequent first."""
+        breakdown = get_event_breakdown(events_conn)
+        
+        assert [row["event_type"] for row in breakdown] == ["offered", "accepted", "edited", "dismissed"]
+        assert breakdown[0] == {"event_type": "offered", "count": 101, "percentage": 64.7}
+    
+    def test_breakdown_from_precomputed_counts(self, events_conn):
+        """Test that counts shared with the KPIs give the same breakdown without a query."""
+        counts = _event_counts(events_conn)
+        
+        assert counts == {"offered": 101, "accepted": 40, "edited": 10, "dismissed": 5}
+        assert get_event_breakdown(counts=counts) == get_event_breakdown(events_conn)
+        assert _collect_kpis(events_conn, counts=counts) == _collect_kpis(events_conn)
+    
+    def test_ab_test_buckets(self, events_conn):
+        """Test accept rate and latency per A/B bucket."""
+        events_conn.execute("""
+            INSERT INTO coach_events (event, latency_ms, ab_test_bucket) VALUES
+                ('offered', 100, 'A'), ('accepted', 300, 'A'), ('offered', 50, 'B')
+        """)
+        
+        assert sorted(get_ab_test_results(events_conn), key=lambda r: r["name"]) == [
+            {"name": "A", "count": 2, "accept_rate": 50.0, "avg_latency": 200},
+            {"name": "B", "count": 1, "accept_rate": 0.0, "avg_latency": 50},
+        ]
+
+
+class TestExampleRewrites:
+    """Tests for before/after example rewrites."""
+    
+    def test_truncation_and_severity(self, events_conn):
+        """Test that long suggestions are cut to 100 chars and severity follows the first policy."""
+        events_conn.execute(
+            "INSERT INTO coach_events (event, agent_draft, suggestion_used, policy_refs) VALUES (?, ?, ?, ?)",
+            ["accepted", "My SSN is 123-45-6789", "x" * 120, ["PII-SSN", "TONE", "DISC-1.1"]]
+        )
+        
+        assert get_example_rewrites(conn=events_conn) == [{
+            "before": "My SSN is 123-45-6789",
+            "after": "x" * 100 + "...",
+            "policy": "PII-SSN, TONE",
+            "severity": "critical"
+        }]
+
+
+class TestConnection:
+    """Tests for connection reuse."""
+    
+    def test_connection_is_shared(self, monkeypatch):
+        """Test that every helper gets the same cached connection."""
+        monkeypatch.setattr(aggregations, "DB_PATH", ":memory:")
+        get_db_connection.cache_clear()
+        try:
+            assert get_db_connection() is get_db_connection()
+        finally:
+            get_db_connection.cache_clear()
+    
+    def test_reads_parquet_snapshot(self, events_conn, tmp_path, monkeypatch):
+        """Test that a configured snapshot is queried in place of the database."""
+        from scripts.archive_events import snapshot_events
+        
+        path = str(tmp_path / "coach_events.parquet")
+        assert snapshot_events(events_conn, path) == 156
+        
+        monkeypatch.setattr(aggregations, "EVENTS_PARQUET", path)
+        get_db_connection.cache_clear()
+        try:
+            assert _event_counts(get_db_connection()) == _event_counts(events_conn)
+        finally:
+            get_db_connection.cache_clear()
+    
+    def test_helpers_use_given_connection(self, events_conn):
+        """Test that a passed-in connection is queried instead of the shared one."""
+        breakdown = get_event_breakdown(events_conn)
+        
+        assert {row["event_type"]: row["count"] for row in breakdown} == {
+            "offered": 101, "accepted": 40, "edited": 10, "dismissed": 5
+        }
+
+
+class TestGenerateReport:
+    """Tests for end-to-end report generation."""
+    
+    def test_report_renders_collected_metrics(self, events_conn, tmp_path, monkeypatch):
+        """Test that the concurrently collected metrics end up in the HTML."""
+        monkeypatch.setattr(aggregations, "get_db_connection", lambda: events_conn)
+        
+        report_path = generate_report(output_dir=str(tmp_path))
+        
+        html = Path(report_path).read_text(encoding="utf-8")
+        assert "49.5" in html  # accept rate
+        assert "offered" in html
+    
+    def test_template_compiled_once(self):
+        """Test that repeated reports reuse the compiled template."""
+        template = aggregations._JINJA_ENV.get_template("report.html.j2")
+        
+        assert aggregations._JINJA_ENV.get_template("report.html.j2") is template
+    
+    def test_missing_table_gives_empty_report(self, tmp_path, monkeypatch):
+        """Test that a database without coach_events still renders a zeroed report."""
+        conn = duckdb.connect(":memory:")
+        monkeypatch.setattr(aggregations, "get_db_connection", lambda: conn)
+        
+        report_path = generate_report(output_dir=str(tmp_path))
+        
+        assert Path(report_path).exists()
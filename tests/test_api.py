@@ -0,0 +1,416 @@
+"""
+Tests for the FastAPI event logging and analytics endpoints.
+"""
+
+import json
+import uuid
+import threading
+
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api
+from app.coach import SuggestionResponse
+from app.evals.judge import JudgeResponse
+
+
+@pytest.fixture
+def client():
+    """Create a test client with an initialized in-memory database."""
+    api.suggest_cache.clear()
+    with TestClient(api.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def fake_suggest(monkeypatch):
+    """Replace the LLM-backed suggest_async() with a stub that records calls."""
+    calls = []
+    
+    async def _suggest(agent_draft, **kwargs):
+        calls.append(agent_draft)
+        return SuggestionResponse(
+            suggestion=f"Rewritten: {agent_draft}",
+            alternates=["Alt 1", "Alt 2"],
+            rationale="Stub rewrite",
+            policy_refs=["ADV-6.2"],
+            confidence=0.9,
+            evidence_spans=[(0, 5)],
+            latency_ms=1
+        )
+    
+    monkeypatch.setattr(api, "suggest_async", _suggest)
+    return calls
+
+
+def make_event(event="offered", latency_ms=100, policy_refs=None):
+    """Build a /events/coach request body."""
+    return {
+        "event": event,
+        "session_id": "test-session",
+        "agent_draft": "We guarantee returns",
+        "suggestion_used": "Returns may vary.",
+        "policy_refs": policy_refs if policy_refs is not None else ["ADV-6.2"],
+        "latency_ms": latency_ms,
+    }
+
+
+class TestEventLogging:
+    """Tests for buffered event logging."""
+    
+    def test_log_event_returns_id(self, client):
+        """Test that logging an event returns an event id immediately."""
+        response = client.post("/events/coach", json=make_event())
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ok"] is True
+        assert data["event_id"]
+    
+    def test_invalid_body_rejected(self, client):
+        """Test that missing and unknown fields return 422."""
+        missing = client.post("/events/coach", json={"event": "offered"})
+        unknown = client.post("/events/coach", json={**make_event(), "extra": 1})
+        
+        assert missing.status_code == 422
+        assert unknown.status_code == 422
+        assert unknown.json()["detail"][0]["type"] == "extra_forbidden"
+    
+    def test_request_schema_in_openapi(self, client):
+        """Test that raw-body endpoints still document their request schema."""
+        spec = client.get("/openapi.json").json()
+        body = spec["paths"]["/events/coach"]["post"]["requestBody"]
+        
+        assert "session_id" in body["content"]["application/json"]["schema"]["properties"]
+    
+    def test_event_ids_are_time_ordered_uuids(self):
+        """Test that event ids are valid v7 UUIDs that sort by time."""
+        first = api._new_event_id(1_700_000_000_000_000_000)
+        second = api._new_event_id(1_700_000_000_001_000_000)
+        
+        assert uuid.UUID(first).version == 7
+        assert first < second
+    
+    def test_id_and_ts_default_in_database(self, client):
+        """Test that writers outside the API can omit id and ts."""
+        api.db_conn.execute("""
+            INSERT INTO coach_events (event, session_id, agent_draft, latency_ms)
+            VALUES ('offered', 's', 'd', 10)
+        """)
+        row = api.db_conn.execute("SELECT id, ts FROM coach_events").fetchone()
+        
+        assert uuid.UUID(row[0])
+        assert row[1] is not None
+    
+    def test_buffered_events_are_flushed(self, client):
+        """Test that buffered events are written to the database on flush."""
+        for event in ["offered", "accepted", "offered"]:
+            client.post("/events/coach", json=make_event(event=event))
+        
+        api.flush_events()
+        stats = client.get("/events/stats").json()
+        
+        assert stats["total_events"] == 3
+        assert stats["event_counts"] == {"offered": 2, "accepted": 1}
+    
+    def test_bulk_endpoint_logs_events_in_order(self, client):
+        """Test that /events/bulk buffers every event and returns one id per event."""
+        events = [make_event(event=event) for event in ["offered", "accepted", "rejected"]]
+        response = client.post("/events/bulk", json={"events": events})
+        
+        assert response.status_code == 200
+        event_ids = response.json()["event_ids"]
+        assert len(event_ids) == 3
+        assert len(set(event_ids)) == 3
+        
+        api.flush_events()
+        stats = client.get("/events/stats").json()
+        assert stats["event_counts"] == {"offered": 1, "accepted": 1, "rejected": 1}
+    
+    def test_large_batch_is_bulk_loaded(self, client):
+        """Test that batches above the bulk-load threshold are written."""
+        count = api.BULK_LOAD_MIN_ROWS * 3
+        for _ in range(count):
+            client.post("/events/coach", json=make_event())
+        
+        api.flush_events()
+        assert client.get("/events/stats").json()["total_events"] == count
+
+
+class TestProviderStatus:
+    """Tests for /providers/status."""
+    
+    def test_status_is_cached(self, client, monkeypatch):
+        """Test that provider status is computed once within the TTL."""
+        api._provider_status_cache.clear()
+        calls = []
+        
+        class FakeManager:
+            def get_provider_status(self):
+                calls.append(1)
+                return {"primary": "groq", "fallbacks": [], "providers": {"groq": "available"}}
+        monkeypatch.setattr(api, "get_provider_manager", lambda: FakeManager())
+        
+        first = client.get("/providers/status").json()
+        second = client.get("/providers/status").json()
+        
+        assert first == second
+        assert len(calls) == 1
+        api._provider_status_cache.clear()
+    
+    def test_status_computed_off_event_loop(self, client, monkeypatch):
+        """Test that a cache miss builds providers in a worker thread, not on the event loop."""
+        api._provider_status_cache.clear()
+        threads = []
+        
+        class FakeManager:
+            def get_provider_status(self):
+                return {}
+        
+        def fake_get_manager():
+            threads.append(threading.current_thread().name)
+            return FakeManager()
+        monkeypatch.setattr(api, "get_provider_manager", fake_get_manager)
+        
+        client.get("/providers/status")
+        
+        assert threads and threads[0].startswith("AnyIO worker thread")
+        api._provider_status_cache.clear()
+        threads = []
+        
+        def fake_manager():
+            threads.append(threading.current_thread())
+            return type("FakeManager", (), {"get_provider_status": lambda self: {}})()
+        monkeypatch.setattr(api, "get_provider_manager", fake_manager)
+        
+        loop_thread = []
+        
+        @api.app.get("/_test/loop_thread")
+        async def _loop_thread():
+            loop_thread.append(threading.current_thread())
+        
+        client.get("/_test/loop_thread")
+        client.get("/providers/status")
+        
+        assert threads and threads[0] is not loop_thread[0]
+        api._provider_status_cache.clear()
+
+
+class TestSuggestCache:
+    """Tests for the /coach/suggest response cache."""
+    
+    def test_repeated_request_is_cached(self, client, fake_suggest):
+        """Test that an identical request is served without calling suggest()."""
+        body = {"session_id": "s1", "agent_draft": "We guarantee returns"}
+        first = client.post("/coach/suggest", json=body)
+        second = client.post("/coach/suggest", json={**body, "session_id": "s2"})
+        
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json() == first.json()
+        assert fake_suggest == ["We guarantee returns"]
+    
+    def test_semantic_hit_recomputes_spans(self, client, fake_suggest, monkeypatch):
+        """Test that a near-duplicate draft is served from the semantic cache."""
+        encoder = type("Encoder", (), {"encode": lambda self, text: [1.0, 0.0, 0.0]})()
+        monkeypatch.setattr(api, "semantic_cache", api.SemanticCache(encoder=encoder, dim=3))
+        api.db_conn.execute("""
+            CREATE TABLE IF NOT EXISTS suggest_cache (
+                scope VARCHAR, embedding FLOAT[3], response JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        client.post("/coach/suggest", json={"session_id": "s", "agent_draft": "We guarantee returns"})
+        response = client.post("/coach/suggest", json={"session_id": "s", "agent_draft": "I guarantee returns"})
+        
+        assert response.headers["X-Cache"] == "SEMANTIC-HIT"
+        assert response.json()["suggestion"] == "Rewritten: We guarantee returns"
+        assert fake_suggest == ["We guarantee returns"]
+        assert api.db_conn.execute("SELECT COUNT(*) FROM suggest_cache").fetchone()[0] == 1
+    
+    def test_draft_whitespace_is_kept(self, client, fake_suggest):
+        """Test that the draft isn't stripped, so evidence spans match the sent text."""
+        client.post("/coach/suggest", json={"session_id": " s ", "agent_draft": "  We guarantee returns\n"})
+        
+        assert fake_suggest == ["  We guarantee returns\n"]
+    
+    def test_different_payload_misses(self, client, fake_suggest):
+        """Test that any change to the payload bypasses the cache."""
+        client.post("/coach/suggest", json={"session_id": "s", "agent_draft": "Draft"})
+        response = client.post("/coach/suggest", json={
+            "session_id": "s", "agent_draft": "Draft", "context": "retirement"
+        })
+        
+        assert response.headers["X-Cache"] == "MISS"
+        assert len(fake_suggest) == 2
+
+
+class TestSuggestAndJudge:
+    """Tests for the combined /coach/suggest_and_judge endpoint."""
+    
+    def test_judges_suggestion_and_alternates(self, client, fake_suggest, monkeypatch):
+        """Test that the primary suggestion and alternates are all judged."""
+        judged = []
+        
+        def fake_evaluate(suggestion, **kwargs):
+            judged.append(suggestion)
+            return JudgeResponse(
+                overall_score=8.0, compliance_score=8.0, clarity_score=8.0,
+                tone_score=8.0, completeness_score=8.0, feedback="ok",
+                strengths=[], weaknesses=[], pass_threshold=True
+            )
+        monkeypatch.setattr(api, "evaluate_suggestion", fake_evaluate)
+        
+        response = client.post("/coach/suggest_and_judge", json={
+            "session_id": "s", "agent_draft": "We guarantee returns", "judge_alternates": True
+        })
+        data = response.json()
+        
+        assert response.status_code == 200
+        assert data["suggestion"]["suggestion"] == "Rewritten: We guarantee returns"
+        assert data["evaluation"]["overall_score"] == 8.0
+        assert len(data["alternate_evaluations"]) == 2
+        assert sorted(judged) == ["Alt 1", "Alt 2", "Rewritten: We guarantee returns"]
+
+
+class TestSuggestStream:
+    """Tests for the /coach/suggest/stream SSE endpoint."""
+    
+    def test_streams_deltas_then_final_frame(self, client, monkeypatch):
+        """Test the SSE frame sequence and that the result is cached."""
+        def fake_stream(agent_draft, **kwargs):
+            yield "Returns "
+            yield "may vary."
+            yield SuggestionResponse(
+                suggestion="Returns may vary.", alternates=["A", "B"], rationale="r",
+                policy_refs=["ADV-6.2"], confidence=0.8, evidence_spans=[(0, 5)], latency_ms=1
+            )
+        monkeypatch.setattr(api, "suggest_stream", fake_stream)
+        body = {"session_id": "s", "agent_draft": "We guarantee returns"}
+        
+        response = client.post("/coach/suggest/stream", json=body)
+        frames = [json.loads(line[len("data: "):]) for line in response.text.split("\n\n") if line]
+        
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert frames[:2] == [{"delta": "Returns "}, {"delta": "may vary."}]
+        assert frames[2]["suggestion"] == "Returns may vary."
+        assert client.post("/coach/suggest", json=body).headers["X-Cache"] == "HIT"
+
+
+class TestAnalytics:
+    """Tests for analytics endpoints."""
+    
+    def test_latency_percentiles(self, client):
+        """Test latency aggregates and percentiles over logged events."""
+        for latency in range(100, 1100, 100):
+            client.post("/events/coach", json=make_event(latency_ms=latency))
+        
+        api.flush_events()
+        data = client.get("/analytics/latency").json()
+        
+        assert data["total_requests"] == 10
+        assert data["min_latency_ms"] == 100
+        assert data["max_latency_ms"] == 1000
+        assert data["avg_latency_ms"] == 550
+        assert data["percentiles"]["p50"] == 550
+        assert 900 <= data["percentiles"]["p95"] <= 1000
+    
+    def test_reads_see_committed_snapshot(self, client):
+        """Test that analytics don't see (or wait on) an uncommitted event batch."""
+        writer = api.get_writer_conn()
+        writer.execute("BEGIN TRANSACTION")
+        writer.execute("""
+            INSERT INTO coach_events (event, session_id, agent_draft, latency_ms)
+            VALUES ('offered', 's', 'd', 10)
+        """)
+        try:
+            assert client.get("/events/stats").json()["total_events"] == 0
+        finally:
+            writer.execute("COMMIT")
+        
+        assert client.get("/events/stats").json()["total_events"] == 1
+    
+    def test_days_window_excludes_old_events(self, client):
+        """Test that ?days= restricts analytics to recent events."""
+        api.db_conn.execute("""
+            INSERT INTO coach_events (ts, event, session_id, agent_draft, policy_refs, latency_ms)
+            VALUES (localtimestamp - INTERVAL 40 DAY, 'rejected', 's', 'd', ['OLD'], 5000)
+        """)
+        client.post("/events/coach", json=make_event(latency_ms=100))
+        api.flush_events()
+        
+        stats = client.get("/events/stats", params={"days": 7}).json()
+        latency = client.get("/analytics/latency", params={"days": 7}).json()
+        policies = client.get("/analytics/policies", params={"days": 7}).json()
+        
+        assert stats["event_counts"] == {"offered": 1}
+        assert latency["max_latency_ms"] == 100
+        assert policies["policy_violations"] == {"ADV-6.2": 1}
+        assert client.get("/events/stats").json()["total_events"] == 2
+    
+    def test_latency_with_no_events(self, client):
+        """Test latency endpoint on an empty table."""
+        data = client.get("/analytics/latency").json()
+        
+        assert data["total_requests"] == 0
+        assert data["percentiles"] == {"p50": 0, "p90": 0, "p95": 0, "p99": 0}
+    
+    def test_policy_violation_counts(self, client):
+        """Test per-policy violation counts across events."""
+        client.post("/events/coach", json=make_event(policy_refs=["ADV-6.2", "TONE"]))
+        client.post("/events/coach", json=make_event(policy_refs=["ADV-6.2"]))
+        client.post("/events/coach", json=make_event(policy_refs=[]))
+        
+        api.flush_events()
+        data = client.get("/analytics/policies").json()
+        
+        assert data["policy_violations"] == {"ADV-6.2": 2, "TONE": 1}
+        assert data["total_policies"] == 2
+        assert data["total_violations"] == 3
+
+
+class TestDatabaseConfig:
+    """Tests for DuckDB connection settings."""
+    
+    def test_threads_and_memory_limit_applied(self, client):
+        """Test that the DuckDB thread and memory caps are set on the connection."""
+        threads = api.db_conn.execute("SELECT current_setting('threads')").fetchone()[0]
+        memory = api.db_conn.execute("SELECT current_setting('memory_limit')").fetchone()[0]
+        
+        assert threads == api.DUCKDB_THREADS
+        assert memory == "488.2 MiB"  # 512MB default, reported in MiB
+
+
+class TestMigrations:
+    """Tests for database schema migrations."""
+    
+    def test_legacy_json_policy_refs_migrated(self, tmp_path, monkeypatch):
+        """Test that JSON-string policy_refs are converted to VARCHAR[]."""
+        db_path = str(tmp_path / "legacy.duckdb")
+        legacy = duckdb.connect(db_path)
+        legacy.execute("""
+            CREATE TABLE coach_events (
+                id VARCHAR PRIMARY KEY, ts TIMESTAMP, event VARCHAR,
+                session_id VARCHAR, agent_draft TEXT, suggestion_used TEXT,
+                policy_refs VARCHAR, latency_ms INTEGER, ab_test_bucket VARCHAR
+            )
+        """)
+        legacy.execute("""
+            INSERT INTO coach_events VALUES
+                ('1', now(), 'offered', 's', 'd', NULL, '["ADV-6.2", "TONE"]', 10, 'on'),
+                ('2', now(), 'offered', 's', 'd', NULL, '[]', 10, 'on')
+        """)
+        legacy.close()
+        
+        monkeypatch.setattr(api, "DB_PATH", db_path)
+        api.init_db()
+        try:
+            rows = api.db_conn.execute(
+                "SELECT id, policy_refs FROM coach_events ORDER BY id"
+            ).fetchall()
+        finally:
+            api.db_conn.close()
+        
+        assert rows == [("1", ["ADV-6.2", "TONE"]), ("2", [])]
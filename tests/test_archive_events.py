@@ -0,0 +1,61 @@
+"""
+Tests for the coach event archive job.
+"""
+
+from datetime import datetime, timedelta
+
+import duckdb
+import pytest
+from scripts.archive_events import archive_events
+
+
+@pytest.fixture
+def events_conn():
+    """coach_events with 3 events from 40 days ago and 1 from today."""
+    conn = duckdb.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE coach_events (
+            id VARCHAR DEFAULT uuid()::VARCHAR PRIMARY KEY,
+            ts TIMESTAMP DEFAULT current_timestamp,
+            event VARCHAR,
+            latency_ms INTEGER
+        )
+    """)
+    old = datetime.now() - timedelta(days=40)
+    conn.executemany(
+        "INSERT INTO coach_events (ts, event, latency_ms) VALUES (?, ?, ?)",
+        [(old, "offered", 100), (old, "accepted", 0), (old, "offered", 200), (datetime.now(), "offered", 50)]
+    )
+    yield conn
+    conn.close()
+
+
+def archived_ids(archive_dir):
+    """Ids of all archived rows (with duplicates)."""
+    rows = duckdb.sql(f"SELECT id FROM read_parquet('{archive_dir}/*/*.parquet', hive_partitioning = true)")
+    return [row[0] for row in rows.fetchall()]
+
+
+class TestArchiveEvents:
+    """Tests for archive_events()."""
+    
+    def test_moves_old_events_to_archive(self, events_conn, tmp_path):
+        """Test that old events are archived and deleted, recent ones kept."""
+        assert archive_events(events_conn, days=30, archive_dir=str(tmp_path)) == 3
+        
+        assert len(archived_ids(tmp_path)) == 3
+        assert events_conn.execute("SELECT COUNT(*) FROM coach_events").fetchone()[0] == 1
+    
+    def test_rerun_after_failed_delete_does_not_duplicate(self, events_conn, tmp_path):
+        """Test that rows exported by an interrupted run aren't appended again."""
+        snapshot = events_conn.execute("SELECT * FROM coach_events").fetchall()
+        archive_events(events_conn, days=30, archive_dir=str(tmp_path))
+        # As if the DELETE never committed: the archived rows are back in the table
+        events_conn.execute("DELETE FROM coach_events")
+        events_conn.executemany("INSERT INTO coach_events VALUES (?, ?, ?, ?)", snapshot)
+        
+        archive_events(events_conn, days=30, archive_dir=str(tmp_path))
+        
+        ids = archived_ids(tmp_path)
+        assert len(ids) == len(set(ids)) == 3
+        assert events_conn.execute("SELECT COUNT(*) FROM coach_events").fetchone()[0] == 1
@@ -0,0 +1,131 @@
+"""
+Tests for the API response caches.
+"""
+
+import numpy as np
+import pytest
+
+from app import cache as cache_module
+from app.cache import TTLCache, SemanticCache, make_cache_key, quantize_int8
+
+
+class TestTTLCache:
+    """Tests for TTLCache."""
+    
+    def test_get_and_set(self):
+        """Test basic storage and hit/miss counting."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        
+        assert cache.get("a") == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_expired_entries_are_dropped(self):
+        """Test that entries past their TTL are not returned."""
+        cache = TTLCache(maxsize=10, ttl=0)
+        cache.set("a", 1)
+        
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_evicts_least_recently_used(self):
+        """Test LRU eviction once maxsize is reached."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_zero_size_disables_cache(self):
+        """Test that maxsize=0 never stores anything."""
+        cache = TTLCache(maxsize=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+    
+    def test_cache_key_is_stable(self):
+        """Test that equal payloads hash to the same key."""
+        assert make_cache_key('{"a": 1}') == make_cache_key('{"a": 1}')
+        assert make_cache_key('{"a": 1}') != make_cache_key('{"a": 2}')
+
+
+class FakeEncoder:
+    """Deterministic encoder mapping known texts to fixed vectors."""
+    
+    VECTORS = {
+        "We guarantee returns": [1.0, 0.0, 0.0],
+        "We guarantee returns!": [0.99, 0.05, 0.0],
+        "Your account is locked": [0.0, 1.0, 0.0],
+    }
+    
+    def encode(self, text):
+        return self.VECTORS[text]
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache, with and without FAISS and int8 storage."""
+    
+    @pytest.fixture(autouse=True, params=[
+        (True, False), (True, True), (False, False), (False, True)
+    ], ids=["faiss", "faiss-int8", "numpy", "numpy-int8"])
+    def backend(self, request, monkeypatch):
+        use_faiss, self.quantize = request.param
+        if not use_faiss:
+            monkeypatch.setattr(cache_module, "faiss", None)
+        elif cache_module.faiss is None:
+            pytest.skip("faiss not installed")
+    
+    def make_cache(self, **kwargs):
+        return SemanticCache(encoder=FakeEncoder(), dim=3, quantize=self.quantize, **kwargs)
+    
+    def test_embeddings_are_normalized(self):
+        """Test that embeddings have unit length."""
+        vector = self.make_cache().embed("We guarantee returns!")
+        assert np.isclose(np.linalg.norm(vector), 1.0)
+    
+    def test_near_duplicate_hits(self):
+        """Test that a similar draft with the same scope reuses the value."""
+        cache = self.make_cache()
+        cache.add(cache.embed("We guarantee returns"), "scope", "cached")
+        
+        assert cache.lookup(cache.embed("We guarantee returns!"), "scope") == "cached"
+        assert cache.hits == 1
+    
+    def test_dissimilar_draft_misses(self):
+        """Test that an unrelated draft does not hit."""
+        cache = self.make_cache()
+        cache.add(cache.embed("We guarantee returns"), "scope", "cached")
+        
+        assert cache.lookup(cache.embed("Your account is locked"), "scope") is None
+    
+    def test_scope_must_match(self):
+        """Test that a similar draft with different request scope misses."""
+        cache = self.make_cache()
+        cache.add(cache.embed("We guarantee returns"), "scope-a", "cached")
+        
+        assert cache.lookup(cache.embed("We guarantee returns"), "scope-b") is None
+    
+    def test_grows_past_initial_capacity(self):
+        """Test that the vector buffer grows as entries are added."""
+        cache = self.make_cache()
+        vector = cache.embed("Your account is locked")
+        for i in range(1500):
+            cache.add(vector, f"scope-{i}", i)
+        
+        assert len(cache) == 1500
+        assert cache.lookup(vector, "scope-0") == 0
+
+
+def test_quantize_int8_round_trip():
+    """Test that int8 codes times scale approximate the original vector."""
+    vector = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    codes, scale = quantize_int8(vector)
+    
+    assert codes.dtype == np.int8
+    assert np.abs(codes).max() == 127
+    assert np.dot(codes * scale, vector) == pytest.approx(1.0, abs=1e-3)
@@ -0,0 +1,300 @@
+"""
+Tests for the coach suggestion paths (streaming, async, batch) and helpers.
+"""
+
+import json
+import asyncio
+import threading
+
+import pytest
+
+from app import coach
+from app.coach import (
+    SuggestionStreamer,
+    SuggestionResponse,
+    suggest_async,
+    suggest_batch,
+    suggest_stream
+)
+
+
+class TestSuggestionStreamer:
+    """Tests for incremental decoding of the suggestion field."""
+    
+    def feed_all(self, chunks):
+        streamer = SuggestionStreamer()
+        return [streamer.feed(chunk) for chunk in chunks]
+    
+    def test_emits_suggestion_text_only(self):
+        """Test that only the suggestion value is emitted, across chunks."""
+        deltas = self.feed_all(['{"sugg', 'estion": "Returns ', 'may vary.", "rationale": "x"}'])
+        assert deltas == ["", "Returns ", "may vary."]
+    
+    def test_decodes_escapes_split_across_chunks(self):
+        """Test that escape sequences split between chunks decode correctly."""
+        payload = json.dumps({"suggestion": 'Say "hi"\né'})
+        deltas = self.feed_all([payload[i:i + 3] for i in range(0, len(payload), 3)])
+        assert "".join(deltas) == 'Say "hi"\né'
+    
+    def test_surrogate_pair_split_across_chunks(self):
+        """Test that an escaped surrogate pair is never emitted half at a time."""
+        payload = '{"suggestion": "Great \\ud83d\\ude00 news"}'
+        
+        for split in range(len(payload)):
+            deltas = self.feed_all([payload[:split], payload[split:]])
+            assert "".join(deltas) == "Great \U0001F600 news"
+            for delta in deltas:
+                delta.encode("utf-8")  # raises on a lone surrogate
+
+
+class TestSuggestStream:
+    """Tests for suggest_stream()."""
+    
+    def test_yields_deltas_then_response(self, monkeypatch):
+        """Test that deltas precede a final guardrailed response."""
+        body = json.dumps({
+            "suggestion": "Returns are not guaranteed.",
+            "alternates": ["Returns are not guaranteed."],
+            "rationale": "Removed guarantee",
+            "policy_refs": ["ADV-6.2"],
+            "confidence": 0.9
+        })
+        monkeypatch.setattr(coach, "stream_llm", lambda prompt: iter([body[:20], body[20:]]))
+        
+        items = list(suggest_stream("We guarantee returns"))
+        
+        assert "".join(items[:-1]) == "Returns are not guaranteed."
+        assert isinstance(items[-1], SuggestionResponse)
+        assert items[-1].confidence == 0.9
+    
+    def test_llm_failure_yields_error_response(self, monkeypatch):
+        """Test that a failing stream ends with the zero-confidence response."""
+        def failing_stream(prompt):
+            raise ValueError("All LLM providers failed")
+            yield
+        monkeypatch.setattr(coach, "stream_llm", failing_stream)
+        
+        items = list(suggest_stream("We guarantee returns"))
+        
+        assert len(items) == 1
+        assert items[0].confidence == 0.0
+    
+    def test_llm_failure_is_logged(self, monkeypatch, caplog):
+        """Test that coach log records reach the standard logging tree."""
+        def failing_stream(prompt):
+            raise ValueError("All LLM providers failed")
+            yield
+        monkeypatch.setattr(coach, "stream_llm", failing_stream)
+        
+        with caplog.at_level("ERROR", logger="app.coach"):
+            list(suggest_stream("We guarantee returns"))
+        
+        assert "All LLM providers failed" in caplog.text
+
+
+class TestSuggestAsync:
+    """Tests for suggest_async()."""
+    
+    def test_matches_sync_pipeline(self, monkeypatch):
+        """Test that known policy hits still get evidence spans and guardrails."""
+        async def fake_call(prompt):
+            return {
+                "suggestion": "Returns are not guaranteed.",
+                "alternates": ["Returns are not guaranteed."],
+                "rationale": "Removed guarantee",
+                "policy_refs": ["ADV-6.2"],
+                "confidence": 0.9
+            }
+        monkeypatch.setattr(coach, "call_llm_async", fake_call)
+        
+        result = asyncio.run(suggest_async("We guarantee returns", policy_hits=["ADV-6.2"]))
+        
+        assert result.suggestion.startswith("Returns are not guaranteed.")
+        assert result.evidence_spans == [(3, 20)]
+        assert result.confidence == 0.9
+    
+    @pytest.mark.parametrize("policy_hits", [["ADV-6.2"], None])
+    def test_prompt_is_built_off_the_event_loop(self, monkeypatch, policy_hits):
+        """Test that redaction and prompt building run in a worker thread on both paths."""
+        threads = []
+        build_prompt = coach.build_prompt
+        
+        def recording_build_prompt(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return build_prompt(*args, **kwargs)
+        
+        async def fake_call(prompt):
+            return {"suggestion": "Returns are not guaranteed.", "confidence": 0.9}
+        monkeypatch.setattr(coach, "build_prompt", recording_build_prompt)
+        monkeypatch.setattr(coach, "call_llm_async", fake_call)
+        
+        asyncio.run(suggest_async("We guarantee returns", policy_hits=policy_hits))
+        
+        assert threads and threading.main_thread() not in threads
+
+
+class TestSuggestBatch:
+    """Tests for suggest_batch()."""
+    
+    def test_one_call_per_batch_in_input_order(self, monkeypatch):
+        """Test that drafts share one LLM call and results keep input order."""
+        prompts = []
+        
+        def fake_call(prompt):
+            prompts.append(prompt)
+            return {"results": [
+                {"index": 2, "suggestion": "Second rewrite.", "alternates": [], "confidence": 0.8},
+                {"index": 1, "suggestion": "First rewrite.", "alternates": [], "confidence": 0.7},
+            ]}
+        monkeypatch.setattr(coach, "call_llm", fake_call)
+        
+        results = suggest_batch(["We guarantee returns", "Call me maybe"])
+        
+        assert len(prompts) == 1
+        assert "[1] We guarantee returns" in prompts[0]["user"]
+        assert [r.suggestion for r in results] == ["First rewrite.", "Second rewrite."]
+        assert results[0].evidence_spans == [(3, 20)]
+    
+    def test_missing_result_falls_back_to_single_call(self, monkeypatch):
+        """Test that a draft the batch response skipped is retried on its own."""
+        def fake_call(prompt):
+            if "BATCH MODE" in prompt["user"]:
+                return {"results": [{"index": 1, "suggestion": "First rewrite.", "confidence": 0.7}]}
+            return {"suggestion": "Single rewrite.", "confidence": 0.6}
+        monkeypatch.setattr(coach, "call_llm", fake_call)
+        
+        results = suggest_batch(["Hello there", "Call me maybe"])
+        
+        assert [r.suggestion for r in results] == ["First rewrite.", "Single rewrite."]
+
+    
+    def test_unparseable_index_only_affects_its_draft(self, monkeypatch):
+        """Test that a result with a bad index is dropped, not the whole batch."""
+        def fake_call(prompt):
+            if "BATCH MODE" in prompt["user"]:
+                return {"results": [
+                    {"index": 1, "suggestion": "First rewrite.", "confidence": 0.7},
+                    {"index": "[2]", "suggestion": "Tagged rewrite.", "confidence": 0.7},
+                ]}
+            return {"suggestion": "Single rewrite.", "confidence": 0.6}
+        monkeypatch.setattr(coach, "call_llm", fake_call)
+        
+        results = suggest_batch(["Hello there", "Call me maybe"])
+        
+        assert [r.suggestion for r in results] == ["First rewrite.", "Single rewrite."]
+    
+    def test_contexts_length_must_match(self):
+        """Test that mismatched contexts are rejected instead of truncating."""
+        with pytest.raises(ValueError):
+            suggest_batch(["a", "b", "c"], contexts=["x"])
+
+
+class TestLLMCache:
+    """Tests for the opt-in LLM response cache."""
+    
+    def test_identical_prompt_calls_llm_once(self, monkeypatch):
+        """Test that a repeated draft is answered from the cache."""
+        calls = []
+        
+        def fake_call(prompt):
+            calls.append(prompt)
+            return {"suggestion": "Returns may vary.", "alternates": [], "confidence": 0.8}
+        monkeypatch.setattr(coach, "call_llm", fake_call)
+        monkeypatch.setattr(coach, "ENABLE_LLM_CACHE", True)
+        coach._llm_cache.clear()
+        
+        first = coach.suggest("We guarantee returns")
+        second = coach.suggest("We guarantee returns")
+        
+        assert len(calls) == 1
+        assert first.suggestion == second.suggestion
+        assert first.alternates == second.alternates
+
+
+class TestRotation:
+    """Tests for suggestion rotation."""
+    
+    def test_cycles_through_unique_options(self):
+        """Test that consecutive parses rotate through primary and alternates."""
+        response = {"suggestion": "A.", "alternates": ["B.", "C."], "confidence": 0.8}
+        chosen = {
+            coach._parse_llm_response(dict(response, alternates=["B.", "C."]), [], {})[0]
+            for _ in range(3)
+        }
+        assert chosen == {"A.", "B.", "C."}
+
+
+class TestPIILeakage:
+    """Tests for _check_pii_leakage()."""
+    
+    CASES = [
+        ("My SSN is 123-45-6789", "Please verify your identity securely.", False),
+        ("My SSN is 123-45-6789", "Your SSN ending in 6789 is on file.", True),
+        ("My SSN is 123456789", "That is 123-45-6789, right?", True),
+    ]
+    
+    def test_detects_full_and_partial_ssns(self, monkeypatch):
+        """Test leakage detection with and without the Aho-Corasick matcher."""
+        for matcher in {coach.AhoCorasick, None}:
+            monkeypatch.setattr(coach, "AhoCorasick", matcher)
+            for original, suggestion, leaked in self.CASES:
+                assert coach._check_pii_leakage(original, suggestion, ["PII-SSN"]) is leaked
+    
+    def test_skipped_without_pii_policy(self):
+        """Test that the check is skipped when no PII policy fired."""
+        assert coach._check_pii_leakage("My SSN is 123-45-6789", "6789", ["ADV-6.2"]) is False
+
+
+class TestDisclosureBatch:
+    """Tests for inject_disclosure_batch()."""
+    
+    def test_matches_single_text_injection(self):
+        """Test that batching gives the same result as injecting one at a time."""
+        texts = [
+            "Our fund offers strong returns.",
+            "Our fund offers returns. This is not financial advice.",
+            "Thanks for reaching out!",
+        ]
+        expected = [coach.inject_disclosure_if_needed(t, "") for t in texts]
+        
+        assert coach.inject_disclosure_batch(texts) == expected
+        assert expected[0].endswith("Investments may lose value.")
+        assert expected[2] == texts[2]
+
+
+class TestPlaceholderLeak:
+    """Tests for the redaction placeholder leak check."""
+    
+    def test_leaked_placeholder_raises(self):
+        """Test that a suggestion echoing a placeholder is rejected."""
+        redaction_map = {"[SSN_REDACTED_1]": "123-45-6789", "[ACCOUNT_REDACTED_1]": "12345678"}
+        response = {"suggestion": "We updated [ACCOUNT_REDACTED_1] for you.", "confidence": 0.8}
+        
+        with pytest.raises(ValueError, match=r"\[ACCOUNT_REDACTED_1\]"):
+            coach._parse_llm_response(response, [], redaction_map)
+    
+    def test_clean_suggestion_passes(self):
+        """Test that a suggestion without placeholders is accepted."""
+        response = {"suggestion": "Please verify through the secure portal.", "confidence": 0.8}
+        fields = coach._parse_llm_response(response, [], {"[SSN_REDACTED_1]": "123-45-6789"})
+        assert fields[0] == "Please verify through the secure portal."
+
+
+class TestStreamFailFast:
+    """Tests for early termination of suggest_stream()."""
+    
+    def test_placeholder_leak_stops_stream(self, monkeypatch):
+        """Test that a leaked placeholder ends the stream before it completes."""
+        consumed = []
+        
+        def leaking_stream(prompt):
+            for chunk in ['{"suggestion": "Your SSN ', '[SSN_REDACTED_1]', ' is', ' on file."}']:
+                consumed.append(chunk)
+                yield chunk
+        monkeypatch.setattr(coach, "stream_llm", leaking_stream)
+        
+        items = list(suggest_stream("My SSN is 123-45-6789"))
+        
+        assert len(consumed) == 2
+        assert items[-1].confidence == 0.0
+        assert "[SSN_REDACTED_1]" not in "".join(i for i in items if isinstance(i, str))
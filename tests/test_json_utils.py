@@ -0,0 +1,73 @@
+"""
+Tests for JSON extraction from LLM output.
+"""
+
+import json
+import time
+from app.providers.json_utils import JsonObjectScanner, extract_json, find_json_object
+
+
+class TestFindJsonObject:
+    """Tests for the balanced-brace JSON scanner."""
+
+    def test_extracts_object_from_surrounding_text(self):
+        """Test that leading and trailing prose is dropped."""
+        text = 'Here you go: {"suggestion": "ok", "alternates": []} Thanks!'
+
+        assert json.loads(find_json_object(text)) == {"suggestion": "ok", "alternates": []}
+
+    def test_handles_deep_nesting(self):
+        """Test objects nested deeper than the old regex could match."""
+        data = {"a": {"b": {"c": {"d": 1}}}}
+
+        assert json.loads(find_json_object(f"x {json.dumps(data)} y")) == data
+
+    def test_ignores_braces_inside_strings(self):
+        """Test that braces and escaped quotes in strings don't affect depth."""
+        data = {"rationale": 'use {name} and "}" carefully \\', "ok": True}
+
+        assert json.loads(find_json_object(json.dumps(data))) == data
+
+    def test_returns_none_without_closed_object(self):
+        """Test missing and unterminated objects."""
+        assert find_json_object("no json here") is None
+        assert find_json_object('{"suggestion": "cut off') is None
+
+    def test_linear_on_unbalanced_input(self):
+        """Test that adversarial unbalanced input is scanned quickly."""
+        text = "{" + "{}" * 50_000
+
+        start = time.perf_counter()
+        assert find_json_object(text) is None
+        assert time.perf_counter() - start < 1.0
+
+
+class TestJsonObjectScanner:
+    """Tests for incremental (streamed) JSON object detection."""
+
+    def test_object_found_when_closing_chunk_arrives(self):
+        """Test chunked input, including an escape split across chunks."""
+        scanner = JsonObjectScanner()
+        chunks = ['Sure: {"rationale": "a \\', '"} quote", ', '"x": {"y": 1}', '} trailing']
+
+        results = [scanner.feed(chunk) for chunk in chunks]
+
+        assert results[:3] == [None, None, None]
+        assert json.loads(results[3]) == {"rationale": 'a "} quote', "x": {"y": 1}}
+        assert scanner.text() == "".join(chunks)
+
+
+class TestExtractJson:
+    """Tests for recovering JSON from wrapped LLM responses."""
+
+    def test_fenced_and_bare_objects(self):
+        """Test markdown-fenced JSON, bare JSON in prose, and no JSON."""
+        assert extract_json('```json\n{"a": 1}\n```') == {"a": 1}
+        assert extract_json('Result: {"b": {"c": 2}} done') == {"b": {"c": 2}}
+        assert extract_json("no braces at all") is None
+
+    def test_skips_non_json_braces_before_object(self):
+        """Test that a brace placeholder in prose doesn't hide the real object."""
+        content = 'Replace {name} below: {"suggestion": "Hi {name}", "alternates": []}'
+
+        assert extract_json(content) == {"suggestion": "Hi {name}", "alternates": []}
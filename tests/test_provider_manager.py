@@ -3,6 +3,8 @@ Tests for provider manager and fallback logic.
 """
 
 import os
+import time
+import asyncio
 import pytest
 from unittest.mock import Mock, patch
 from app.providers.provider_manager import (
@@ -155,6 +157,115 @@ class TestProviderManager:
             assert "All LLM providers failed" in str(exc_info.value)
             assert "groq" in str(exc_info.value).lower()
     
+    @patch("app.providers.openai_provider.OpenAIProvider")
+    @patch("app.providers.groq_provider.GroqProvider")
+    def test_stream_falls_back_before_first_chunk(self, mock_groq, mock_openai):
+        """Test that streaming falls back when the primary fails to start."""
+        mock_groq_instance = Mock()
+        mock_groq_instance.stream_llm.side_effect = Exception("Groq failed")
+        mock_groq.return_value = mock_groq_instance
+        
+        mock_openai_instance = Mock()
+        mock_openai_instance.stream_llm.return_value = iter(['{"sugg', 'estion": "Hi"}'])
+        mock_openai.return_value = mock_openai_instance
+        
+        with patch.dict(os.environ, {
+            "LLM_PROVIDER": "groq",
+            "LLM_FALLBACK_PROVIDERS": "openai"
+        }, clear=False):
+            manager = ProviderManager()
+            chunks = list(manager.stream_llm({"system": "test", "user": "test"}))
+            
+            assert "".join(chunks) == '{"suggestion": "Hi"}'
+            assert manager.last_provider_used == "openai"
+    
+    @patch("app.providers.openai_provider.OpenAIProvider")
+    @patch("app.providers.groq_provider.GroqProvider")
+    def test_async_call_falls_back_on_timeout(self, mock_groq, mock_openai):
+        """Test that a provider exceeding the timeout falls through to the next."""
+        mock_groq_instance = Mock()
+        mock_groq_instance.call_llm.side_effect = lambda prompt: time.sleep(0.5)
+        mock_groq.return_value = mock_groq_instance
+        
+        mock_openai_instance = Mock()
+        mock_openai_instance.call_llm.return_value = {"suggestion": "OpenAI suggestion"}
+        mock_openai.return_value = mock_openai_instance
+        
+        with patch.dict(os.environ, {
+            "LLM_PROVIDER": "groq",
+            "LLM_FALLBACK_PROVIDERS": "openai"
+        }, clear=False):
+            manager = ProviderManager()
+            result = asyncio.run(
+                manager.call_llm_async({"system": "test", "user": "test"}, timeout=0.05)
+            )
+            
+            assert result["suggestion"] == "OpenAI suggestion"
+            assert manager.last_provider_used == "openai"
+    
+    @patch("app.providers.openai_provider.OpenAIProvider")
+    @patch("app.providers.groq_provider.GroqProvider")
+    def test_async_call_hedges_slow_primary(self, mock_groq, mock_openai):
+        """Test that a hedged fallback answers while the slow primary is still pending."""
+        mock_groq_instance = Mock()
+        mock_groq_instance.call_llm.side_effect = lambda prompt: time.sleep(0.5) or {"suggestion": "Groq"}
+        mock_groq.return_value = mock_groq_instance
+        
+        mock_openai_instance = Mock()
+        mock_openai_instance.call_llm.return_value = {"suggestion": "OpenAI suggestion"}
+        mock_openai.return_value = mock_openai_instance
+        
+        with patch.dict(os.environ, {
+            "LLM_PROVIDER": "groq",
+            "LLM_FALLBACK_PROVIDERS": "openai"
+        }, clear=False), patch("app.providers.provider_manager.LLM_HEDGE_DELAY_MS", 20):
+            manager = ProviderManager()
+            
+            async def timed_call():
+                start = time.perf_counter()
+                result = await manager.call_llm_async({"system": "test", "user": "test"})
+                return result, time.perf_counter() - start
+            
+            result, elapsed = asyncio.run(timed_call())
+            
+            assert result["suggestion"] == "OpenAI suggestion"
+            assert elapsed < 0.4
+            assert manager._breakers["groq"].state == "closed"
+    
+    @patch("app.providers.openai_provider.OpenAIProvider")
+    @patch("app.providers.groq_provider.GroqProvider")
+    def test_circuit_opens_after_repeated_failures(self, mock_groq, mock_openai):
+        """Test that a failing primary is skipped once its circuit opens, then probed."""
+        mock_groq_instance = Mock()
+        mock_groq_instance.call_llm.side_effect = Exception("Groq failed")
+        mock_groq.return_value = mock_groq_instance
+        
+        mock_openai_instance = Mock()
+        mock_openai_instance.call_llm.return_value = {"suggestion": "OpenAI suggestion"}
+        mock_openai.return_value = mock_openai_instance
+        
+        with patch.dict(os.environ, {
+            "LLM_PROVIDER": "groq",
+            "LLM_FALLBACK_PROVIDERS": "openai"
+        }, clear=False):
+            manager = ProviderManager()
+            breaker = manager._breakers["groq"]
+            prompt = {"system": "test", "user": "test"}
+            
+            for _ in range(breaker.failure_threshold + 2):
+                manager.call_llm(prompt)
+            assert mock_groq_instance.call_llm.call_count == breaker.failure_threshold
+            assert manager.get_provider_status()["circuits"]["groq"] == "open"
+            
+            # After the cooldown one probe goes through; success closes the circuit
+            breaker.open_seconds = 0
+            mock_groq_instance.call_llm.side_effect = None
+            mock_groq_instance.call_llm.return_value = {"suggestion": "Groq suggestion"}
+            result = manager.call_llm(prompt)
+            
+            assert result["_provider_used"] == "groq"
+            assert breaker.state == "closed"
+    
     def test_get_provider_status(self):
         """Test getting provider status."""
         with patch.dict(os.environ, {
@@ -4,6 +4,7 @@ Unit tests for rules engine.
 
 import pytest
 from engine.rules import RulesEngine, PolicyHit, find_policy_hits, contains_pii, requires_disclosure
+from engine.rules import _DISCLOSURE_TRIGGER_RE, USE_RE2
 
 
 @pytest.fixture
@@ -73,6 +74,35 @@ class TestPIIDetection:
         """Test that numbers that aren't SSNs don't trigger PII."""
         text = "Our account number is 12345."
         assert rules_engine.contains_pii(text) is False
+    
+    @pytest.mark.parametrize("ssn", [
+        "\uff15\uff15\uff15-\uff15\uff15-\uff15\uff15\uff15\uff15",  # fullwidth
+        "\u0661\u0662\u0663-\u0664\u0665-\u0666\u0667\u0668\u0669",  # Arabic-Indic
+    ])
+    def test_ssn_with_non_ascii_digits(self, rules_engine, ssn):
+        """Test that SSNs typed with non-ASCII digits are detected and redacted."""
+        text = f"My SSN is {ssn}, thanks"
+        
+        assert rules_engine.contains_pii(text)
+        hits = [h for h in rules_engine.find_policy_hits(text) if h.policy_id == "PII-SSN"]
+        assert [h.matched_pattern for h in hits] == [ssn]
+        assert text[hits[0].span[0]:hits[0].span[1]] == ssn
+        
+        redacted, redaction_map = rules_engine.redact_pii(text)
+        assert redacted == "My SSN is [SSN_REDACTED_1], thanks"
+        assert redaction_map == {"[SSN_REDACTED_1]": ssn}
+    
+    def test_redact_multiple_values(self, rules_engine):
+        """Test that every SSN and account number is replaced at its own position."""
+        text = "SSNs 123-45-6789 and 987654321, account #12345678."
+        redacted, redaction_map = rules_engine.redact_pii(text)
+        
+        assert redacted == "SSNs [SSN_REDACTED_1] and [SSN_REDACTED_2], account #[ACCOUNT_REDACTED_1]."
+        assert redaction_map == {
+            "[SSN_REDACTED_1]": "123-45-6789",
+            "[SSN_REDACTED_2]": "987654321",
+            "[ACCOUNT_REDACTED_1]": "12345678",
+        }
 
 
 class TestToneDetection:
@@ -118,6 +148,37 @@ class TestDisclosureRequirements:
         text = "Thank you for your inquiry. How can I help?"
         assert rules_engine.requires_disclosure(text) is False
     
+    @pytest.mark.parametrize("text", [
+        "Our fund's returns were strong.",
+        "Returning customers get a discount.",
+        "That's a lossy format.",
+        "Hello there",
+        "Investments, stock-market RISK and earnings_report.",
+        "Riskier bonds; investing in portfolios",
+    ])
+    def test_stem_prefilter_matches_regex(self, rules_engine, text):
+        """Test that the literal-stem prefilter never changes the regex result."""
+        assert rules_engine.requires_disclosure(text) == bool(_DISCLOSURE_TRIGGER_RE.search(text))
+    
+    def test_trigger_automaton_matches_regex_fallback(self, rules_engine):
+        """Test that trigger words found by the phrase automaton agree with the regex path."""
+        texts = [
+            "Our fund's returns were strong.",
+            "return_value and yields",
+            "Investments, stock-market RISK.",
+            "Riskier bonds; investing in portfolios",
+            "Past performance (historical) isn't everything",
+        ]
+        matcher = rules_engine._phrase_matcher
+        try:
+            for text in texts:
+                rules_engine._phrase_matcher = matcher
+                automaton = rules_engine._phrase_scan(text.lower())
+                rules_engine._phrase_matcher = None
+                assert automaton == rules_engine._phrase_scan(text.lower()), text
+        finally:
+            rules_engine._phrase_matcher = matcher
+    
     def test_has_disclosure_detection(self, rules_engine):
         """Test detection of disclosure phrases."""
         text = "Returns may vary. This is not financial advice."
@@ -127,6 +188,55 @@ class TestDisclosureRequirements:
         assert rules_engine.has_disclosure(text_no_disclosure) is False
 
 
+class TestScan:
+    """Tests for the combined single-pass scan."""
+    
+    @pytest.mark.parametrize("text", [
+        "We guarantee returns! My SSN is 123-45-6789.",
+        "Stocks can be volatile. This is not financial advice.",
+        "Happy to help with your order.",
+        "",
+    ])
+    def test_matches_individual_checks(self, rules_engine, text):
+        """Test that scan() agrees with the separate check methods."""
+        result = rules_engine.scan(text)
+        
+        assert result.hits == rules_engine.find_policy_hits(text)
+        assert result.has_pii == rules_engine.contains_pii(text)
+        assert result.needs_disclosure == rules_engine.requires_disclosure(text)
+        assert result.has_disclosure == rules_engine.has_disclosure(text)
+
+
+class TestHitsCache:
+    """Tests for the per-engine find_policy_hits cache."""
+    
+    def test_repeat_text_served_from_cache(self, rules_engine):
+        """Test that a repeated text returns equal hits without rescanning."""
+        text = "We guarantee returns."
+        first = rules_engine.find_policy_hits(text)
+        
+        rules_engine._scan_policy_hits = None  # any rescan would now fail
+        second = rules_engine.find_policy_hits(text)
+        
+        assert second == first
+        assert second is not first
+    
+    def test_pii_results_not_cached(self, rules_engine):
+        """Test that hits quoting an SSN are not kept in the cache."""
+        rules_engine.find_policy_hits("My SSN is 123-45-6789.")
+        
+        assert len(rules_engine._hits_cache) == 0
+    
+    @pytest.mark.skipif(not USE_RE2, reason="RE2 subset sets only")
+    def test_unknown_restrict_ids_are_not_memoized(self, rules_engine):
+        """Test that client-supplied policy ids can't grow the subset pattern-set memo."""
+        for i in range(100):
+            rules_engine.matched_policy_ids("We guarantee returns", frozenset({f"FAKE-{i}", "ADV-6.2"}))
+            rules_engine.matched_policy_ids("We guarantee returns", frozenset({f"FAKE-{i}"}))
+        
+        assert list(rules_engine._subset_pattern_sets) == [frozenset({"ADV-6.2"})]
+
+
 class TestConvenienceFunctions:
     """Tests for module-level convenience functions."""
     
@@ -189,6 +299,70 @@ class TestEdgeCases:
             assert text[hit.span[0]:hit.span[1]].lower() in hit.matched_pattern.lower()
 
 
+class TestPatternSet:
+    """Tests for the RE2 pattern-set prefilter."""
+    
+    def test_matches_per_pattern_scan(self, rules_engine):
+        """Prefiltered scan returns the same hits as scanning every pattern."""
+        if rules_engine._pattern_set is None:
+            pytest.skip("google-re2 not installed")
+        
+        texts = [
+            "We guarantee returns and it's risk-free.",
+            "My SSN is 123-45-6789 or 123456789, you idiot.",
+            "Happy to help. This is not financial advice.",
+            "",
+        ]
+        for text in texts:
+            prefiltered = rules_engine._scan_policy_hits(text, None)
+            pattern_set = rules_engine._pattern_set
+            rules_engine._pattern_set = None
+            try:
+                full_scan = rules_engine._scan_policy_hits(text, None)
+            finally:
+                rules_engine._pattern_set = pattern_set
+            assert prefiltered == full_scan
+
+    
+    def test_fused_fallback_keeps_overlapping_hits(self, rules_engine):
+        """Without RE2, overlapping matches of different patterns are all reported."""
+        text = "We guarantee a risk-free return."
+        pattern_set = rules_engine._pattern_set
+        rules_engine._pattern_set = None
+        try:
+            hits = rules_engine._scan_policy_hits(text, frozenset({"ADV-6.2"}))
+        finally:
+            rules_engine._pattern_set = pattern_set
+        
+        assert sorted(h.matched_pattern for h in hits) == ["guarantee a risk-free return", "risk-free"]
+    
+    def test_restrict_ids(self, rules_engine):
+        """restrict_ids limits hits to the requested policies."""
+        text = "We guarantee returns. My SSN is 123-45-6789."
+        hits = rules_engine.find_policy_hits(text, restrict_ids=frozenset({"PII-SSN"}))
+        
+        assert hits
+        assert all(h.policy_id == "PII-SSN" for h in hits)
+        assert hits == [h for h in rules_engine.find_policy_hits(text) if h.policy_id == "PII-SSN"]
+
+    
+    def test_matched_policy_ids(self, rules_engine):
+        """matched_policy_ids agrees with pattern hits, with and without RE2."""
+        text = "We guarantee returns. My SSN is 123-45-6789."
+        expected = {
+            h.policy_id for h in rules_engine.find_policy_hits(text)
+            if h.matched_pattern != "<missing_disclosure>"
+        }
+        pattern_set = rules_engine._pattern_set
+        try:
+            for current in (pattern_set, None):
+                rules_engine._pattern_set = current
+                assert rules_engine.matched_policy_ids(text) == expected
+                assert rules_engine.matched_policy_ids(text, frozenset({"PII-SSN"})) == {"PII-SSN"}
+        finally:
+            rules_engine._pattern_set = pattern_set
+
+
 class TestPolicyMetadata:
     """Tests for policy metadata access."""
     
@@ -209,6 +383,24 @@ class TestPolicyMetadata:
         phrases = rules_engine.get_disclosure_phrases()
         assert len(phrases) > 0
         assert any("financial advice" in p.lower() for p in phrases)
+    
+    def test_phrase_matcher_matches_substring_scan(self, rules_engine):
+        """Aho-Corasick phrase lookup agrees with the plain substring fallback."""
+        texts = [
+            "This is not financial advice.",
+            "PAST PERFORMANCE does not guarantee future results.",
+            "Happy to help.",
+            "",
+        ]
+        matcher = rules_engine._phrase_matcher
+        try:
+            for text in texts:
+                rules_engine._phrase_matcher = matcher
+                automaton = rules_engine._policies_with_phrases(text.lower())
+                rules_engine._phrase_matcher = None
+                assert automaton == rules_engine._policies_with_phrases(text.lower())
+        finally:
+            rules_engine._phrase_matcher = matcher
 
 
 if __name__ == "__main__":